@@ -0,0 +1,86 @@
+import importlib
+import os
+import pickle
+import subprocess
+import sys
+from typing import Any, Callable, List, Optional
+
+# Frozen builds have no interpreter to run this module with, so workers
+# re-run the executable with this flag and modzt.py hands over to main()
+# before it creates any window.
+WORKER_FLAG = "--analysis-worker"
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def command() -> List[str]:
+    if getattr(sys, "frozen", False):
+        return [sys.executable, WORKER_FLAG]
+    return [sys.executable, "-m", "modules.analysis_worker"]
+
+
+def start() -> Optional[subprocess.Popen]:
+    """Start one worker process, or None if it cannot be started."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (_ROOT, env.get("PYTHONPATH")) if p)
+    try:
+        return subprocess.Popen(
+            command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+    except (OSError, ValueError):
+        return None
+
+
+def request(proc: subprocess.Popen, func: Callable[[Any], Any], arg: Any) -> Any:
+    """Run func(arg) in the worker and return its result.
+
+    func must be a module-level function. Raises OSError or EOFError when
+    the worker is gone.
+    """
+    pickle.dump((func.__module__, func.__qualname__, arg), proc.stdin)
+    proc.stdin.flush()
+    try:
+        return pickle.load(proc.stdout)
+    except pickle.UnpicklingError as e:
+        raise EOFError(str(e)) from None
+
+
+def stop(proc: subprocess.Popen):
+    """Close the worker's input so it exits; kill it if it does not."""
+    try:
+        proc.stdin.close()
+    except OSError:
+        pass
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+    proc.stdout.close()
+
+
+def main() -> int:
+    """Serve (module, function, argument) jobs from stdin until it closes.
+
+    Results go back pickled on stdout; a job that raises returns None.
+    Anything the jobs print goes to stderr so it cannot corrupt a reply.
+    """
+    jobs = os.fdopen(os.dup(0), "rb")
+    replies = os.fdopen(os.dup(1), "wb")
+    sys.stdout = sys.stderr if sys.stderr is not None else open(os.devnull, "w")
+    while True:
+        try:
+            module, name, arg = pickle.load(jobs)
+        except EOFError:
+            return 0
+        try:
+            result = getattr(importlib.import_module(module), name)(arg)
+        except Exception:
+            result = None
+        pickle.dump(result, replies)
+        replies.flush()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+import json
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from modules.hash_engine import HashEngine, ProgressCallback
+from modules.mod_catalog import CatalogEntry, ModCatalog, content_key
+from modules.zip_directory import read_central_directory
+
+ArchiveEntry = namedtuple(
+    "ArchiveEntry",
+    "path original_path size compressed_size crc method",
+)
+
+# One member of an archive that another mod also carries.
+Overlap = namedtuple(
+    "Overlap",
+    "mod enabled path original_path other_path kind",
+)
+
+# How the copies of one shared path differ, most serious first.
+CONFLICT_DIFFERENT = "different"
+CONFLICT_CASE_ONLY = "case"
+CONFLICT_IDENTICAL = "identical"
+CONFLICT_KINDS = (CONFLICT_DIFFERENT, CONFLICT_CASE_ONLY, CONFLICT_IDENTICAL)
+
+
+def normalize_member(name: str) -> str:
+    return name.replace("\\", "/").lower()
+
+
+def read_archive_entries(path: str) -> Optional[List[ArchiveEntry]]:
+    """List an archive from its central directory; member data is not read.
+
+    Returns None when the file is not a readable ZIP.
+    """
+    directory = read_central_directory(path)
+    if directory is None:
+        return None
+    entries = []
+    for i in directory.files():
+        name = directory.name(i)
+        entries.append(ArchiveEntry(normalize_member(name), name, directory.sizes[i],
+                                    directory.compressed_sizes[i], directory.crcs[i],
+                                    directory.methods[i]))
+    return entries
+
+
+def classify_copies(copies: Iterable[Tuple[str, int, int]]) -> str:
+    """Kind of conflict between copies (original_path, size, crc) of a path.
+
+    Only central directory fields are compared, so nothing is decompressed.
+    Copies that differ in content are CONFLICT_DIFFERENT whatever their
+    spelling; equal copies spelled with different case are
+    CONFLICT_CASE_ONLY.
+    """
+    spellings = set()
+    contents = set()
+    for original_path, size, crc in copies:
+        spellings.add(original_path.replace("\\", "/"))
+        contents.add((size, crc))
+    if len(contents) > 1:
+        return CONFLICT_DIFFERENT
+    if len(spellings) > 1:
+        return CONFLICT_CASE_ONLY
+    return CONFLICT_IDENTICAL
+
+
+def ensure_archive_schema(cursor, conn):
+    # Keyed by the catalog's content key: its sample covers the archive size
+    # and its tail, where the central directory lives, so two archives with
+    # the same key have the same listing no matter what they are called.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS archive_entries (
+        hash TEXT NOT NULL,
+        path TEXT NOT NULL,
+        original_path TEXT NOT NULL,
+        size INTEGER DEFAULT 0,
+        compressed_size INTEGER DEFAULT 0,
+        crc INTEGER,
+        method INTEGER,
+        PRIMARY KEY (hash, original_path)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS archive_indexed (
+        hash TEXT PRIMARY KEY,
+        entry_count INTEGER,
+        valid INTEGER DEFAULT 1,
+        indexed_at REAL
+    )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_archive_entries_path ON archive_entries(path)")
+
+    # Inverted index: how many listed members carry each path. Triggers keep
+    # it in step with archive_entries, so it only changes when an archive is
+    # indexed or pruned, and a conflict scan starts from the (few) paths
+    # stored more than once instead of grouping every member.
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='archive_paths'")
+    backfill = cursor.fetchone() is None
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS archive_paths (
+        path TEXT PRIMARY KEY,
+        entries INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_archive_paths_shared ON archive_paths(path) "
+        "WHERE entries > 1")
+    if backfill:
+        cursor.execute(
+            "INSERT INTO archive_paths (path, entries) "
+            "SELECT path, COUNT(*) FROM archive_entries GROUP BY path")
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS archive_entries_ai AFTER INSERT ON archive_entries BEGIN
+        INSERT INTO archive_paths (path, entries) VALUES (new.path, 1)
+        ON CONFLICT(path) DO UPDATE SET entries = entries + 1;
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS archive_entries_ad AFTER DELETE ON archive_entries BEGIN
+        UPDATE archive_paths SET entries = entries - 1 WHERE path = old.path;
+        DELETE FROM archive_paths WHERE path = old.path AND entries <= 0;
+    END
+    """)
+    conn.commit()
+
+
+class ArchiveIndex:
+    """Listings of every cataloged archive, stored once per content hash.
+
+    update() reads the central directory of archives the index has not seen
+    yet; everything else (conflict scans, listings, member lookups) is a
+    query that never opens a ZIP.
+    """
+
+    def __init__(self, cursor, conn):
+        self.cursor = cursor
+        self.conn = conn
+
+    def missing(self, game: str) -> List[CatalogEntry]:
+        self.cursor.execute(
+            "SELECT name, location, path, size, mtime_ns, inode, device, hash, "
+            "sample_hash FROM mod_catalog c WHERE game=? AND content_key IS NOT NULL "
+            "AND NOT EXISTS (SELECT 1 FROM archive_indexed a WHERE a.hash=c.content_key)",
+            (game, ))
+        return [CatalogEntry(*row) for row in self.cursor.fetchall()]
+
+    def pending(self, game: str) -> int:
+        """Cataloged archives whose listing is not indexed yet."""
+        self.cursor.execute(
+            "SELECT COUNT(*) FROM mod_catalog c WHERE game=? AND (content_key IS NULL "
+            "OR NOT EXISTS (SELECT 1 FROM archive_indexed a WHERE a.hash=c.content_key))",
+            (game, ))
+        return self.cursor.fetchone()[0]
+
+    def update(self, game: str, engine: Optional[HashEngine] = None,
+               progress: Optional[ProgressCallback] = None) -> int:
+        """Index every cataloged archive whose content is not indexed yet.
+
+        Sample hashes are filled in first where the catalog lacks them.
+        Returns the number of archives read.
+        """
+        engine = engine or HashEngine()
+        catalog = ModCatalog(self.cursor, self.conn)
+        catalog.set_sample_hashes(game, engine.sample_hashes(catalog.unsampled(game)))
+        self.prune()
+
+        todo: Dict[str, CatalogEntry] = {}
+        for entry in self.missing(game):
+            todo.setdefault(content_key(entry.sample_hash, entry.mtime_ns), entry)
+        if not todo:
+            return 0
+
+        total = len(todo)
+        now = time.time()
+        with ThreadPoolExecutor(max_workers=engine.workers) as pool:
+            listings = pool.map(lambda e: read_archive_entries(e.path), todo.values())
+            for done, (key, entries) in enumerate(zip(todo, listings), 1):
+                if engine.cancelled:
+                    break
+                self._store(key, entries, now)
+                if progress:
+                    progress(done, total, todo[key].name)
+        self.conn.commit()
+        return total
+
+    def _store(self, key: str, entries: Optional[List[ArchiveEntry]], now: float):
+        self.cursor.execute("DELETE FROM archive_entries WHERE hash=?", (key, ))
+        if entries:
+            # OR IGNORE, not OR REPLACE: a replace would skip the delete
+            # trigger and leave archive_paths counting a member twice.
+            self.cursor.executemany(
+                "INSERT OR IGNORE INTO archive_entries (hash, path, original_path, "
+                "size, compressed_size, crc, method) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(key, ) + tuple(e) for e in entries])
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO archive_indexed (hash, entry_count, valid, indexed_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, len(entries or ()), 0 if entries is None else 1, now))
+
+    def prune(self):
+        """Drop listings no cataloged file refers to any more."""
+        self.cursor.execute(
+            "DELETE FROM archive_entries WHERE hash NOT IN "
+            "(SELECT content_key FROM mod_catalog WHERE content_key IS NOT NULL)")
+        self.cursor.execute(
+            "DELETE FROM archive_indexed WHERE hash NOT IN "
+            "(SELECT content_key FROM mod_catalog WHERE content_key IS NOT NULL)")
+        self.conn.commit()
+
+    def entries(self, game: str, name: str) -> Optional[List[ArchiveEntry]]:
+        """Listing of one mod, or None when it has not been indexed."""
+        return self._listing("c.game=? AND c.name=?", (game, name))
+
+    def entries_at(self, path: str) -> Optional[List[ArchiveEntry]]:
+        """Listing of the cataloged file at path, or None if not indexed."""
+        return self._listing("c.path=?", (path, ))
+
+    def _listing(self, where: str, params) -> Optional[List[ArchiveEntry]]:
+        self.cursor.execute(
+            "SELECT c.content_key, a.valid FROM mod_catalog c JOIN archive_indexed a "
+            f"ON a.hash=c.content_key WHERE {where}", params)
+        row = self.cursor.fetchone()
+        if row is None or not row[1]:
+            return None
+        self.cursor.execute(
+            "SELECT path, original_path, size, compressed_size, crc, method "
+            "FROM archive_entries WHERE hash=? ORDER BY original_path", (row[0], ))
+        return [ArchiveEntry(*r) for r in self.cursor.fetchall()]
+
+    def paths_matching(self, game: str, pattern: str) -> Dict[str, bool]:
+        """path -> whether any member LIKE pattern, for every indexed archive."""
+        self.cursor.execute(
+            "SELECT c.path, EXISTS (SELECT 1 FROM archive_entries e "
+            "  WHERE e.hash=c.content_key AND e.path LIKE ?) "
+            "FROM mod_catalog c JOIN archive_indexed a ON a.hash=c.content_key "
+            "WHERE c.game=? AND a.valid=1", (pattern, game))
+        return {path: bool(found) for path, found in self.cursor.fetchall()}
+
+    def conflicts(self, game: str, names: Optional[Iterable[str]] = None,
+                  table: Optional[str] = None, enabled_only: bool = False,
+                  suffix: Optional[str] = None):
+        """Rows (path, mod, size, original_path, enabled, crc) for members
+        that more than one mod carries.
+
+        When names is given only mods in it are considered. table names the
+        mod table whose enabled flag is joined in (mods missing from it are
+        skipped); with enabled_only a path must be shared by two enabled
+        mods. suffix keeps only paths ending in it, e.g. ".xml". enabled is
+        None when no table is given.
+        """
+        params: list = [game]
+        where = ["c.game=?1"]
+        state = "NULL"
+        join = ""
+        if table:
+            state = "m.enabled"
+            join = f"JOIN {table} m ON m.name=c.name "
+            if enabled_only:
+                where.append("m.enabled=1")
+        if names is not None:
+            where.append("c.name IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(list(names)))
+        if suffix:
+            where.append("e.path LIKE ?")
+            params.append("%" + suffix.lower())
+        # Two names with one content key share a listing, so their paths
+        # are counted once; they still conflict with each other.
+        self.cursor.execute(
+            "WITH shared AS (SELECT path FROM archive_paths WHERE entries > 1 "
+            "  UNION SELECT e.path FROM archive_entries e WHERE e.hash IN "
+            "  (SELECT content_key FROM mod_catalog WHERE game=?1 AND content_key "
+            "   IS NOT NULL GROUP BY content_key HAVING COUNT(*) > 1)), "
+            f"owned AS (SELECT e.path, c.name, e.size, e.original_path, {state} AS enabled, "
+            "  e.crc "
+            "  FROM shared s JOIN archive_entries e ON e.path=s.path "
+            "  JOIN mod_catalog c ON c.content_key=e.hash "
+            f"  {join}WHERE {' AND '.join(where)}) "
+            "SELECT path, name, size, original_path, enabled, crc FROM owned WHERE path IN "
+            "(SELECT path FROM owned GROUP BY path HAVING COUNT(DISTINCT name) > 1) "
+            "ORDER BY path, name", params)
+        return self.cursor.fetchall()
+
+    def overlaps(self, game: str, entries: Iterable[ArchiveEntry],
+                 exclude: Iterable[str] = (), table: Optional[str] = None
+                 ) -> Dict[str, List[Overlap]]:
+        """mod -> members of a listing that mod carries too, classified.
+
+        entries may come from any archive, installed or not (see
+        read_archive_entries); only the index is queried, no other archive
+        is opened. Mods named in exclude are skipped. With table, the
+        enabled flag is joined in and mods missing from it are skipped.
+        """
+        # Fed as JSON rather than through a temp table: the lookup stays a
+        # plain read and never opens a transaction on the caller's connection.
+        probe = json.dumps([[e.path, e.original_path, e.size, e.crc] for e in entries])
+        return self._overlaps(
+            "(SELECT json_extract(value, '$[0]') AS path, "
+            " json_extract(value, '$[1]') AS original_path, "
+            " json_extract(value, '$[2]') AS size, json_extract(value, '$[3]') AS crc "
+            " FROM json_each(?))",
+            [probe], game, exclude, table)
+
+    def overlaps_for(self, game: str, name: str, table: Optional[str] = None
+                     ) -> Dict[str, List[Overlap]]:
+        """overlaps() of a cataloged mod against every other mod."""
+        return self._overlaps(
+            "(SELECT e.path, e.original_path, e.size, e.crc FROM mod_catalog c "
+            " JOIN archive_entries e ON e.hash=c.content_key WHERE c.game=? AND c.name=?)",
+            [game, name], game, [name], table)
+
+    def _overlaps(self, source: str, params: list, game: str, exclude: Iterable[str],
+                  table: Optional[str]) -> Dict[str, List[Overlap]]:
+        state, join = "NULL", ""
+        if table:
+            state, join = "m.enabled", f"CROSS JOIN {table} m ON m.name=c.name "
+        # CROSS JOIN fixes the order probe -> member -> mod, so each probe row
+        # is one lookup in the path index; left to itself the planner may
+        # start from the catalog and scan the probe once per mod.
+        self.cursor.execute(
+            f"SELECT c.name, {state}, p.path, p.original_path, p.size, p.crc, "
+            "e.original_path, e.size, e.crc "
+            f"FROM {source} p CROSS JOIN archive_entries e ON e.path=p.path "
+            "CROSS JOIN mod_catalog c ON c.content_key=e.hash AND c.game=? "
+            f"{join}WHERE c.name NOT IN (SELECT value FROM json_each(?)) "
+            "ORDER BY c.name, p.path", params + [game, json.dumps(list(exclude))])
+        found: Dict[str, List[Overlap]] = {}
+        for (mod, enabled, path, original_path, size, crc, other_path, other_size,
+             other_crc) in self.cursor.fetchall():
+            kind = classify_copies([(original_path, size, crc),
+                                    (other_path, other_size, other_crc)])
+            found.setdefault(mod, []).append(
+                Overlap(mod, enabled, path, original_path, other_path, kind))
+        return found
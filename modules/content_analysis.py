@@ -0,0 +1,476 @@
+import io
+import json
+import os
+import queue
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import (Any, BinaryIO, Callable, Dict, Iterable, Iterator, List,
+                    Optional, Tuple)
+
+from modules import analysis_worker
+from modules.hash_engine import HashEngine, ProgressCallback
+from modules.mod_catalog import ModCatalog, content_key
+
+# Checked in this order; the first type present anywhere in the file wins.
+ENTITY_TYPES = (
+    ("BFAIType", "animals", "Animal"),
+    ("BFBuildingType", "buildings", "Building"),
+    ("BFSceneryType", "scenery", "Scenery"),
+    ("BFFenceType", "fences", "Fence"),
+    ("BFPathType", "paths", "Path"),
+    ("BFFoliageType", "foliage", "Foliage"),
+    ("BFGuestType", "guests", "Guest"),
+    ("BFStaffType", "staff", "Staff"),
+    ("BFUnitType", "objects", "Object"),
+)
+
+# Used when the XML names no entity type.
+FOLDER_TYPES = (
+    ("animals", "animals", "Animal"),
+    ("buildings", "buildings", "Building"),
+    ("scenery", "scenery", "Scenery"),
+    ("foliage", "foliage", "Foliage"),
+    ("fences", "fences", "Fence"),
+    ("paths", "paths", "Path"),
+)
+
+# For each field, candidate tags by priority. The first element carrying
+# each tag counts; the first of those with text is the value.
+FIELD_TAGS = {
+    "codename": ("codename", "Codename", "cCodename", "ccodename"),
+    "name": ("cIconName", "ciconname", "IconName", "Name", "name", "cName"),
+    "description": ("cDescription", "Description", "description"),
+}
+
+_TYPE_RANK = {tag: i for i, (tag, _, _) in enumerate(ENTITY_TYPES)}
+_ROOT_RANK = {tag.lower(): i for i, (tag, _, _) in enumerate(ENTITY_TYPES)}
+_FIELD_OF = {tag: field for field, tags in FIELD_TAGS.items() for tag in tags}
+
+
+class _FieldState:
+    """First-element texts for one field's candidate tags."""
+    __slots__ = ("tags", "texts")
+
+    def __init__(self, tags):
+        self.tags = tags
+        self.texts = {}
+
+    def value(self) -> Optional[str]:
+        for tag in self.tags:
+            text = self.texts.get(tag)
+            if text:
+                return text.strip()
+        return None
+
+    @property
+    def final(self) -> bool:
+        # Settled once every higher priority tag has been seen (empty).
+        for tag in self.tags:
+            if tag not in self.texts:
+                return False
+            if self.texts[tag]:
+                return True
+        return True
+
+
+def classify_entity(source: BinaryIO, filename: str) -> Optional[Dict]:
+    """Classify one entity XML in a single streaming pass.
+
+    source is a binary file object, e.g. from ZipFile.open(). Elements are
+    dispatched on their tag as they are parsed and cleared once handled, so
+    memory stays flat however large the file is. Type priority and field
+    choice match a search of the whole tree, so parsing stops early only
+    once the top ranked type and every field are settled. Returns None for
+    XML that is not an entity. Raises ET.ParseError for malformed XML.
+    """
+    fields = {field: _FieldState(tags) for field, tags in FIELD_TAGS.items()}
+    pending = {}
+    best_type = None
+    root = None
+    root_attrs = {}
+    depth = 0
+
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            depth += 1
+            if root is None:
+                root = elem
+                root_attrs = dict(elem.attrib)
+                rank = _ROOT_RANK.get(tag.lower() if tag else "")
+            else:
+                rank = _TYPE_RANK.get(tag)
+                field = _FIELD_OF.get(tag)
+                if field and tag not in fields[field].texts and tag not in pending:
+                    pending[tag] = elem
+            if rank is not None and (best_type is None or rank < best_type):
+                best_type = rank
+            continue
+
+        depth -= 1
+        if pending.get(tag) is elem:
+            del pending[tag]
+            fields[_FIELD_OF[tag]].texts[tag] = elem.text or ""
+        if best_type == 0 and not pending and all(f.final for f in fields.values()):
+            break
+        if depth == 1:
+            # A finished top-level subtree is no longer needed.
+            root.clear()
+
+    if best_type is not None:
+        _, category, type_name = ENTITY_TYPES[best_type]
+    else:
+        path_lower = filename.lower().replace("\\", "/")
+        for folder, category, type_name in FOLDER_TYPES:
+            if f"/{folder}/" in path_lower:
+                break
+        else:
+            return None
+
+    codename = fields["codename"].value()
+    if not codename:
+        codename = (root_attrs.get("Type") or root_attrs.get("type")
+                    or os.path.splitext(os.path.basename(filename))[0])
+    name = fields["name"].value() or codename
+
+    return {
+        "filename": filename,
+        "name": name,
+        "codename": codename,
+        "type": type_name,
+        "category": category,
+        "description": fields["description"].value(),
+    }
+
+
+def classify_entity_bytes(data: bytes, filename: str) -> Optional[Dict]:
+    """Lenient fallback for members the streaming parser rejects.
+
+    Drops undecodable bytes and any BOM the way the old reader did.
+    """
+    text = data.decode("utf-8", errors="ignore").lstrip("\ufeff")
+    # The text is re-encoded as UTF-8, so an encoding declaration would lie.
+    if text.startswith("<?xml"):
+        end = text.find("?>")
+        if end != -1:
+            text = text[end + 2:]
+    return classify_entity(io.BytesIO(text.encode("utf-8")), filename)
+
+
+def classify_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> Optional[Dict]:
+    """Classify one archive member; None if it is not a readable entity."""
+    try:
+        try:
+            with zf.open(info) as member:
+                return classify_entity(member, info.filename)
+        except ET.ParseError:
+            return classify_entity_bytes(zf.read(info), info.filename)
+    except Exception:
+        return None
+
+
+def iter_entities(zf: zipfile.ZipFile,
+                  infos: Optional[Iterable[zipfile.ZipInfo]] = None) -> Iterator[Dict]:
+    """Yield the entity of each XML member as it is classified."""
+    for info in zf.infolist() if infos is None else infos:
+        if info.filename.lower().endswith('.xml'):
+            entity = classify_member(zf, info)
+            if entity:
+                yield entity
+
+
+ENTITY_CATEGORIES = ("animals", "objects", "buildings", "scenery", "foliage",
+                     "fences", "paths", "guests", "staff", "other")
+
+
+def parse_z2f_contents(z2f_path: str) -> Optional[Dict]:
+    """Listing plus classified entities of one archive; None if not a ZIP."""
+    contents = {category: [] for category in ENTITY_CATEGORIES}
+    contents.update({"files": [], "total_size": 0, "compressed_size": 0})
+
+    try:
+        with zipfile.ZipFile(z2f_path, 'r') as zf:
+            for info in zf.infolist():
+                contents["total_size"] += info.file_size
+                contents["compressed_size"] += info.compress_size
+                contents["files"].append({
+                    "name": info.filename,
+                    "size": info.file_size,
+                    "compressed": info.compress_size
+                })
+
+            for entity_info in iter_entities(zf):
+                category = entity_info.get("category", "other")
+                if category in contents:
+                    contents[category].append(entity_info)
+                else:
+                    contents["other"].append(entity_info)
+    except zipfile.BadZipFile:
+        return None
+
+    return contents
+
+
+def archive_entities(path: str) -> Optional[List[Dict]]:
+    """Every classified entity in one archive. Runs in pool workers."""
+    try:
+        contents = parse_z2f_contents(path)
+    except OSError:
+        return None
+    if contents is None:
+        return None
+    return [entity for category in ENTITY_CATEGORIES for entity in contents[category]]
+
+
+def count_entities(entities: Iterable[Dict]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for entity in entities:
+        category = entity.get("category") or "other"
+        if category not in ENTITY_CATEGORIES:
+            category = "other"
+        counts[category] = counts.get(category, 0) + 1
+    return counts
+
+
+def entity_counts(path: str) -> Optional[Dict[str, int]]:
+    """Entities per category in one archive. Runs in pool workers."""
+    try:
+        contents = parse_z2f_contents(path)
+    except OSError:
+        return None
+    if contents is None:
+        return None
+    return {category: len(contents[category]) for category in ENTITY_CATEGORIES
+            if contents[category]}
+
+
+_NAME_HINTS = (
+    (("animal", "creature", "species"), "Animals"),
+    (("building", "shop", "restaurant", "restroom"), "Buildings"),
+    (("tree", "plant", "flower", "bush"), "Foliage"),
+    (("scenery", "rock", "decoration"), "Scenery"),
+    (("fence", "wall", "barrier"), "Fences"),
+    (("path", "road", "walkway"), "Paths"),
+    (("ui", "interface", "menu", "hack"), "UI/Hacks"),
+    (("map", "scenario", "zoo"), "Maps/Scenarios"),
+)
+
+
+def suggest_category(mod_name: str, counts: Optional[Dict[str, int]]) -> str:
+    """Pick a category from entity counts, falling back to the file name."""
+    if counts is None:
+        return "Uncategorized"
+
+    animals = counts.get("animals", 0)
+    if animals:
+        return "Animal Pack" if animals > 5 else "Animals"
+    for category, label in (("buildings", "Buildings"), ("scenery", "Scenery"),
+                            ("foliage", "Foliage"), ("fences", "Fences"),
+                            ("paths", "Paths"), ("objects", "Objects")):
+        if counts.get(category):
+            return label
+
+    name_lower = mod_name.lower()
+    for hints, label in _NAME_HINTS:
+        if any(x in name_lower for x in hints):
+            return label
+    return "Uncategorized"
+
+
+def ensure_analysis_schema(cursor, conn):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS content_analysis (
+        hash TEXT PRIMARY KEY,
+        counts TEXT,
+        analyzed_at REAL
+    )
+    """)
+    conn.commit()
+
+
+class _WorkerPool:
+    """Futures run by analysis worker processes (see analysis_worker).
+
+    One feeder thread per process sends it a job at a time. When a process
+    cannot start or dies, its thread runs the jobs itself, so the work
+    degrades to threads instead of stalling.
+    """
+
+    def __init__(self, workers: int):
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._threads = [threading.Thread(target=self._feed, daemon=True)
+                         for _ in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, func: Callable[[str], Any], arg: str) -> Future:
+        future: Future = Future()
+        self._jobs.put((future, func, arg))
+        return future
+
+    def _feed(self):
+        proc = analysis_worker.start()
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    return
+                future, func, arg = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if proc is not None:
+                    try:
+                        future.set_result(analysis_worker.request(proc, func, arg))
+                        continue
+                    except (OSError, EOFError):
+                        analysis_worker.stop(proc)
+                        proc = None
+                try:
+                    future.set_result(func(arg))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            if proc is not None:
+                analysis_worker.stop(proc)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        if cancel_futures:
+            while True:
+                try:
+                    job = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    job[0].cancel()
+        for _ in self._threads:
+            self._jobs.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class ContentAnalyzer:
+    """Analyze archives on every core and hand results back as they finish.
+
+    XML parsing is CPU bound and holds the GIL, so archives are fanned out
+    to worker processes that import only modules.*, never the GUI script.
+    cancel() drops every archive not started yet.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def run(self, jobs: Iterable[Tuple[str, str]],
+            on_result: Callable[[str, Any], None],
+            func: Callable[[str], Any] = entity_counts):
+        """Call on_result(key, func(path)) for each (key, path) as it completes.
+
+        func must be a module-level function so process workers can load it.
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return
+        pool = _WorkerPool(min(self.workers, len(jobs)))
+        try:
+            pending = {pool.submit(func, path): key for key, path in jobs}
+            while pending and not self.cancelled:
+                done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception:
+                        result = None
+                    on_result(key, result)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def categorize_mods(cursor, conn, names: Iterable[str],
+                    analyzer: Optional[ContentAnalyzer] = None,
+                    progress: Optional[ProgressCallback] = None,
+                    game: str = "ZT2", table: str = "mods",
+                    batch: int = 50) -> Dict[str, str]:
+    """Categorize mods from their contents; returns name -> new category.
+
+    Counts are cached by the catalog's content key, so only new or changed
+    archives are parsed. Categories are written in batched transactions
+    as results stream in. Mods that end up Uncategorized are left alone.
+    """
+    analyzer = analyzer or ContentAnalyzer()
+    names = set(names)
+    catalog = ModCatalog(cursor, conn)
+    catalog.set_sample_hashes(game, HashEngine().sample_hashes(
+        [e for e in catalog.unsampled(game) if e.name in names]))
+    entries = [e for e in catalog.snapshot(game).values()
+               if e.name in names and e.sample_hash]
+
+    by_key: Dict[str, List[str]] = {}
+    paths: Dict[str, str] = {}
+    for entry in entries:
+        key = content_key(entry.sample_hash, entry.mtime_ns)
+        by_key.setdefault(key, []).append(entry.name)
+        paths.setdefault(key, entry.path)
+
+    # A failed analysis (counts NULL) may have been transient, so it is
+    # tried again rather than taken from the cache.
+    cursor.execute(
+        "SELECT hash, counts FROM content_analysis WHERE counts IS NOT NULL AND hash IN "
+        "(SELECT value FROM json_each(?))", (json.dumps(list(by_key)), ))
+    cached = {key: json.loads(counts) for key, counts in cursor.fetchall()}
+
+    categorized: Dict[str, str] = {}
+    updates: List[Tuple[str, str]] = []
+    stored: List[Tuple[str, Optional[str], float]] = []
+    total = len(entries)
+    done = 0
+
+    def flush():
+        if updates:
+            cursor.executemany(f"UPDATE {table} SET category=? WHERE name=?", updates)
+            updates.clear()
+        if stored:
+            cursor.executemany(
+                "INSERT OR REPLACE INTO content_analysis (hash, counts, analyzed_at) "
+                "VALUES (?, ?, ?)", stored)
+            stored.clear()
+        conn.commit()
+
+    def on_result(key, counts):
+        nonlocal done
+        for name in by_key[key]:
+            done += 1
+            category = suggest_category(name, counts)
+            if category != "Uncategorized":
+                categorized[name] = category
+                updates.append((category, name))
+            if progress:
+                progress(done, total, name)
+        if len(updates) + len(stored) >= batch:
+            flush()
+
+    for key in list(by_key):
+        if key in cached:
+            on_result(key, cached[key])
+    flush()
+
+    def analyzed(key, counts):
+        if counts is not None:
+            stored.append((key, json.dumps(counts), time.time()))
+        on_result(key, counts)
+
+    analyzer.run([(key, paths[key]) for key in by_key if key not in cached],
+                 analyzed)
+    flush()
+    return categorized
@@ -0,0 +1,323 @@
+import json
+import re
+import sqlite3
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional, Set
+
+from modules.content_analysis import (ContentAnalyzer, archive_entities, count_entities,
+                                      ensure_analysis_schema)
+from modules.hash_engine import HashEngine, ProgressCallback
+from modules.mod_catalog import CatalogEntry, ModCatalog, content_key, file_content_key
+
+EntityHit = namedtuple(
+    "EntityHit",
+    "mod type name codename description filename",
+)
+
+# One definition of a codename that more than one mod defines.
+CodenameClash = namedtuple(
+    "CodenameClash",
+    "codename mod type name filename enabled",
+)
+
+_SEARCH_COLUMNS = ("name", "codename", "description", "type", "filename")
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def ensure_entity_schema(cursor, conn) -> bool:
+    """Create the entity tables; returns False when SQLite lacks FTS5.
+
+    Without FTS5 the entities are still stored and searched with LIKE.
+    """
+    ensure_analysis_schema(cursor, conn)
+    # Keyed by the catalog's content key like the archive index, so a
+    # renamed mod is never parsed twice.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS entities (
+        id INTEGER PRIMARY KEY,
+        hash TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        type TEXT,
+        category TEXT,
+        name TEXT,
+        codename TEXT,
+        description TEXT
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_entities_hash ON entities(hash)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_entities_codename ON entities(codename COLLATE NOCASE)")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS entity_indexed (
+        hash TEXT PRIMARY KEY,
+        entity_count INTEGER,
+        valid INTEGER DEFAULT 1,
+        indexed_at REAL
+    )
+    """)
+
+    # How many stored entities carry each codename, kept in step by triggers
+    # like archive_paths, so a collision scan starts from the codenames
+    # defined more than once.
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='entity_codenames'")
+    backfill = cursor.fetchone() is None
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS entity_codenames (
+        codename TEXT PRIMARY KEY COLLATE NOCASE,
+        entries INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_entity_codenames_shared ON entity_codenames(codename) "
+        "WHERE entries > 1")
+    if backfill:
+        cursor.execute(
+            "INSERT INTO entity_codenames (codename, entries) SELECT codename, COUNT(*) "
+            "FROM entities WHERE codename IS NOT NULL GROUP BY codename COLLATE NOCASE")
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS entities_codename_ai AFTER INSERT ON entities
+    WHEN new.codename IS NOT NULL BEGIN
+        INSERT INTO entity_codenames (codename, entries) VALUES (new.codename, 1)
+        ON CONFLICT(codename) DO UPDATE SET entries = entries + 1;
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS entities_codename_ad AFTER DELETE ON entities
+    WHEN old.codename IS NOT NULL BEGIN
+        UPDATE entity_codenames SET entries = entries - 1 WHERE codename = old.codename;
+        DELETE FROM entity_codenames WHERE codename = old.codename AND entries <= 0;
+    END
+    """)
+
+    try:
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS entity_search USING fts5("
+            "name, codename, description, type, filename, "
+            "content='entities', content_rowid='id')")
+    except sqlite3.OperationalError:
+        conn.commit()
+        return False
+    # External content table: the triggers keep the full-text index in step.
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS entities_ai AFTER INSERT ON entities BEGIN
+        INSERT INTO entity_search (rowid, name, codename, description, type, filename)
+        VALUES (new.id, new.name, new.codename, new.description, new.type, new.filename);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS entities_ad AFTER DELETE ON entities BEGIN
+        INSERT INTO entity_search (entity_search, rowid, name, codename, description,
+                                   type, filename)
+        VALUES ('delete', old.id, old.name, old.codename, old.description, old.type,
+                old.filename);
+    END
+    """)
+    conn.commit()
+    return True
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word, as a prefix."""
+    return " ".join(f'"{token}"*' for token in _TOKEN.findall(text))
+
+
+class EntityIndex:
+    """Entities of every cataloged archive, searchable by full text.
+
+    update() parses only archives whose content has not been indexed yet;
+    search() is a single query over the whole library.
+    """
+
+    def __init__(self, cursor, conn):
+        self.cursor = cursor
+        self.conn = conn
+        self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='entity_search'")
+        self.fts = self.cursor.fetchone() is not None
+
+    def missing(self, game: str) -> List[CatalogEntry]:
+        self.cursor.execute(
+            "SELECT name, location, path, size, mtime_ns, inode, device, hash, "
+            "sample_hash FROM mod_catalog c WHERE game=? AND content_key IS NOT NULL "
+            "AND NOT EXISTS (SELECT 1 FROM entity_indexed i WHERE i.hash=c.content_key)",
+            (game, ))
+        return [CatalogEntry(*row) for row in self.cursor.fetchall()]
+
+    def update(self, game: str, analyzer: Optional[ContentAnalyzer] = None,
+               progress: Optional[ProgressCallback] = None,
+               batch: int = 50) -> int:
+        """Index every cataloged archive whose content is not indexed yet.
+
+        Per-category counts are cached for categorize_mods() on the way.
+        Returns the number of archives parsed.
+        """
+        catalog = ModCatalog(self.cursor, self.conn)
+        catalog.set_sample_hashes(game, HashEngine().sample_hashes(catalog.unsampled(game)))
+        self.prune()
+
+        todo: Dict[str, CatalogEntry] = {}
+        for entry in self.missing(game):
+            todo.setdefault(content_key(entry.sample_hash, entry.mtime_ns), entry)
+        if not todo:
+            return 0
+
+        analyzer = analyzer or ContentAnalyzer()
+        total = len(todo)
+        done = 0
+        now = time.time()
+
+        def on_result(key, entities):
+            nonlocal done
+            done += 1
+            self._store(key, entities, now)
+            if done % batch == 0:
+                self.conn.commit()
+            if progress:
+                progress(done, total, todo[key].name)
+
+        analyzer.run([(key, entry.path) for key, entry in todo.items()],
+                     on_result, archive_entities)
+        self.conn.commit()
+        return done
+
+    def _store(self, key: str, entities: Optional[List[Dict]], now: float):
+        self.cursor.execute("DELETE FROM entities WHERE hash=?", (key, ))
+        if entities:
+            self.cursor.executemany(
+                "INSERT INTO entities (hash, filename, type, category, name, "
+                "codename, description) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(key, e["filename"], e.get("type"), e.get("category"), e.get("name"),
+                  e.get("codename"), e.get("description")) for e in entities])
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO entity_indexed (hash, entity_count, valid, indexed_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, len(entities or ()), 0 if entities is None else 1, now))
+        counts = count_entities(entities) if entities is not None else None
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO content_analysis (hash, counts, analyzed_at) "
+            "VALUES (?, ?, ?)",
+            (key, json.dumps(counts) if counts is not None else None, now))
+
+    def prune(self):
+        """Drop entities no cataloged file refers to any more."""
+        self.cursor.execute(
+            "DELETE FROM entities WHERE hash NOT IN "
+            "(SELECT content_key FROM mod_catalog WHERE content_key IS NOT NULL)")
+        self.cursor.execute(
+            "DELETE FROM entity_indexed WHERE hash NOT IN "
+            "(SELECT content_key FROM mod_catalog WHERE content_key IS NOT NULL)")
+        self.conn.commit()
+
+    def entities_at(self, path: str) -> Optional[List[Dict]]:
+        """Entities of the cataloged file at path, or None if not indexed."""
+        self.cursor.execute(
+            "SELECT c.content_key, i.valid FROM mod_catalog c JOIN entity_indexed i "
+            "ON i.hash=c.content_key WHERE c.path=?", (path, ))
+        row = self.cursor.fetchone()
+        if row is None or not row[1]:
+            return None
+        self.cursor.execute(
+            "SELECT filename, name, codename, type, category, description "
+            "FROM entities WHERE hash=? ORDER BY id", (row[0], ))
+        return [{"filename": filename, "name": name, "codename": codename,
+                 "type": type_name, "category": category,
+                 "description": description}
+                for filename, name, codename, type_name, category, description
+                in self.cursor.fetchall()]
+
+    def store_at(self, path: str, entities: List[Dict]) -> bool:
+        """Record entities parsed elsewhere for the cataloged file at path."""
+        self.cursor.execute(
+            "SELECT content_key FROM mod_catalog WHERE path=? AND content_key IS NOT NULL",
+            (path, ))
+        row = self.cursor.fetchone()
+        # The catalog may predate an edit to the file; never file entities
+        # under a key that no longer describes it.
+        if row is None or file_content_key(path) != row[0]:
+            return False
+        self._store(row[0], entities, time.time())
+        self.conn.commit()
+        return True
+
+    def pending(self, game: str) -> int:
+        """Cataloged archives not indexed yet."""
+        self.cursor.execute(
+            "SELECT COUNT(DISTINCT COALESCE(content_key, path)) FROM mod_catalog c WHERE game=? "
+            "AND (content_key IS NULL OR NOT EXISTS "
+            "(SELECT 1 FROM entity_indexed i WHERE i.hash=c.content_key))", (game, ))
+        return self.cursor.fetchone()[0]
+
+    def search(self, text: str, game: str = "ZT2", limit: Optional[int] = 500,
+               entity_type: Optional[str] = None) -> List[EntityHit]:
+        """Entities whose name, codename, description, type or file match
+        every word of text (as prefixes), best matches first."""
+        tokens = _TOKEN.findall(text)
+        if not tokens:
+            return []
+        # The catalog is joined after matching, so a hit is listed once for
+        # every mod that carries the same archive.
+        params: list = [game]
+        if self.fts:
+            source = "entity_search s JOIN entities e ON e.id=s.rowid"
+            where = ["entity_search MATCH ?"]
+            params.append(fts_query(text))
+            order = "s.rank, c.name"
+        else:
+            source = "entities e"
+            where = []
+            for token in tokens:
+                where.append("(" + " OR ".join(f"e.{column} LIKE ?"
+                                               for column in _SEARCH_COLUMNS) + ")")
+                params.extend([f"%{token}%"] * len(_SEARCH_COLUMNS))
+            order = "c.name, e.name"
+        if entity_type:
+            where.append("e.type=?")
+            params.append(entity_type)
+        sql = ("SELECT c.name, e.type, e.name, e.codename, e.description, e.filename "
+               f"FROM {source} JOIN mod_catalog c ON c.content_key=e.hash AND c.game=? "
+               f"WHERE {' AND '.join(where)} ORDER BY {order}")
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        self.cursor.execute(sql, params)
+        return [EntityHit(*row) for row in self.cursor.fetchall()]
+
+    def mods_matching(self, text: str, game: str = "ZT2") -> Set[str]:
+        """Names of the mods with at least one matching entity."""
+        return {hit.mod for hit in self.search(text, game, limit=None)}
+
+    def codename_conflicts(self, game: str, table: Optional[str] = None,
+                           enabled_only: bool = False,
+                           distinct_files: bool = True) -> List[CodenameClash]:
+        """Definitions of codenames that more than one mod defines.
+
+        Codenames are compared ignoring case. With distinct_files (the
+        default) a codename must also come from more than one file path;
+        copies at the same path are file conflicts already. table and
+        enabled_only work as in ArchiveIndex.conflicts().
+        """
+        where = ["c.game=?1"]
+        state, join = "NULL", ""
+        if table:
+            state, join = "m.enabled", f"JOIN {table} m ON m.name=c.name "
+            if enabled_only:
+                where.append("m.enabled=1")
+        having = "COUNT(DISTINCT name) > 1"
+        if distinct_files:
+            having += " AND COUNT(DISTINCT lower(filename)) > 1"
+        self.cursor.execute(
+            "WITH shared AS (SELECT codename FROM entity_codenames WHERE entries > 1 "
+            "  UNION SELECT e.codename FROM entities e WHERE e.codename IS NOT NULL "
+            "  AND e.hash IN (SELECT content_key FROM mod_catalog WHERE game=?1 AND "
+            "  content_key IS NOT NULL GROUP BY content_key HAVING COUNT(*) > 1)), "
+            "owned AS (SELECT e.codename, c.name, e.type, e.name AS entity, e.filename, "
+            f"  {state} AS enabled FROM shared s "
+            "  JOIN entities e ON e.codename = s.codename COLLATE NOCASE "
+            "  JOIN mod_catalog c ON c.content_key=e.hash "
+            f"  {join}WHERE {' AND '.join(where)}) "
+            "SELECT DISTINCT codename, name, type, entity, filename, enabled FROM owned "
+            "WHERE lower(codename) IN (SELECT lower(codename) FROM owned "
+            f"GROUP BY lower(codename) HAVING {having}) "
+            "ORDER BY lower(codename), name, filename", (game, ))
+        return [CodenameClash(*row) for row in self.cursor.fetchall()]
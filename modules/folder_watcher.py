@@ -0,0 +1,151 @@
+import os
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from modules.mod_catalog import CatalogEntry, FolderDiff, diff_scans, scan_mod_folders
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+    FileSystemEventHandler = object
+
+FolderList = Iterable[Tuple[Optional[str], str]]
+
+
+class _EventHandler(FileSystemEventHandler):
+
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        # Newer watchdog versions also report reads; hashing would wake us.
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        self.watcher.poke()
+
+
+class FolderWatcher:
+    """Watch the mod folders and report one debounced diff per burst.
+
+    Uses OS notifications through watchdog when it is installed, otherwise
+    falls back to polling with a cheap scandir pass. Either way a burst of
+    events (a 200 file copy, an archive extraction) is collapsed into a
+    single FolderDiff once the folders have been quiet for `debounce`
+    seconds. `on_change` is called from a background thread, and so is
+    `on_error`, with a message for failures the watcher recovers from.
+    """
+
+    def __init__(self, get_folders: Callable[[], FolderList], suffix: str,
+                 on_change: Callable[[FolderDiff], None],
+                 debounce: float = 0.75, poll_interval: float = 3.0,
+                 skip_prefixes: Tuple[str, ...] = (),
+                 on_error: Optional[Callable[[str], None]] = None):
+        self.get_folders = get_folders
+        self.suffix = suffix
+        self.skip_prefixes = skip_prefixes
+        self.on_error = on_error
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._timer = None
+        self._observer = None
+        self._stop = threading.Event()
+        self._snapshot: Dict[str, CatalogEntry] = {}
+
+    @property
+    def uses_notifications(self) -> bool:
+        return self._observer is not None
+
+    def start(self):
+        self._snapshot = self._scan()
+        if WATCHDOG_AVAILABLE:
+            try:
+                self._start_observer()
+                return
+            except Exception as e:
+                self._report(f"Folder notifications unavailable, polling instead: {e}")
+                self._observer = None
+        threading.Thread(target=self._poll, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+        if self._observer:
+            self._observer.stop()
+            self._observer = None
+
+    def retarget(self):
+        """Call after the folders returned by get_folders have changed.
+
+        The new folders become the baseline, so their existing files are
+        not reported as added (nor the old folders' files as removed).
+        """
+        if self._observer:
+            self._observer.stop()
+            self._start_observer()
+        self._snapshot = self._scan()
+        self.poke()
+
+    def _report(self, message: str):
+        if self.on_error:
+            self.on_error(message)
+        else:
+            print(f"[!] {message}")
+
+    def _scan(self) -> Dict[str, CatalogEntry]:
+        return scan_mod_folders(self.get_folders(), self.suffix, self.skip_prefixes)
+
+    def _start_observer(self):
+        observer = Observer()
+        handler = _EventHandler(self)
+        for folder, _ in self.get_folders():
+            if folder and os.path.isdir(folder):
+                observer.schedule(handler, folder, recursive=False)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+
+    def poke(self):
+        """Note that something changed and (re)arm the debounce timer."""
+        if self._stop.is_set():
+            return
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush(self):
+        with self._lock:
+            self._timer = None
+        current = self._scan()
+        diff = diff_scans(self._snapshot, current)
+        self._snapshot = current
+        if not diff.empty:
+            try:
+                self.on_change(diff)
+            except Exception as e:
+                self._report(f"Watcher error: {e}")
+
+    def _poll(self):
+        last = self._snapshot
+        while not self._stop.wait(self.poll_interval):
+            try:
+                current = self._scan()
+            except Exception as e:
+                self._report(f"Watcher error: {e}")
+                continue
+            # Only re-arm on fresh activity so a steady state can flush.
+            if current != last:
+                last = current
+                self.poke()
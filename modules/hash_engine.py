@@ -0,0 +1,123 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Optional
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+SAMPLE_SIZE = 64 * 1024
+READ_SIZE = 1024 * 1024
+
+# Digests are tagged with the algorithm so a cache written before xxhash was
+# installed never compares equal to one written after.
+DIGEST_TAG = "xxh3" if XXHASH_AVAILABLE else "b2b"
+
+ProgressCallback = Callable[[int, int, str], None]
+
+
+def _new_digest():
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=20)
+
+
+def _tagged(h) -> str:
+    return f"{DIGEST_TAG}:{h.hexdigest()}"
+
+
+def sample_hash(path: str, size: Optional[int] = None) -> Optional[str]:
+    """Hash the size plus the first and last SAMPLE_SIZE bytes of a file.
+
+    For ZIP based archives the tail holds the central directory (names and
+    CRCs of every member), so two archives with the same sample are almost
+    always identical. Files up to 2 * SAMPLE_SIZE are hashed in full.
+    """
+    try:
+        if size is None:
+            size = os.path.getsize(path)
+        h = _new_digest()
+        h.update(size.to_bytes(8, "little"))
+        with open(path, "rb") as f:
+            if size <= 2 * SAMPLE_SIZE:
+                h.update(f.read())
+            else:
+                h.update(f.read(SAMPLE_SIZE))
+                f.seek(-SAMPLE_SIZE, os.SEEK_END)
+                h.update(f.read(SAMPLE_SIZE))
+        return _tagged(h)
+    except OSError:
+        return None
+
+
+def full_hash(path: str, cancel: Optional[threading.Event] = None) -> Optional[str]:
+    h = _new_digest()
+    buf = bytearray(READ_SIZE)
+    view = memoryview(buf)
+    try:
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    return None
+                n = f.readinto(buf)
+                if not n:
+                    break
+                h.update(view[:n])
+        return _tagged(h)
+    except OSError:
+        return None
+
+
+class HashEngine:
+    """Thread pool that hashes catalog entries and can be cancelled.
+
+    hashlib and xxhash release the GIL on large buffers, so worker threads
+    keep several disks (or one SSD queue) busy instead of a single reader.
+    cancel() stops the run in progress; the next run starts afresh.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or min(8, (os.cpu_count() or 2) + 2)
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def _run(self, entries, func, progress: Optional[ProgressCallback]) -> Dict[str, str]:
+        self._cancel.clear()
+        entries = list(entries)
+        results: Dict[str, str] = {}
+        if not entries:
+            return results
+
+        total = len(entries)
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(func, entry): entry for entry in entries}
+            for future in as_completed(futures):
+                entry = futures[future]
+                done += 1
+                if self.cancelled:
+                    for f in futures:
+                        f.cancel()
+                    break
+                digest = future.result()
+                if digest:
+                    results[entry.name] = digest
+                if progress:
+                    progress(done, total, entry.name)
+        return results
+
+    def sample_hashes(self, entries, progress: Optional[ProgressCallback] = None) -> Dict[str, str]:
+        return self._run(entries, lambda e: sample_hash(e.path, e.size), progress)
+
+    def full_hashes(self, entries, progress: Optional[ProgressCallback] = None) -> Dict[str, str]:
+        return self._run(entries, lambda e: full_hash(e.path, self._cancel), progress)
@@ -0,0 +1,187 @@
+import json
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from modules.mod_catalog import LOCATION_ENABLED
+
+# One path of the merged filesystem: the archive the game reads it from and
+# the archives it shadows, latest loaded first.
+Resolution = namedtuple("Resolution", "path winner original_path shadowed")
+
+
+def load_order_key(name: str) -> str:
+    """Sort key of an archive in ZT2's load order.
+
+    The game reads the archives in its folder in alphabetical order of
+    their file names, ignoring case, and a later archive replaces any path
+    an earlier one provided.
+    """
+    return name.lower()
+
+
+def ensure_load_order_schema(cursor, conn):
+    # The archives the winners were computed from. Comparing this with the
+    # catalog tells which archives came, went or changed since the last
+    # sync, and only their paths are resolved again.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS load_order_members (
+        game TEXT NOT NULL,
+        name TEXT NOT NULL,
+        hash TEXT NOT NULL,
+        sort_key TEXT NOT NULL,
+        PRIMARY KEY (game, name)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_load_order_members_hash "
+        "ON load_order_members(hash)")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS load_order_winners (
+        game TEXT NOT NULL,
+        path TEXT NOT NULL,
+        mod TEXT NOT NULL,
+        original_path TEXT NOT NULL,
+        copies INTEGER NOT NULL,
+        PRIMARY KEY (game, path)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_load_order_winners_mod "
+        "ON load_order_winners(game, mod)")
+    conn.commit()
+
+
+class LoadOrderResolver:
+    """Merged view of every loaded archive: which one supplies each path.
+
+    Built on the archive index; sync() resolves again only the paths of
+    archives enabled, disabled, added or changed since the previous sync,
+    so toggling one mod costs as much as that mod's listing.
+    """
+
+    def __init__(self, cursor, conn):
+        self.cursor = cursor
+        self.conn = conn
+
+    def loaded(self, game: str) -> Dict[str, str]:
+        """name -> content key of the indexed archives the game loads."""
+        self.cursor.execute(
+            "SELECT c.name, c.content_key FROM mod_catalog c "
+            "JOIN archive_indexed a ON a.hash=c.content_key "
+            "WHERE c.game=? AND c.location=? AND a.valid=1",
+            (game, LOCATION_ENABLED))
+        return dict(self.cursor.fetchall())
+
+    def sync(self, game: str) -> int:
+        """Bring the winners up to date; returns the paths resolved again."""
+        self.cursor.execute(
+            "SELECT name, hash FROM load_order_members WHERE game=?", (game, ))
+        before = dict(self.cursor.fetchall())
+        after = self.loaded(game)
+
+        gone = [name for name, key in before.items() if after.get(name) != key]
+        came = [name for name, key in after.items() if before.get(name) != key]
+        if not gone and not came:
+            return 0
+
+        self.cursor.execute(
+            "SELECT 1 FROM json_each(?) WHERE value NOT IN (SELECT hash FROM archive_indexed)",
+            (json.dumps([before[name] for name in gone]), ))
+        if self.cursor.fetchone():
+            # A removed archive whose listing is already pruned: the paths it
+            # supplied are unknown, so resolve everything again.
+            self.cursor.execute("DELETE FROM load_order_members WHERE game=?", (game, ))
+            self.cursor.execute("DELETE FROM load_order_winners WHERE game=?", (game, ))
+            before, gone, came = {}, [], list(after)
+
+        touched = {before[name] for name in gone} | {after[name] for name in came}
+        self.cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS load_order_touched "
+            "(path TEXT PRIMARY KEY) WITHOUT ROWID")
+        self.cursor.execute("DELETE FROM load_order_touched")
+        self.cursor.execute(
+            "INSERT OR IGNORE INTO load_order_touched SELECT path FROM archive_entries "
+            "WHERE hash IN (SELECT value FROM json_each(?))", (json.dumps(list(touched)), ))
+
+        self.cursor.execute(
+            "DELETE FROM load_order_members WHERE game=? AND name IN "
+            "(SELECT value FROM json_each(?))", (game, json.dumps(gone)))
+        self.cursor.executemany(
+            "INSERT OR REPLACE INTO load_order_members (game, name, hash, sort_key) "
+            "VALUES (?, ?, ?, ?)",
+            [(game, name, after[name], load_order_key(name)) for name in came])
+
+        self.cursor.execute(
+            "DELETE FROM load_order_winners WHERE game=? AND path IN "
+            "(SELECT path FROM load_order_touched)", (game, ))
+        # A path an archive lists twice (differing only in case) is one copy.
+        self.cursor.execute(
+            "INSERT INTO load_order_winners (game, path, mod, original_path, copies) "
+            "SELECT ?1, path, name, original_path, copies FROM ("
+            "  SELECT path, name, original_path, "
+            "  ROW_NUMBER() OVER (PARTITION BY path ORDER BY sort_key DESC, name DESC) AS rank, "
+            "  COUNT(*) OVER (PARTITION BY path) AS copies FROM ("
+            "    SELECT e.path, m.name, m.sort_key, MIN(e.original_path) AS original_path "
+            "    FROM load_order_touched t JOIN archive_entries e ON e.path=t.path "
+            "    JOIN load_order_members m ON m.hash=e.hash AND m.game=?1 "
+            "    GROUP BY e.path, m.name)) "
+            "WHERE rank=1", (game, ))
+        self.cursor.execute("SELECT COUNT(*) FROM load_order_touched")
+        resolved = self.cursor.fetchone()[0]
+        self.cursor.execute("DELETE FROM load_order_touched")
+        self.conn.commit()
+        return resolved
+
+    def winner(self, game: str, path: str) -> Optional[Tuple[str, str]]:
+        """(mod, original path) the game reads path from, or None."""
+        self.cursor.execute(
+            "SELECT mod, original_path FROM load_order_winners WHERE game=? AND path=?",
+            (game, path.replace("\\", "/").lower()))
+        return self.cursor.fetchone()
+
+    def resolve(self, game: str, paths: Iterable[str]) -> List[Resolution]:
+        """Full resolution of the given paths; unknown paths are left out."""
+        keys = sorted({path.replace("\\", "/").lower() for path in paths})
+        return self._resolutions(
+            game, "w.path IN (SELECT value FROM json_each(?))", [json.dumps(keys)])
+
+    def overrides(self, game: str, mod: Optional[str] = None) -> List[Resolution]:
+        """Every path more than one loaded archive supplies.
+
+        With mod, only the paths that mod supplies, whether it wins them
+        or not.
+        """
+        where = "w.copies > 1"
+        params: list = []
+        if mod is not None:
+            where += (" AND w.path IN (SELECT e.path FROM load_order_members m "
+                      "JOIN archive_entries e ON e.hash=m.hash WHERE m.game=?1 AND m.name=?)")
+            params.append(mod)
+        return self._resolutions(game, where, params)
+
+    def _resolutions(self, game: str, where: str, params: list) -> List[Resolution]:
+        self.cursor.execute(
+            "SELECT w.path, w.mod, w.original_path, m.name FROM load_order_winners w "
+            "JOIN archive_entries e ON e.path=w.path "
+            "JOIN load_order_members m ON m.hash=e.hash AND m.game=w.game "
+            f"WHERE w.game=?1 AND {where} "
+            "GROUP BY w.path, m.name ORDER BY w.path, m.sort_key DESC, m.name DESC",
+            [game] + params)
+        resolutions: List[Resolution] = []
+        for path, winner, original_path, name in self.cursor.fetchall():
+            if not resolutions or resolutions[-1].path != path:
+                resolutions.append(Resolution(path, winner, original_path, []))
+            if name != winner:
+                resolutions[-1].shadowed.append(name)
+        return resolutions
+
+    def summary(self, game: str) -> Dict[str, Tuple[int, int]]:
+        """mod -> (contested paths it wins, contested paths it loses)."""
+        self.cursor.execute(
+            "SELECT name, SUM(winner = name), SUM(winner <> name) FROM ("
+            "  SELECT DISTINCT w.path, w.mod AS winner, m.name FROM load_order_winners w "
+            "  JOIN archive_entries e ON e.path=w.path "
+            "  JOIN load_order_members m ON m.hash=e.hash AND m.game=w.game "
+            "  WHERE w.game=? AND w.copies > 1) "
+            "GROUP BY name", (game, ))
+        return {name: (wins, losses) for name, wins, losses in self.cursor.fetchall()}
@@ -0,0 +1,428 @@
+import json
+import os
+import time
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from modules.hash_engine import sample_hash
+
+LOCATION_ENABLED = "enabled"
+LOCATION_DISABLED = "disabled"
+
+CatalogEntry = namedtuple(
+    "CatalogEntry",
+    "name location path size mtime_ns inode device hash sample_hash",
+)
+
+_ENTRY_COLUMNS = "name, location, path, size, mtime_ns, inode, device, hash, sample_hash"
+
+
+def content_key(sample: Optional[str], mtime_ns: Optional[int]) -> Optional[str]:
+    """Key the content caches file a cataloged archive under.
+
+    The sample hash misses an edit in the middle of an archive that keeps
+    its size, so the modification time is part of the key. Matches the
+    content_key column of mod_catalog.
+    """
+    if sample is None or mtime_ns is None:
+        return None
+    return f"{sample}:{mtime_ns}"
+
+
+def file_content_key(path: str) -> Optional[str]:
+    """content_key() of the file at path as it is on disk now."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return content_key(sample_hash(path, st.st_size), st.st_mtime_ns)
+
+
+class FolderDiff(namedtuple("FolderDiff", "added removed moved changed renamed",
+                            defaults=((), ))):
+    """Difference between two folder scans.
+
+    added/moved/changed hold CatalogEntry objects from the newer scan,
+    removed holds names. moved means the file switched between the enabled
+    and disabled folders. renamed holds (old name, CatalogEntry) pairs for
+    files that reappeared under another name.
+    """
+    __slots__ = ()
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.moved or self.changed
+                    or self.renamed)
+
+
+def diff_scans(old: Dict[str, CatalogEntry],
+               new: Dict[str, CatalogEntry],
+               renames: Optional[Dict[str, CatalogEntry]] = None) -> FolderDiff:
+    renames = renames or {}
+    new_names = {entry.name for entry in renames.values()}
+    added, moved, changed = [], [], []
+    for name, entry in new.items():
+        prev = old.get(name)
+        if prev is None:
+            if name not in new_names:
+                added.append(entry)
+        elif prev.location != entry.location:
+            moved.append(entry)
+        elif prev.size != entry.size or prev.mtime_ns != entry.mtime_ns:
+            changed.append(entry)
+    removed = [name for name in old if name not in new and name not in renames]
+    return FolderDiff(added, removed, moved, changed, list(renames.items()))
+
+
+def match_renames(vanished: Dict[str, CatalogEntry],
+                  appeared: Iterable[CatalogEntry]) -> Dict[str, CatalogEntry]:
+    """Pair files that disappeared with files that appeared under a new name.
+
+    A file with the same device, inode, size and mtime is the same file.
+    Otherwise (a copy, or a filesystem without inode numbers) the appeared
+    file is sample hashed, but only when its size matches a vanished entry
+    that has a sample hash. Returns old name -> new entry, carrying over the
+    old hashes so nothing has to be read again.
+    """
+    renames: Dict[str, CatalogEntry] = {}
+    if not vanished:
+        return renames
+
+    by_inode = {(e.device, e.inode, e.size, e.mtime_ns): e
+                for e in vanished.values() if e.inode is not None}
+    by_size: Dict[int, List[CatalogEntry]] = {}
+    for e in vanished.values():
+        if e.sample_hash:
+            by_size.setdefault(e.size, []).append(e)
+
+    for entry in appeared:
+        old = None
+        if entry.inode is not None:
+            old = by_inode.pop(
+                (entry.device, entry.inode, entry.size, entry.mtime_ns), None)
+        if old is not None:
+            renames[old.name] = entry._replace(hash=old.hash,
+                                               sample_hash=old.sample_hash)
+            continue
+        candidates = [e for e in by_size.get(entry.size, ())
+                      if e.name not in renames]
+        if not candidates:
+            continue
+        sample = sample_hash(entry.path, entry.size)
+        for old in candidates:
+            if old.sample_hash == sample:
+                renames[old.name] = entry._replace(hash=old.hash,
+                                                   sample_hash=sample)
+                break
+    return renames
+
+
+class ModSyncDiff(namedtuple("ModSyncDiff",
+                             "added removed state_changed changed catalog renamed",
+                             defaults=({}, ))):
+    """Result of syncing a mods table against the folders.
+
+    added/removed/state_changed/changed are lists of names; changed means
+    size or mtime moved while the enabled state did not. catalog maps every
+    name that was looked at to its CatalogEntry. renamed maps old names to
+    new ones whose rows were rekeyed rather than recreated.
+    """
+    __slots__ = ()
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.state_changed
+                    or self.changed or self.renamed)
+
+    @property
+    def touched(self) -> List[str]:
+        renamed = [new for new in self.renamed.values()
+                   if new not in self.state_changed]
+        return self.added + self.state_changed + self.changed + renamed
+
+
+def rekey_mod_rows(cursor, table: str, renames: Dict[str, str],
+                   related: Iterable[Tuple[str, str]] = ()):
+    """Rename mods in place so their metadata follows the file.
+
+    Updates the name column of `table` and every (table, column) pair in
+    `related`. A stale row already holding the new name is replaced. The
+    caller owns the transaction.
+    """
+    if not renames:
+        return
+    pairs = [(new, old) for old, new in renames.items()]
+    cursor.executemany(f"UPDATE OR REPLACE {table} SET name=? WHERE name=?", pairs)
+    for rel_table, column in related:
+        cursor.executemany(
+            f"UPDATE OR REPLACE {rel_table} SET {column}=? WHERE {column}=?", pairs)
+
+
+def sync_mod_rows(cursor, table: str, scanned: Dict[str, int],
+                  scope: Optional[Iterable[str]] = None):
+    """Reconcile a mods table (name -> enabled) against one SELECT.
+
+    Only names in `scope` are considered when it is given, so a watcher
+    diff can be applied without touching the rest of the table. The caller
+    owns the transaction. Returns (added, removed, state_changed).
+    """
+    cursor.execute(f"SELECT name, enabled FROM {table}")
+    known = dict(cursor.fetchall())
+    if scope is not None:
+        scope = set(scope)
+        known = {name: e for name, e in known.items() if name in scope}
+
+    added = [name for name in scanned if name not in known]
+    state_changed = [name for name, enabled in scanned.items()
+                     if name in known and known[name] != enabled]
+    removed = [name for name in known if name not in scanned]
+
+    upserts = [(name, scanned[name]) for name in added + state_changed]
+    if upserts:
+        cursor.executemany(
+            f"INSERT INTO {table} (name, enabled) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET enabled=excluded.enabled", upserts)
+    if removed:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE name IN (SELECT value FROM json_each(?))",
+            (json.dumps(removed), ))
+    return added, removed, state_changed
+
+
+def ensure_catalog_schema(cursor, conn):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS mod_catalog (
+        game TEXT NOT NULL,
+        name TEXT NOT NULL,
+        location TEXT NOT NULL,
+        path TEXT NOT NULL,
+        size INTEGER DEFAULT 0,
+        mtime_ns INTEGER DEFAULT 0,
+        inode INTEGER,
+        device INTEGER,
+        hash TEXT,
+        sample_hash TEXT,
+        scanned_at REAL,
+        content_key TEXT GENERATED ALWAYS AS (sample_hash || ':' || mtime_ns) VIRTUAL,
+        PRIMARY KEY (game, name)
+    )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_mod_catalog_hash ON mod_catalog(hash)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_mod_catalog_sample ON mod_catalog(size, sample_hash)")
+    # The content caches join on content_key alone, from the member side.
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_mod_catalog_content_key ON mod_catalog(content_key)")
+    conn.commit()
+
+
+def scan_mod_folders(folders: Iterable[Tuple[Optional[str], str]],
+                     suffix: str, skip_prefixes: Tuple[str, ...] = ()
+                     ) -> Dict[str, CatalogEntry]:
+    """Walk each (folder, location) pair once, statting only matching files.
+
+    A file present in both folders is reported from the first folder listed,
+    which is the copy the game actually loads. Files whose names start with
+    one of skip_prefixes (any case) are not mods and are left out.
+    """
+    found: Dict[str, CatalogEntry] = {}
+    suffix = suffix.lower()
+    skip_prefixes = tuple(prefix.lower() for prefix in skip_prefixes)
+    for folder, location in folders:
+        if not folder:
+            continue
+        try:
+            it = os.scandir(folder)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                name = entry.name
+                lower = name.lower()
+                if name in found or not lower.endswith(suffix):
+                    continue
+                if skip_prefixes and lower.startswith(skip_prefixes):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                # Windows fills st_ino/st_dev lazily; 0 means "not known".
+                found[name] = CatalogEntry(name, location, entry.path,
+                                           st.st_size, st.st_mtime_ns,
+                                           st.st_ino or None, st.st_dev or None,
+                                           None, None)
+    return found
+
+
+class ModCatalog:
+
+    def __init__(self, cursor, conn):
+        self.cursor = cursor
+        self.conn = conn
+
+    def snapshot(self, game: str) -> Dict[str, CatalogEntry]:
+        self.cursor.execute(
+            f"SELECT {_ENTRY_COLUMNS} FROM mod_catalog WHERE game=?", (game, ))
+        return {row[0]: CatalogEntry(*row) for row in self.cursor.fetchall()}
+
+    def refresh(self, game: str, folders: Iterable[Tuple[Optional[str], str]],
+                suffix: str, commit: bool = True,
+                skip_prefixes: Tuple[str, ...] = ()
+                ) -> Tuple[Dict[str, CatalogEntry], FolderDiff]:
+        """Rescan the folders and reconcile the catalog against one SELECT.
+
+        Content and sample hashes survive as long as size and mtime are
+        unchanged, and follow a file that was renamed (see match_renames).
+        Returns the new snapshot and its diff against the old one.
+        """
+        scanned = scan_mod_folders(folders, suffix, skip_prefixes)
+        known = self.snapshot(game)
+        now = time.time()
+
+        renames = match_renames(
+            {name: e for name, e in known.items() if name not in scanned},
+            [e for name, e in scanned.items() if name not in known])
+        for entry in renames.values():
+            scanned[entry.name] = entry
+
+        upserts = []
+        snapshot: Dict[str, CatalogEntry] = {}
+        for name, entry in scanned.items():
+            old = known.get(name)
+            if old is not None and old.size == entry.size and old.mtime_ns == entry.mtime_ns:
+                entry = entry._replace(hash=old.hash, sample_hash=old.sample_hash)
+                if old == entry:
+                    snapshot[name] = entry
+                    continue
+            snapshot[name] = entry
+            upserts.append((game, name, entry.location, entry.path, entry.size,
+                            entry.mtime_ns, entry.inode, entry.device,
+                            entry.hash, entry.sample_hash, now))
+
+        removed = [name for name in known if name not in scanned]
+
+        if upserts:
+            self.cursor.executemany(
+                "INSERT OR REPLACE INTO mod_catalog (game, name, location, path, size, "
+                "mtime_ns, inode, device, hash, sample_hash, scanned_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", upserts)
+        if removed:
+            self.cursor.execute(
+                "DELETE FROM mod_catalog WHERE game=? AND name IN "
+                "(SELECT value FROM json_each(?))", (game, json.dumps(removed)))
+        if commit and (upserts or removed):
+            self.conn.commit()
+        return snapshot, diff_scans(known, snapshot, renames)
+
+    def apply_diff(self, game: str, diff: FolderDiff, commit: bool = True):
+        """Write a watcher diff without rescanning the folders."""
+        now = time.time()
+        rows = [(game, e.name, e.location, e.path, e.size, e.mtime_ns, e.inode,
+                 e.device, None, None, now) for e in diff.added + diff.changed]
+        if rows:
+            self.cursor.executemany(
+                "INSERT OR REPLACE INTO mod_catalog (game, name, location, path, size, "
+                "mtime_ns, inode, device, hash, sample_hash, scanned_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        if diff.moved:
+            self.cursor.executemany(
+                "UPDATE mod_catalog SET location=?, path=?, scanned_at=? "
+                "WHERE game=? AND name=?",
+                [(e.location, e.path, now, game, e.name) for e in diff.moved])
+        if diff.renamed:
+            self.cursor.executemany(
+                "UPDATE OR REPLACE mod_catalog SET name=?, location=?, path=?, "
+                "size=?, mtime_ns=?, inode=?, device=?, hash=?, sample_hash=?, "
+                "scanned_at=? WHERE game=? AND name=?",
+                [(e.name, e.location, e.path, e.size, e.mtime_ns, e.inode,
+                  e.device, e.hash, e.sample_hash, now, game, old)
+                 for old, e in diff.renamed])
+        if diff.removed:
+            self.cursor.executemany(
+                "DELETE FROM mod_catalog WHERE game=? AND name=?",
+                [(game, name) for name in diff.removed])
+        if commit:
+            self.conn.commit()
+
+    def detect_renames(self, game: str, diff: FolderDiff) -> FolderDiff:
+        """Turn added/removed pairs of a watcher diff into renames."""
+        if not (diff.added and diff.removed):
+            return diff
+        self.cursor.execute(
+            f"SELECT {_ENTRY_COLUMNS} FROM mod_catalog WHERE game=? AND name IN "
+            "(SELECT value FROM json_each(?))", (game, json.dumps(diff.removed)))
+        vanished = {row[0]: CatalogEntry(*row) for row in self.cursor.fetchall()}
+        renames = match_renames(vanished, diff.added)
+        if not renames:
+            return diff
+        new_names = {e.name for e in renames.values()}
+        return FolderDiff([e for e in diff.added if e.name not in new_names],
+                          [n for n in diff.removed if n not in renames],
+                          diff.moved, diff.changed,
+                          list(diff.renamed) + list(renames.items()))
+
+    def relocate(self, game: str, name: str, location: str, path: str):
+        self.cursor.execute(
+            "UPDATE mod_catalog SET location=?, path=? WHERE game=? AND name=?",
+            (location, path, game, name))
+        self.conn.commit()
+
+    def forget(self, game: str, name: str):
+        self.cursor.execute("DELETE FROM mod_catalog WHERE game=? AND name=?",
+                            (game, name))
+        self.conn.commit()
+
+    def set_hashes(self, game: str, hashes: Dict[str, str]):
+        if not hashes:
+            return
+        self.cursor.executemany(
+            "UPDATE mod_catalog SET hash=? WHERE game=? AND name=?",
+            [(h, game, name) for name, h in hashes.items()])
+        self.conn.commit()
+
+    def set_sample_hashes(self, game: str, hashes: Dict[str, str]):
+        """Store sample hashes; a new sample invalidates the full hash."""
+        if not hashes:
+            return
+        self.cursor.executemany(
+            "UPDATE mod_catalog SET sample_hash=?, hash=NULL "
+            "WHERE game=? AND name=? AND sample_hash IS NOT ?",
+            [(h, game, name, h) for name, h in hashes.items()])
+        self.conn.commit()
+
+    def unsampled(self, game: str) -> List[CatalogEntry]:
+        self.cursor.execute(
+            f"SELECT {_ENTRY_COLUMNS} FROM mod_catalog "
+            "WHERE game=? AND sample_hash IS NULL", (game, ))
+        return [CatalogEntry(*row) for row in self.cursor.fetchall()]
+
+    def collision_candidates(self, game: str) -> List[CatalogEntry]:
+        """Entries whose size and sample hash match another entry."""
+        self.cursor.execute(
+            f"SELECT {_ENTRY_COLUMNS} FROM mod_catalog c "
+            "WHERE game=? AND sample_hash IS NOT NULL AND EXISTS ("
+            "  SELECT 1 FROM mod_catalog o WHERE o.game=c.game AND o.name<>c.name "
+            "  AND o.size=c.size AND o.sample_hash=c.sample_hash)", (game, ))
+        return [CatalogEntry(*row) for row in self.cursor.fetchall()]
+
+    def duplicates(self, game: str) -> List[Tuple[str, str]]:
+        self.cursor.execute(
+            "SELECT hash, GROUP_CONCAT(name, ', ') FROM mod_catalog "
+            "WHERE game=? AND hash IS NOT NULL "
+            "GROUP BY hash HAVING COUNT(*) > 1", (game, ))
+        return self.cursor.fetchall()
+
+    def total_size(self, game: str, location: Optional[str] = None) -> int:
+        if location is None:
+            self.cursor.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM mod_catalog WHERE game=?",
+                (game, ))
+        else:
+            self.cursor.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM mod_catalog WHERE game=? AND location=?",
+                (game, location))
+        return self.cursor.fetchone()[0]
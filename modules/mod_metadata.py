@@ -0,0 +1,252 @@
+import io
+import json
+import re
+import time
+import zipfile
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+from modules.content_analysis import ContentAnalyzer
+from modules.hash_engine import HashEngine, ProgressCallback
+from modules.mod_catalog import CatalogEntry, ModCatalog, content_key, file_content_key
+
+README_CHARS = 2000
+THUMBNAIL_SIZE = (64, 64)
+ICON_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tga", ".dds")
+# XML members read for an author tag; entity files rarely carry one, so
+# only the first few small ones are worth decompressing.
+AUTHOR_XML_MEMBERS = 20
+AUTHOR_XML_BYTES = 64 * 1024
+
+ModMetadata = namedtuple(
+    "ModMetadata",
+    "readme_name readme author icon_name thumbnail counts",
+)
+
+_README_AUTHOR = re.compile(
+    r"^\s*(?:(?:author|creator|modder)\s*[:\-]|(?:created|made) by\s*:?)\s*(.+?)\s*$",
+    re.IGNORECASE | re.MULTILINE)
+_XML_AUTHOR = re.compile(rb"<(?:c)?author>\s*([^<]{1,80}?)\s*</", re.IGNORECASE)
+
+
+def find_readme(names: List[str]) -> Optional[str]:
+    return next((name for name in names
+                 if "readme" in name.lower()
+                 and name.lower().endswith((".txt", ".md"))), None)
+
+
+def author_from_text(text: str) -> Optional[str]:
+    match = _README_AUTHOR.search(text)
+    if match:
+        return match.group(1)[:80]
+    return None
+
+
+def _icon_rank(name: str):
+    lower = name.lower()
+    base = lower.rsplit("/", 1)[-1]
+    # Prefer files named as icons, then formats PIL reads everywhere.
+    return ("icon" not in base, ICON_EXTENSIONS.index(lower[lower.rfind("."):]),
+            len(name))
+
+
+def make_thumbnail(data: bytes) -> Optional[bytes]:
+    """PNG thumbnail of an image, or None when PIL cannot read it."""
+    try:
+        from PIL import Image
+        with Image.open(io.BytesIO(data)) as image:
+            image.thumbnail(THUMBNAIL_SIZE)
+            out = io.BytesIO()
+            image.convert("RGBA").save(out, "PNG")
+            return out.getvalue()
+    except Exception:
+        return None
+
+
+def extract_metadata(path: str) -> Optional[Dict]:
+    """Readme, author hint and icon thumbnail of one archive.
+
+    Runs in pool workers. Returns None when the file is not a ZIP.
+    """
+    try:
+        with zipfile.ZipFile(path, "r") as zf:
+            infos = [i for i in zf.infolist() if not i.filename.endswith("/")]
+            names = [i.filename for i in infos]
+
+            readme_name = find_readme(names)
+            readme = ""
+            if readme_name:
+                with zf.open(readme_name) as f:
+                    # Bytes beyond the preview are never decoded.
+                    readme = f.read(README_CHARS * 4).decode(
+                        "utf-8", errors="ignore")[:README_CHARS]
+
+            author = author_from_text(readme) if readme else None
+            if not author:
+                xml = [i for i in infos if i.filename.lower().endswith(".xml")
+                       and i.file_size <= AUTHOR_XML_BYTES]
+                for info in xml[:AUTHOR_XML_MEMBERS]:
+                    match = _XML_AUTHOR.search(zf.read(info))
+                    if match:
+                        author = match.group(1).decode("utf-8", errors="ignore")
+                        break
+
+            icon_name = thumbnail = None
+            icons = sorted((i for i in infos
+                            if i.filename.lower().endswith(ICON_EXTENSIONS)
+                            and ("icon" in i.filename.lower()
+                                 or "preview" in i.filename.lower())),
+                           key=lambda i: _icon_rank(i.filename))
+            for info in icons[:5]:
+                thumbnail = make_thumbnail(zf.read(info))
+                if thumbnail:
+                    icon_name = info.filename
+                    break
+    except (OSError, zipfile.BadZipFile, ValueError):
+        return None
+    return {"readme_name": readme_name, "readme": readme, "author": author,
+            "icon_name": icon_name, "thumbnail": thumbnail}
+
+
+def ensure_metadata_schema(cursor, conn):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS mod_metadata (
+        hash TEXT PRIMARY KEY,
+        valid INTEGER DEFAULT 1,
+        readme_name TEXT,
+        readme TEXT,
+        author TEXT,
+        icon_name TEXT,
+        extracted_at REAL
+    )
+    """)
+    # Thumbnails live apart so listing metadata never drags the blobs along.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS mod_thumbnails (
+        hash TEXT PRIMARY KEY,
+        png BLOB
+    )
+    """)
+    conn.commit()
+
+
+class MetadataIndex:
+    """Readme, author and icon of every cataloged archive, per content key.
+
+    Entity counts are not copied here; they are read from the analysis
+    cache the entity index fills, keyed the same way.
+    """
+
+    def __init__(self, cursor, conn):
+        self.cursor = cursor
+        self.conn = conn
+
+    def missing(self, game: str) -> List[CatalogEntry]:
+        self.cursor.execute(
+            "SELECT name, location, path, size, mtime_ns, inode, device, hash, "
+            "sample_hash FROM mod_catalog c WHERE game=? AND content_key IS NOT NULL "
+            "AND NOT EXISTS (SELECT 1 FROM mod_metadata m WHERE m.hash=c.content_key)",
+            (game, ))
+        return [CatalogEntry(*row) for row in self.cursor.fetchall()]
+
+    def update(self, game: str, analyzer: Optional[ContentAnalyzer] = None,
+               progress: Optional[ProgressCallback] = None,
+               table: str = "mods", batch: int = 50) -> Dict[str, str]:
+        """Extract metadata of archives not seen yet.
+
+        Author hints are copied to mods that have no author. Returns
+        name -> author for the mods filled in.
+        """
+        catalog = ModCatalog(self.cursor, self.conn)
+        catalog.set_sample_hashes(game, HashEngine().sample_hashes(catalog.unsampled(game)))
+        self.prune()
+
+        todo: Dict[str, List[CatalogEntry]] = {}
+        for entry in self.missing(game):
+            todo.setdefault(content_key(entry.sample_hash, entry.mtime_ns), []).append(entry)
+        if not todo:
+            return {}
+
+        analyzer = analyzer or ContentAnalyzer()
+        total = len(todo)
+        done = 0
+        now = time.time()
+        authors: Dict[str, str] = {}
+
+        def on_result(key, metadata):
+            nonlocal done
+            done += 1
+            self._store(key, metadata, now)
+            author = metadata and metadata.get("author")
+            if author:
+                for entry in todo[key]:
+                    self.cursor.execute(
+                        f"UPDATE {table} SET author=? WHERE name=? "
+                        "AND (author IS NULL OR author='')", (author, entry.name))
+                    if self.cursor.rowcount:
+                        authors[entry.name] = author
+            if done % batch == 0:
+                self.conn.commit()
+            if progress:
+                progress(done, total, todo[key][0].name)
+
+        analyzer.run([(key, entries[0].path) for key, entries in todo.items()],
+                     on_result, extract_metadata)
+        self.conn.commit()
+        return authors
+
+    def _store(self, key: str, metadata: Optional[Dict], now: float):
+        metadata = metadata or {}
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO mod_metadata (hash, valid, readme_name, readme, "
+            "author, icon_name, extracted_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, 1 if metadata else 0, metadata.get("readme_name"),
+             metadata.get("readme"), metadata.get("author"),
+             metadata.get("icon_name"), now))
+        if metadata.get("thumbnail"):
+            self.cursor.execute(
+                "INSERT OR REPLACE INTO mod_thumbnails (hash, png) VALUES (?, ?)",
+                (key, metadata["thumbnail"]))
+        else:
+            self.cursor.execute("DELETE FROM mod_thumbnails WHERE hash=?", (key, ))
+
+    def prune(self):
+        """Drop metadata no cataloged file refers to any more."""
+        for table in ("mod_metadata", "mod_thumbnails"):
+            self.cursor.execute(
+                f"DELETE FROM {table} WHERE hash NOT IN "
+                "(SELECT content_key FROM mod_catalog WHERE content_key IS NOT NULL)")
+        self.conn.commit()
+
+    def get(self, game: str, name: str) -> Optional[ModMetadata]:
+        """Metadata of one mod, or None when it has not been extracted."""
+        self.cursor.execute(
+            "SELECT m.valid, m.readme_name, m.readme, m.author, m.icon_name, t.png, "
+            "a.counts FROM mod_catalog c JOIN mod_metadata m ON m.hash=c.content_key "
+            "LEFT JOIN mod_thumbnails t ON t.hash=c.content_key "
+            "LEFT JOIN content_analysis a ON a.hash=c.content_key "
+            "WHERE c.game=? AND c.name=?", (game, name))
+        row = self.cursor.fetchone()
+        if row is None or not row[0]:
+            return None
+        counts = json.loads(row[6]) if row[6] else None
+        return ModMetadata(*row[1:6], counts)
+
+    def store_at(self, path: str, metadata: Optional[Dict]) -> bool:
+        """Record metadata extracted elsewhere for the cataloged file at path."""
+        self.cursor.execute(
+            "SELECT content_key FROM mod_catalog WHERE path=? AND content_key IS NOT NULL",
+            (path, ))
+        row = self.cursor.fetchone()
+        if row is None or file_content_key(path) != row[0]:
+            return False
+        self._store(row[0], metadata, time.time())
+        self.conn.commit()
+        return True
+
+    def counts(self, game: str) -> Dict[str, Dict[str, int]]:
+        """name -> entity counts for every analyzed mod, in one query."""
+        self.cursor.execute(
+            "SELECT c.name, a.counts FROM mod_catalog c JOIN content_analysis a "
+            "ON a.hash=c.content_key WHERE c.game=? AND a.counts IS NOT NULL", (game, ))
+        return {name: json.loads(counts) for name, counts in self.cursor.fetchall()}
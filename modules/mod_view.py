@@ -0,0 +1,277 @@
+import time
+import tkinter as tk
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+STATUS_RANK = {"enabled": 0, "disabled": 1, "missing": 2}
+
+SORT_KEYS = {
+    "Name": lambda row: row.name.lower(),
+    "Status": lambda row: STATUS_RANK[row.tag],
+    "Category": lambda row: (row.category or "").lower(),
+    "Size": lambda row: row.size,
+    "Modified": lambda row: row.mtime_ns,
+}
+
+
+def format_mtime(mtime_ns):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(mtime_ns / 1e9))
+
+
+class ModRow:
+    """One mod as shown in a mod list, with typed fields.
+
+    present is False when the catalog has no file for the mod.
+    """
+    __slots__ = ("name", "enabled", "category", "size", "mtime_ns", "present",
+                 "tags", "author", "_key")
+
+    def __init__(self, name, enabled, category=None, size=0, mtime_ns=0,
+                 present=True, tags="", author=""):
+        self.name = name
+        self.enabled = bool(enabled)
+        self.category = category
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.present = present
+        self.tags = tags or ""
+        self.author = author or ""
+        self._key = None
+
+    @classmethod
+    def from_entry(cls, name, enabled, category, entry, tags="", author=""):
+        if entry is None:
+            return cls(name, enabled, category, 0, 0, present=False,
+                       tags=tags, author=author)
+        return cls(name, enabled, category, entry.size, entry.mtime_ns,
+                   tags=tags, author=author)
+
+    @property
+    def search_key(self) -> str:
+        """Lower-cased name, category, tags, author and status, built once."""
+        if self._key is None:
+            status = "enabled" if self.enabled else "disabled"
+            self._key = " ".join((self.name, self.category or "", self.tags,
+                                  self.author, status)).lower()
+        return self._key
+
+    @property
+    def tag(self) -> str:
+        if self.enabled:
+            return "enabled"
+        return "disabled" if self.present else "missing"
+
+    @property
+    def status(self) -> str:
+        return self.tag.capitalize()
+
+    def matches(self, query: str) -> bool:
+        return query in self.search_key
+
+    def values(self):
+        modified = format_mtime(self.mtime_ns) if self.present else "N/A"
+        return (self.name, self.status, self.category or "-",
+                f"{self.size / (1024 * 1024):.2f}", modified)
+
+
+class ModListModel:
+    """Name -> ModRow model that owns the rows of one mod list widget.
+
+    Row ids in the tree are the mod names, so a single status change is a
+    dict lookup. Updates are collected and written to the tree in one pass
+    on the next idle callback, which keeps bulk operations (bundles, select
+    all + enable) from touching the widget once per mod. `on_change` runs
+    after each flush, e.g. to refresh counters.
+
+    Every row stays in the tree; filter() only detaches and reattaches
+    them, so searching never reloads anything. restrict() narrows the list
+    to a set of names found elsewhere, e.g. by an entity search.
+    """
+
+    def __init__(self, tree, on_change: Optional[Callable[[], None]] = None):
+        self.tree = tree
+        self.on_change = on_change
+        self.rows: Dict[str, ModRow] = {}
+        self.order: List[str] = []
+        self.query = ""
+        self.only: Optional[set] = None
+        self.sort_spec: List[Tuple[str, bool]] = []
+        # The names attached in the tree, in order, while a filter is applied.
+        self._matches: Optional[List[str]] = None
+        # Set when row keys or the restriction changed since _matches was
+        # built; the next filter() then rescans every row.
+        self._stale = False
+        self._dirty = set()
+        self._flush_pending = False
+
+    def __contains__(self, name):
+        return name in self.rows
+
+    def get(self, name) -> Optional[ModRow]:
+        return self.rows.get(name)
+
+    def load(self, rows: Iterable[ModRow]):
+        """Replace every row, keeping the current search applied."""
+        rows = list(rows)
+        self.rows = {row.name: row for row in rows}
+        self.order = [row.name for row in rows]
+        self._sort_order()
+        self._dirty.clear()
+        self.tree.delete(*self.tree.get_children())
+        for name in self.order:
+            row = self.rows[name]
+            self.tree.insert("", tk.END, iid=name, values=row.values(),
+                             tags=(row.tag, ))
+        query, self.query, self._matches = self.query, "", None
+        self.filter(query)
+        self._schedule()
+
+    def update(self, name, **fields):
+        row = self.rows.get(name)
+        if row is None:
+            return
+        for key, value in fields.items():
+            setattr(row, key, value)
+        row._key = None
+        # Rows stay where they are until the next keystroke, but that
+        # keystroke must not narrow from a result set built on old keys.
+        self._stale = True
+        self._dirty.add(name)
+        self._schedule()
+
+    def upsert(self, row: ModRow):
+        if row.name in self.rows:
+            self.update(row.name, **{k: getattr(row, k) for k in
+                                     ("enabled", "category", "size", "mtime_ns",
+                                      "present", "tags", "author")})
+            return
+        self.rows[row.name] = row
+        self.order.append(row.name)
+        self.tree.insert("", tk.END, iid=row.name, values=row.values(),
+                         tags=(row.tag, ))
+        if ((self.query and not row.matches(self.query))
+                or (self.only is not None and row.name not in self.only)):
+            self.tree.detach(row.name)
+        elif self._matches is not None:
+            self._matches.append(row.name)
+        self._schedule()
+
+    def remove(self, names: Iterable[str]):
+        names = [name for name in names if self.rows.pop(name, None) is not None]
+        if not names:
+            return
+        gone = set(names)
+        self.order = [name for name in self.order if name not in gone]
+        if self._matches is not None:
+            self._matches = [name for name in self._matches if name not in gone]
+        self._dirty.difference_update(gone)
+        self.tree.delete(*[name for name in names if self.tree.exists(name)])
+        self._schedule()
+
+    def filter(self, query: str):
+        """Show only rows whose search key contains query.
+
+        When the new query extends the previous one, only the previous
+        matches are rechecked.
+        """
+        query = query.strip().lower()
+        if query == self.query and self._matches is not None and not self._stale:
+            return
+        if (self._matches is not None and not self._stale and self.query
+                and query.startswith(self.query)):
+            pool = self._matches
+        else:
+            pool = self.order
+        if query:
+            rows = self.rows
+            matches = [name for name in pool if query in rows[name].search_key]
+        else:
+            matches = list(self.order)
+        if self.only is not None and pool is self.order:
+            matches = [name for name in matches if name in self.only]
+        self.query, self._matches, self._stale = query, matches, False
+        self.tree.set_order(matches)
+        self._schedule()
+
+    def restrict(self, names: Optional[Iterable[str]]):
+        """Show only rows named in names, on top of the text query.
+
+        None lifts the restriction.
+        """
+        self.only = set(names) if names is not None else None
+        self._stale = True
+        self.filter(self.query)
+
+    def sort_by(self, column: str, max_keys: int = 2):
+        """Sort on column, keeping the previous primary column as tiebreaker.
+
+        Clicking the primary column again flips its direction.
+        """
+        if self.sort_spec and self.sort_spec[0][0] == column:
+            reverse = not self.sort_spec[0][1]
+        else:
+            reverse = False
+        rest = [spec for spec in self.sort_spec if spec[0] != column]
+        self.sort_spec = [(column, reverse)] + rest[:max_keys - 1]
+        self._sort_order()
+        if self._stale:
+            # Keys changed since the last filter: rebuild from query and
+            # only rather than reordering a result set that may be wrong.
+            self.filter(self.query)
+        elif self._matches is not None:
+            matched = set(self._matches)
+            self._matches = [name for name in self.order if name in matched]
+            self.tree.set_order(self._matches)
+        else:
+            self.tree.set_order(self.order)
+
+    def _sort_order(self):
+        if not self.sort_spec:
+            return
+        rows = self.rows
+        # Python's sort is stable, so sorting by the least significant key
+        # first yields a multi-column sort; Name always breaks the last tie.
+        specs = list(reversed(self.sort_spec))
+        if all(column != "Name" for column, _ in specs):
+            specs.insert(0, ("Name", False))
+        for column, reverse in specs:
+            key = SORT_KEYS[column]
+            self.order.sort(key=lambda name: key(rows[name]), reverse=reverse)
+
+    def bind_search(self, var, delay: int = 150,
+                    search: Optional[Callable[[str], None]] = None):
+        """Filter from a StringVar, debounced so typing stays responsive.
+
+        search replaces filter() as the handler, e.g. to switch modes.
+        """
+        pending = [None]
+
+        def fire():
+            pending[0] = None
+            (search or self.filter)(var.get())
+
+        def on_write(*_):
+            if pending[0] is not None:
+                self.tree.after_cancel(pending[0])
+            pending[0] = self.tree.after(delay, fire)
+
+        var.trace_add("write", on_write)
+
+    def counts(self):
+        total = len(self.rows)
+        enabled = sum(1 for row in self.rows.values() if row.enabled)
+        return total, enabled
+
+    def _schedule(self):
+        if not self._flush_pending:
+            self._flush_pending = True
+            self.tree.after_idle(self.flush)
+
+    def flush(self):
+        self._flush_pending = False
+        for name in self._dirty:
+            row = self.rows.get(name)
+            if row is not None and self.tree.exists(name):
+                self.tree.item(name, values=row.values(), tags=(row.tag, ))
+        self._dirty.clear()
+        if self.on_change:
+            self.on_change()
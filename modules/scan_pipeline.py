@@ -0,0 +1,73 @@
+import queue
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class ScanPipeline:
+    """Run slow jobs on worker threads and hand results back to Tk.
+
+    Workers never touch widgets: they put (key, generation, result, error)
+    on a queue that a short after() pump drains on the main thread. Each
+    job key has a generation counter, so when a newer job for the same key
+    has been submitted the older result is dropped instead of repainting
+    the UI with stale data. The pump only runs while jobs are in flight.
+    """
+
+    def __init__(self, widget, interval: int = 50):
+        self.widget = widget
+        self.interval = interval
+        self._queue: "queue.Queue" = queue.Queue()
+        self._generations: Dict[str, int] = {}
+        self._callbacks: Dict[str, tuple] = {}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._pumping = False
+
+    def submit(self, key: str, work: Callable[[], Any],
+               on_result: Callable[[Any], None],
+               on_error: Optional[Callable[[Exception], None]] = None) -> int:
+        with self._lock:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+            self._in_flight += 1
+        self._callbacks[key] = (on_result, on_error)
+
+        def run():
+            try:
+                self._queue.put((key, generation, work(), None))
+            except Exception as e:
+                self._queue.put((key, generation, None, e))
+
+        threading.Thread(target=run, daemon=True).start()
+        if not self._pumping:
+            self._pumping = True
+            self.widget.after(self.interval, self._pump)
+        return generation
+
+    def _pump(self):
+        while True:
+            try:
+                key, generation, result, error = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._in_flight -= 1
+                current = self._generations.get(key)
+            if generation != current:
+                continue
+            on_result, on_error = self._callbacks.get(key, (None, None))
+            try:
+                if error is not None:
+                    if on_error:
+                        on_error(error)
+                    else:
+                        print(f"[!] Background {key} job failed: {error}")
+                elif on_result:
+                    on_result(result)
+            except Exception as e:
+                print(f"[!] Applying {key} result failed: {e}")
+
+        if self._in_flight > 0:
+            self.widget.after(self.interval, self._pump)
+        else:
+            self._pumping = False
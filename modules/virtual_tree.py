@@ -0,0 +1,457 @@
+import itertools
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, List, Optional
+
+_SHIFT = 0x0001
+_CONTROL = 0x0004
+
+_iid_counter = itertools.count(1)
+
+_ITEM_OPTIONS = frozenset(("text", "image", "values", "open", "tags"))
+
+
+class VirtualTreeview(ttk.Frame):
+    """A Treeview look-alike that only materializes the visible rows.
+
+    All rows live in a Python model (iid -> values/tags/other item options
+    plus an ordered list of attached iids). The real ttk.Treeview inside only ever holds one
+    "slot" item per visible line; scrolling rewrites the slots in place
+    instead of asking Tk to lay out tens of thousands of items.
+
+    The public methods mirror the subset of the ttk.Treeview API that ModZT
+    uses (insert/delete/item/set/move/detach/reattach/selection*/see/focus/
+    identify_row/yview/heading/column/tag_configure/bind), so existing code
+    keeps working against the model. Event bindings and tag styling are
+    forwarded to the inner tree.
+    """
+
+    def __init__(self, master, columns, show="headings", selectmode="extended",
+                 height=None, yscrollcommand=None, **kw):
+        super().__init__(master)
+        tree_kw = dict(columns=columns, show=show, selectmode="extended")
+        if height:
+            tree_kw["height"] = height
+        tree_kw.update(kw)
+        self._tree = ttk.Treeview(self, **tree_kw)
+        self._tree.pack(fill=tk.BOTH, expand=True)
+
+        self._columns = tuple(columns)
+        self._selectmode = selectmode
+        self._yscrollcommand = yscrollcommand
+
+        self._rows: Dict[str, list] = {}
+        self._order: List[str] = []
+        self._index: Optional[Dict[str, int]] = None
+        self._selection = set()
+        self._anchor = None
+        self._focus = ""
+
+        self._top = 0
+        self._slots: List[str] = []
+        self._visible = int(height or 10)
+        self._render_pending = False
+        self._press_region = None
+
+        tag = f"VirtualTreeview{id(self)}"
+        self._tree.bindtags((str(self._tree), tag) + self._tree.bindtags()[1:])
+        self._tree.bind_class(tag, "<Configure>", self._on_configure)
+        self._tree.bind_class(tag, "<Map>", self._on_configure)
+        self._tree.bind_class(tag, "<Button-1>", self._on_click)
+        self._tree.bind_class(tag, "<B1-Motion>", self._on_drag)
+        self._tree.bind_class(tag, "<Shift-Button-1>", self._on_click)
+        self._tree.bind_class(tag, "<Control-Button-1>", self._on_click)
+        self._tree.bind_class(tag, "<MouseWheel>", self._on_wheel)
+        self._tree.bind_class(tag, "<Button-4>", lambda e: self._scroll_units(-3))
+        self._tree.bind_class(tag, "<Button-5>", lambda e: self._scroll_units(3))
+        for key, step in (("Up", -1), ("Down", 1), ("Prior", "-page"),
+                          ("Next", "page"), ("Home", "home"), ("End", "end")):
+            self._tree.bind_class(tag, f"<{key}>",
+                                  lambda e, s=step: self._on_key(e, s))
+            self._tree.bind_class(tag, f"<Shift-{key}>",
+                                  lambda e, s=step: self._on_key(e, s))
+
+    # ------------------------------------------------------------------
+    # Model helpers
+
+    def _positions(self) -> Dict[str, int]:
+        if self._index is None:
+            self._index = {iid: i for i, iid in enumerate(self._order)}
+        return self._index
+
+    def _invalidate(self):
+        self._index = None
+        self._schedule_render()
+
+    def _schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _selection_changed(self):
+        self._schedule_render()
+        self.event_generate("<<TreeviewSelect>>")
+
+    @staticmethod
+    def _apply_options(row, options):
+        """Set item options on a model row, rejecting any ttk would."""
+        for option in options:
+            if option not in _ITEM_OPTIONS:
+                raise tk.TclError(f'unknown option "-{option}"')
+        if "values" in options:
+            row[0] = tuple(options["values"])
+        if "tags" in options:
+            tags = options["tags"]
+            row[1] = (tags, ) if isinstance(tags, str) else tuple(tags)
+        # text/image/open are rare, so rows only carry them when set.
+        extra = {key: options[key] for key in ("text", "image", "open") if key in options}
+        if extra:
+            row[2] = dict(row[2] or {}, **extra)
+
+    @staticmethod
+    def _flatten(items):
+        if len(items) == 1 and isinstance(items[0], (list, tuple)):
+            return items[0]
+        return items
+
+    # ------------------------------------------------------------------
+    # Rendering
+
+    def _ensure_slots(self):
+        want = self._visible + 1
+        while len(self._slots) < want:
+            self._slots.append(self._tree.insert("", tk.END, values=()))
+        while len(self._slots) > want:
+            self._tree.delete(self._slots.pop())
+
+    def _clamp_top(self):
+        max_top = max(0, len(self._order) - self._visible)
+        self._top = max(0, min(self._top, max_top))
+
+    def _render(self):
+        self._render_pending = False
+        self._ensure_slots()
+        self._clamp_top()
+
+        selected_slots = []
+        for i, slot in enumerate(self._slots):
+            idx = self._top + i
+            if idx < len(self._order):
+                iid = self._order[idx]
+                values, tags, extra = self._rows[iid]
+                extra = extra or {}
+                self._tree.item(slot, values=values, tags=tags,
+                                text=extra.get("text", ""), image=extra.get("image", ""))
+                if iid in self._selection:
+                    selected_slots.append(slot)
+            else:
+                self._tree.item(slot, values=(), tags=(), text="", image="")
+        self._tree.selection_set(selected_slots)
+        self._tree.yview_moveto(0)
+
+        if self._yscrollcommand:
+            self._yscrollcommand(*self.yview())
+
+    def _on_configure(self, event=None):
+        bbox = self._tree.bbox(self._slots[0]) if self._slots else ""
+        if bbox:
+            header, row_height = bbox[1], bbox[3]
+        else:
+            try:
+                row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+            except (tk.TclError, ValueError):
+                row_height = 20
+            header = row_height + 4
+        height = self._tree.winfo_height()
+        if height > 1:
+            self._visible = max(1, (height - header) // max(1, row_height))
+        self._schedule_render()
+
+    # ------------------------------------------------------------------
+    # Input
+
+    def _on_click(self, event):
+        region = self._press_region = self._tree.identify_region(event.x, event.y)
+        if region in ("heading", "separator"):
+            return None
+        self._tree.focus_set()
+        iid = self.identify_row(event.y)
+        if not iid:
+            return "break"
+
+        if self._selectmode == "extended" and event.state & _SHIFT and self._anchor in self._rows:
+            pos = self._positions()
+            a, b = sorted((pos.get(self._anchor, 0), pos[iid]))
+            self._selection = set(self._order[a:b + 1])
+        elif self._selectmode == "extended" and event.state & _CONTROL:
+            self._selection ^= {iid}
+            self._anchor = iid
+        else:
+            self._selection = {iid}
+            self._anchor = iid
+        self._focus = iid
+        self._selection_changed()
+        return "break"
+
+    def _on_drag(self, event):
+        # Column resizing still needs the class binding; row drags do not.
+        if self._press_region in ("heading", "separator"):
+            return None
+        return "break"
+
+    def _on_wheel(self, event):
+        if event.delta:
+            step = -event.delta // 120 if abs(event.delta) >= 120 else -event.delta
+            self._scroll_units(step * 3)
+        return "break"
+
+    def _on_key(self, event, step):
+        if not self._order:
+            return "break"
+        pos = self._positions()
+        current = pos.get(self._focus, self._top)
+        if step == "home":
+            target = 0
+        elif step == "end":
+            target = len(self._order) - 1
+        elif step == "page":
+            target = current + self._visible
+        elif step == "-page":
+            target = current - self._visible
+        else:
+            target = current + step
+        target = max(0, min(target, len(self._order) - 1))
+        iid = self._order[target]
+
+        if event.state & _SHIFT and self._selectmode == "extended" and self._anchor in pos:
+            a, b = sorted((pos[self._anchor], target))
+            self._selection = set(self._order[a:b + 1])
+        else:
+            self._selection = {iid}
+            self._anchor = iid
+        self._focus = iid
+        self.see(iid)
+        self._selection_changed()
+        return "break"
+
+    def _scroll_units(self, n):
+        self._top += n
+        self._clamp_top()
+        self._schedule_render()
+        return "break"
+
+    # ------------------------------------------------------------------
+    # Treeview API
+
+    def insert(self, parent, index, iid=None, values=(), tags=(), **kw):
+        if iid is None:
+            iid = f"V{next(_iid_counter):06d}"
+            while iid in self._rows:
+                iid = f"V{next(_iid_counter):06d}"
+        elif iid in self._rows:
+            raise tk.TclError(f'Item {iid} already exists')
+        if isinstance(tags, str):
+            tags = (tags, )
+        row = [tuple(values), tuple(tags), None]
+        self._apply_options(row, kw)
+        self._rows[iid] = row
+        if index in (tk.END, "end") or index >= len(self._order):
+            self._order.append(iid)
+            if self._index is not None:
+                self._index[iid] = len(self._order) - 1
+            self._schedule_render()
+        else:
+            self._order.insert(max(0, int(index)), iid)
+            self._invalidate()
+        return iid
+
+    def delete(self, *items):
+        items = self._flatten(items)
+        if not items:
+            return
+        doomed = set(items)
+        for iid in doomed:
+            self._rows.pop(iid, None)
+        if len(doomed) > 32:
+            self._order = [iid for iid in self._order if iid not in doomed]
+        else:
+            pos = self._positions()
+            for i in sorted((pos[iid] for iid in doomed if iid in pos), reverse=True):
+                del self._order[i]
+        selection_hit = bool(self._selection & doomed)
+        self._selection -= doomed
+        if self._focus in doomed:
+            self._focus = ""
+        self._invalidate()
+        if selection_hit:
+            self.event_generate("<<TreeviewSelect>>")
+
+    def detach(self, *items):
+        items = set(self._flatten(items))
+        self._order = [iid for iid in self._order if iid not in items]
+        self._invalidate()
+
+    def move(self, item, parent, index):
+        pos = self._positions()
+        if item in pos:
+            del self._order[pos[item]]
+        if index in (tk.END, "end"):
+            self._order.append(item)
+        else:
+            self._order.insert(int(index), item)
+        self._invalidate()
+
+    reattach = move
+
+    def set_order(self, items):
+        """Replace the attached rows and their order in one step.
+
+        Items not listed are detached (kept in the model, not displayed).
+        """
+        self._order = [iid for iid in items if iid in self._rows]
+        self._invalidate()
+
+    def exists(self, item) -> bool:
+        return item in self._rows
+
+    def get_children(self, item=""):
+        return tuple(self._order)
+
+    def index(self, item) -> int:
+        return self._positions()[item]
+
+    def item(self, item, option=None, **kw):
+        try:
+            row = self._rows[item]
+        except KeyError:
+            raise tk.TclError(f'Item {item} not found') from None
+        if kw:
+            self._apply_options(row, kw)
+            self._schedule_render()
+            return None
+        if option == "values":
+            return row[0]
+        if option == "tags":
+            return row[1]
+        options = {"text": "", "image": "", "values": list(row[0]), "open": 0,
+                   "tags": list(row[1])}
+        options.update(row[2] or {})
+        if option is None:
+            return options
+        if option not in _ITEM_OPTIONS:
+            raise tk.TclError(f'unknown option "-{option}"')
+        return options[option]
+
+    def set(self, item, column=None, value=None):
+        values = self._rows[item][0]
+        if column is None:
+            return dict(zip(self._columns, values))
+        col = self._columns.index(column) if not isinstance(column, int) else column
+        if value is None:
+            return values[col] if col < len(values) else ""
+        values = list(values) + [""] * (len(self._columns) - len(values))
+        values[col] = value
+        self._rows[item][0] = tuple(values)
+        self._schedule_render()
+        return None
+
+    def selection(self):
+        if not self._selection:
+            return ()
+        pos = self._positions()
+        return tuple(sorted((iid for iid in self._selection if iid in pos),
+                            key=pos.__getitem__))
+
+    def selection_set(self, *items):
+        self._selection = set(self._flatten(items)) & self._rows.keys()
+        self._selection_changed()
+
+    def selection_add(self, *items):
+        self._selection |= set(self._flatten(items)) & self._rows.keys()
+        self._selection_changed()
+
+    def selection_remove(self, *items):
+        self._selection -= set(self._flatten(items))
+        self._selection_changed()
+
+    def selection_toggle(self, *items):
+        self._selection ^= set(self._flatten(items)) & self._rows.keys()
+        self._selection_changed()
+
+    def focus(self, item=None):
+        if item is None:
+            return self._focus
+        self._focus = item
+        return None
+
+    def see(self, item):
+        pos = self._positions().get(item)
+        if pos is None:
+            return
+        if pos < self._top:
+            self._top = pos
+        elif pos >= self._top + self._visible:
+            self._top = pos - self._visible + 1
+        self._schedule_render()
+
+    def identify_row(self, y):
+        slot = self._tree.identify_row(y)
+        if not slot or slot not in self._slots:
+            return ""
+        idx = self._top + self._slots.index(slot)
+        return self._order[idx] if idx < len(self._order) else ""
+
+    def yview(self, *args):
+        total = len(self._order)
+        if not args:
+            if not total:
+                return (0.0, 1.0)
+            return (self._top / total, min(1.0, (self._top + self._visible) / total))
+        if args[0] == "moveto":
+            self._top = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            n = int(args[1])
+            self._top += n * (self._visible if args[2] == "pages" else 1)
+        self._clamp_top()
+        self._schedule_render()
+        return None
+
+    def heading(self, column, option=None, **kw):
+        return self._tree.heading(column, option, **kw)
+
+    def column(self, column, option=None, **kw):
+        return self._tree.column(column, option, **kw)
+
+    def tag_configure(self, tagname, option=None, **kw):
+        return self._tree.tag_configure(tagname, option, **kw)
+
+    def configure(self, cnf=None, **kw):
+        if "yscrollcommand" in kw:
+            self._yscrollcommand = kw.pop("yscrollcommand")
+            self._schedule_render()
+        if cnf or kw:
+            return self._tree.configure(cnf, **kw)
+        return None
+
+    config = configure
+
+    def cget(self, key):
+        if key == "columns":
+            return self._columns
+        return self._tree.cget(key)
+
+    __getitem__ = cget
+
+    def bind(self, sequence=None, func=None, add=None):
+        if sequence == "<<TreeviewSelect>>":
+            return super().bind(sequence, func, add)
+        return self._tree.bind(sequence, func, add)
+
+    def focus_set(self):
+        self._tree.focus_set()
+
+    def drop_target_register(self, *args):
+        return self._tree.drop_target_register(*args)
+
+    def dnd_bind(self, *args, **kw):
+        return self._tree.dnd_bind(*args, **kw)
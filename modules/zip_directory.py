@@ -0,0 +1,204 @@
+import mmap
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_right
+from typing import Iterator, List, Optional, Tuple
+
+# Layouts as in zipfile (APPNOTE 4.3.12 - 4.3.16).
+_EOCD = struct.Struct("<4s4H2LH")
+_EOCD_SIG = b"PK\x05\x06"
+_ZIP64_LOCATOR = struct.Struct("<4sLQL")
+_ZIP64_LOCATOR_SIG = b"PK\x06\x07"
+_ZIP64_EOCD = struct.Struct("<4sQ2H2L4Q")
+_ZIP64_EOCD_SIG = b"PK\x06\x06"
+_CENTRAL = struct.Struct("<4s4B4HL2L5H2L")
+_CENTRAL_SIG = b"PK\x01\x02"
+_EXTRA = struct.Struct("<2H")
+_MAX_COMMENT = 0xFFFF
+_UTF8_FLAG = 0x800
+# zipfile turns os.sep into "/" before deciding what is a directory.
+_DIR_ENDS = (b"/", b"\\") if os.sep == "\\" else (b"/", )
+
+
+class CentralDirectory:
+    """The member table of a ZIP archive, parsed without ZipInfo objects.
+
+    Per-member fields live in flat arrays indexed by member number and the
+    names stay as byte spans in one copy of the central directory, so a
+    60,000 member archive costs a few MB and no per-member objects.
+    Strings are only made for the members a caller asks about; find() and
+    startswith() run a regex over the raw directory and map hits back to
+    members.
+    """
+
+    def __init__(self, data: bytes, shift: int = 0):
+        self._data = data
+        self.offsets = array("Q")
+        self.sizes = array("Q")
+        self.compressed_sizes = array("Q")
+        self.crcs = array("I")
+        self.methods = array("H")
+        self.flags = array("H")
+        self._name_starts = array("Q")
+        self._name_lengths = array("H")
+        self._parse(shift)
+
+    def _parse(self, shift: int):
+        data = self._data
+        unpack = _CENTRAL.unpack_from
+        header_size = _CENTRAL.size
+        add_offset, add_size = self.offsets.append, self.sizes.append
+        add_csize, add_crc = self.compressed_sizes.append, self.crcs.append
+        add_method, add_flags = self.methods.append, self.flags.append
+        add_start, add_length = self._name_starts.append, self._name_lengths.append
+        pos, end = 0, len(data)
+        while pos + header_size <= end:
+            (sig, _, _, _, _, flags, method, _, _, crc, csize, size, name_len,
+             extra_len, comment_len, _, _, _, offset) = unpack(data, pos)
+            if sig != _CENTRAL_SIG:
+                raise ValueError("Bad central directory header")
+            name_start = pos + header_size
+            extra_start = name_start + name_len
+            if csize == 0xFFFFFFFF or size == 0xFFFFFFFF or offset == 0xFFFFFFFF:
+                size, csize, offset = _zip64_fields(
+                    data, extra_start, extra_start + extra_len, size, csize, offset)
+            add_offset(offset + shift)
+            add_size(size)
+            add_csize(csize)
+            add_crc(crc)
+            add_method(method)
+            add_flags(flags)
+            add_start(name_start)
+            add_length(name_len)
+            pos = extra_start + extra_len + comment_len
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def raw_name(self, i: int) -> bytes:
+        start = self._name_starts[i]
+        return self._data[start:start + self._name_lengths[i]]
+
+    def name(self, i: int) -> str:
+        """Member name exactly as zipfile reports it."""
+        encoding = "utf-8" if self.flags[i] & _UTF8_FLAG else "cp437"
+        name = self.raw_name(i).decode(encoding, errors="replace")
+        null = name.find("\0")
+        if null >= 0:
+            name = name[:null]
+        if os.sep != "/" and os.sep in name:
+            name = name.replace(os.sep, "/")
+        return name
+
+    def names(self) -> List[str]:
+        return [self.name(i) for i in range(len(self))]
+
+    def is_dir(self, i: int) -> bool:
+        end = self._name_starts[i] + self._name_lengths[i]
+        return self._name_lengths[i] > 0 and self._data[end - 1:end] in _DIR_ENDS
+
+    def files(self) -> Iterator[int]:
+        """Indices of every member that is not a directory."""
+        return (i for i in range(len(self)) if not self.is_dir(i))
+
+    def _hits(self, pattern: "re.Pattern", anchored: bool) -> List[int]:
+        starts, lengths = self._name_starts, self._name_lengths
+        found: List[int] = []
+        for match in pattern.finditer(self._data):
+            i = bisect_right(starts, match.start()) - 1
+            if i < 0 or (found and found[-1] == i):
+                continue
+            start = starts[i]
+            if match.end() > start + lengths[i]:
+                continue
+            if anchored and match.start() != start:
+                continue
+            found.append(i)
+        return found
+
+    def find(self, text: str) -> List[int]:
+        """Indices of members whose name contains text, ignoring ASCII case
+        and treating / and \\ alike."""
+        return self._hits(_name_pattern(text), anchored=False)
+
+    def startswith(self, prefix: str) -> List[int]:
+        """Indices of members whose name starts with prefix (see find)."""
+        return self._hits(_name_pattern(prefix), anchored=True)
+
+    def total_size(self) -> int:
+        return sum(self.sizes)
+
+    def entry(self, i: int) -> Tuple[str, int, int, int, int]:
+        """(name, size, compressed size, CRC, method) of one member."""
+        return (self.name(i), self.sizes[i], self.compressed_sizes[i],
+                self.crcs[i], self.methods[i])
+
+
+def _name_pattern(text: str) -> "re.Pattern":
+    parts = [re.escape(part.encode("utf-8")) for part in re.split(r"[/\\]", text)]
+    return re.compile(rb"[/\\]".join(parts), re.IGNORECASE)
+
+
+def _zip64_fields(data: bytes, pos: int, end: int, size: int, csize: int,
+                  offset: int) -> Tuple[int, int, int]:
+    while pos + _EXTRA.size <= end:
+        tag, length = _EXTRA.unpack_from(data, pos)
+        pos += _EXTRA.size
+        if tag == 0x0001:
+            # Only the fields saturated in the header are present, in order.
+            values = struct.unpack_from(f"<{length // 8}Q", data, pos)
+            k = 0
+            if size == 0xFFFFFFFF and k < len(values):
+                size, k = values[k], k + 1
+            if csize == 0xFFFFFFFF and k < len(values):
+                csize, k = values[k], k + 1
+            if offset == 0xFFFFFFFF and k < len(values):
+                offset = values[k]
+            break
+        pos += length
+    return size, csize, offset
+
+
+def _locate(mm) -> Tuple[int, int, int]:
+    """(central directory start, size, shift) from the end records.
+
+    shift is the length of any data prepended to the archive (e.g. a
+    stub), which moves every member from its recorded offset.
+    """
+    size = len(mm)
+    eocd = mm.rfind(_EOCD_SIG, max(0, size - _EOCD.size - _MAX_COMMENT))
+    if eocd < 0 or eocd + _EOCD.size > size:
+        raise ValueError("End of central directory not found")
+    (_, _, _, _, _, cd_size, cd_offset, _) = _EOCD.unpack_from(mm, eocd)
+    records_start = eocd
+
+    locator = eocd - _ZIP64_LOCATOR.size
+    if locator >= 0 and mm[locator:locator + 4] == _ZIP64_LOCATOR_SIG:
+        z64 = locator - _ZIP64_EOCD.size
+        if z64 < 0 or mm[z64:z64 + 4] != _ZIP64_EOCD_SIG:
+            raise ValueError("ZIP64 end of central directory not found")
+        (_, _, _, _, _, _, _, _, cd_size, cd_offset) = _ZIP64_EOCD.unpack_from(mm, z64)
+        records_start = z64
+
+    start = records_start - cd_size
+    if start < 0 or cd_offset > start:
+        raise ValueError("Central directory out of range")
+    return start, cd_size, start - cd_offset
+
+
+def read_central_directory(path: str) -> Optional[CentralDirectory]:
+    """Parse the central directory of path, or None if it is not a ZIP.
+
+    The file is mapped only long enough to copy the directory out, so it
+    can be replaced or deleted right after.
+    """
+    try:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                start, size, shift = _locate(mm)
+                data = mm[start:start + size]
+        return CentralDirectory(data, shift)
+    except (OSError, ValueError, struct.error):
+        return None
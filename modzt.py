@@ -5,6 +5,7 @@ import io
 import json
 import os
 import platform
+import queue
 import re
 import shutil
 import sqlite3
@@ -30,6 +31,34 @@ import tkinter as tk
 import tkinter.simpledialog as simpledialog
 from tkinter import ttk, filedialog, messagebox
 
+from modules import analysis_worker
+from modules.archive_index import (CONFLICT_CASE_ONLY, CONFLICT_DIFFERENT, CONFLICT_IDENTICAL,
+                                   CONFLICT_KINDS, ArchiveIndex, classify_copies,
+                                   ensure_archive_schema, read_archive_entries)
+from modules.content_analysis import (ENTITY_CATEGORIES, ContentAnalyzer,
+                                      categorize_mods, classify_member,
+                                      ensure_analysis_schema, entity_counts,
+                                      suggest_category)
+from modules.entity_index import EntityIndex, ensure_entity_schema
+from modules.folder_watcher import FolderWatcher
+from modules.load_order import LoadOrderResolver, ensure_load_order_schema, load_order_key
+from modules.hash_engine import HashEngine, full_hash
+from modules.mod_catalog import (LOCATION_DISABLED, LOCATION_ENABLED,
+                                 ModCatalog, ModSyncDiff, ensure_catalog_schema,
+                                 rekey_mod_rows, sync_mod_rows)
+from modules.mod_metadata import (MetadataIndex, ModMetadata,
+                                  ensure_metadata_schema, extract_metadata)
+from modules.mod_view import ModListModel, ModRow
+from modules.scan_pipeline import ScanPipeline
+from modules.virtual_tree import VirtualTreeview
+from modules.zip_directory import read_central_directory
+from z2f_parser import OVERLAY_PREFIX
+
+# Frozen builds start analysis workers by re-running this executable; they
+# must stop here, before any window is created.
+if analysis_worker.WORKER_FLAG in sys.argv[1:]:
+    sys.exit(analysis_worker.main())
+
 try:
     from tkinterdnd2 import DND_FILES, TkinterDnD
     DND_AVAILABLE = True
@@ -676,7 +705,34 @@ def auto_detect_zt2_installation():
     return None
 
 
-sort_state = {"column": "Name", "reverse": False}
+MOD_LIST_HEADINGS = {
+    "Name": "Name",
+    "Status": "Status",
+    "Category": "Category",
+    "Size": "Size (MB)",
+    "Modified": "Last Modified",
+}
+
+
+def update_sort_headings(tree, view, command):
+    primary, reverse = view.sort_spec[0] if view.sort_spec else (None, False)
+    for col, label in MOD_LIST_HEADINGS.items():
+        if col == primary:
+            label = f"{label} {'^' if reverse else 'v'}"
+        tree.heading(col, text=label, command=lambda c=col: command(c))
+
+
+def remember_sort(game, view):
+    settings.setdefault("mod_sort", {})[game] = [list(spec) for spec in view.sort_spec]
+    save_settings(settings)
+
+
+def restore_sort(game, view):
+    saved = settings.get("mod_sort", {}).get(game, [])
+    view.sort_spec = [(col, bool(rev)) for col, rev in saved
+                      if col in MOD_LIST_HEADINGS]
+
+
 ui_mode = {"compact": False}
 
 action_history = []
@@ -734,8 +790,7 @@ def undo_last_action():
                 dest = os.path.join(mods_disabled_dir(), mod_name)
 
             shutil.move(trash_path, dest)
-            detect_existing_mods()
-            refresh_tree()
+            request_mod_scan()
             log(f"Undo: Restored {mod_name}", log_text)
 
         elif action_type == "install":
@@ -753,6 +808,14 @@ def undo_last_action():
 
 conn = sqlite3.connect(DB_FILE, check_same_thread=False)
 cursor = conn.cursor()
+# WAL lets the background scanner write while the UI keeps reading.
+cursor.execute("PRAGMA journal_mode=WAL")
+
+
+def open_worker_db():
+    return sqlite3.connect(DB_FILE, timeout=30)
+
+
 cursor.execute("""
 CREATE TABLE IF NOT EXISTS mods (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -804,6 +867,9 @@ CREATE TABLE IF NOT EXISTS bundle_mods (
     UNIQUE(bundle_id, mod_name)
 )
 """)
+# Mod details look up the bundles of one mod.
+cursor.execute(
+    "CREATE INDEX IF NOT EXISTS idx_bundle_mods_mod ON bundle_mods(mod_name)")
 conn.commit()
 cursor.execute("""
 CREATE TABLE IF NOT EXISTS zt2dl_cache (
@@ -879,6 +945,23 @@ def ensure_db_schema():
 
 
 ensure_db_schema()
+ensure_catalog_schema(cursor, conn)
+mod_catalog = ModCatalog(cursor, conn)
+ensure_archive_schema(cursor, conn)
+archive_index = ArchiveIndex(cursor, conn)
+ensure_analysis_schema(cursor, conn)
+ensure_entity_schema(cursor, conn)
+entity_index = EntityIndex(cursor, conn)
+ensure_metadata_schema(cursor, conn)
+mod_metadata = MetadataIndex(cursor, conn)
+ensure_load_order_schema(cursor, conn)
+load_order = LoadOrderResolver(cursor, conn)
+
+# Tables that refer to a mod by file name and must follow it on rename.
+ZT2_NAME_COLUMNS = (("favorites", "mod_name"), ("bundle_mods", "mod_name"),
+                    ("mod_dependencies", "mod_name"),
+                    ("mod_dependencies", "depends_on"))
+ZT1_NAME_COLUMNS = (("favorites", "mod_name"), )
 
 def run_cli_mode():
     parser = argparse.ArgumentParser(
@@ -914,6 +997,20 @@ def run_cli_mode():
     bundle_parser.add_argument("--name", help="Bundle name (for apply/create)")
     bundle_parser.add_argument("--mods", nargs="*", help="Mod names (for create)")
     
+    search_parser = subparsers.add_parser("search", help="Find mods by the entities they add")
+    search_parser.add_argument("query", nargs="+", help="Words to look for in entity names, codenames and descriptions")
+    search_parser.add_argument("--type", help="Only entities of this type (e.g. Animal, Fence)")
+    search_parser.add_argument("--limit", type=int, default=50, help="Maximum results (0 for all)")
+    search_parser.add_argument("--update", action="store_true", help="Index new or changed mods first")
+    search_parser.add_argument("--json", action="store_true", help="Output as JSON")
+    
+    order_parser = subparsers.add_parser("load-order", help="Show which archive the game reads each file from")
+    order_parser.add_argument("paths", nargs="*", help="Files to resolve (default: every file more than one archive provides)")
+    order_parser.add_argument("--mod", help="Only files this mod provides")
+    order_parser.add_argument("--summary", action="store_true", help="Per mod, how many contested files it wins and loses")
+    order_parser.add_argument("--update", action="store_true", help="Index new or changed mods first")
+    order_parser.add_argument("--json", action="store_true", help="Output as JSON")
+    
     subparsers.add_parser("status", help="Show mod counts and status")
     
     subparsers.add_parser("version", help="Show version information")
@@ -1000,6 +1097,57 @@ def run_cli_mode():
             print(f"\nTotal: {len(mods)} mods")
         return True
     
+    elif args.command == "search":
+        if args.update:
+            indexed = entity_index.update("ZT2")
+            print(f"[+] Indexed {indexed} mod(s)", file=sys.stderr)
+        query = " ".join(args.query)
+        start = time.perf_counter()
+        hits = entity_index.search(query, "ZT2", limit=args.limit or None,
+                                   entity_type=args.type)
+        elapsed = (time.perf_counter() - start) * 1000
+        if args.json:
+            print(json.dumps([hit._asdict() for hit in hits], indent=2))
+        else:
+            for hit in hits:
+                print(f"[{hit.type}] {hit.name} ({hit.codename}) - {hit.mod}")
+            print(f"\n{len(hits)} result(s) in {elapsed:.1f} ms")
+            pending = entity_index.pending("ZT2")
+            if pending:
+                print(f"{pending} mod(s) not indexed yet; rerun with --update")
+        return True
+    
+    elif args.command == "load-order":
+        if args.update:
+            indexed = archive_index.update("ZT2")
+            print(f"[+] Indexed {indexed} mod(s)", file=sys.stderr)
+        load_order.sync("ZT2")
+        pending = archive_index.pending("ZT2")
+        if pending:
+            print(f"{pending} mod(s) not indexed yet; rerun with --update", file=sys.stderr)
+        if args.summary:
+            summary = load_order.summary("ZT2")
+            if args.json:
+                print(json.dumps({name: {"wins": wins, "loses": loses}
+                                  for name, (wins, loses) in sorted(summary.items())}, indent=2))
+            else:
+                for name, (wins, loses) in sorted(summary.items(), key=lambda i: i[0].lower()):
+                    print(f"{name}: wins {wins}, shadowed {loses}")
+            return True
+        if args.paths:
+            resolutions = load_order.resolve("ZT2", args.paths)
+        else:
+            resolutions = load_order.overrides("ZT2", mod=args.mod)
+        if args.json:
+            print(json.dumps([r._asdict() for r in resolutions], indent=2))
+        else:
+            for r in resolutions:
+                print(f"{r.original_path}: {r.winner}")
+                for name in r.shadowed:
+                    print(f"    shadows {name}")
+            print(f"\n{len(resolutions)} file(s)")
+        return True
+    
     elif args.command == "enable":
         game = args.game.upper()
         count = 0
@@ -1191,39 +1339,29 @@ def zt1_mods_disabled_dir():
     return None
 
 
-def detect_existing_zt1_mods():
+def detect_existing_zt1_mods(cursor=None, conn=None):
     if not ZT1_PATH:
         return
+
+    if cursor is None or conn is None:
+        cursor = globals().get("cursor")
+        conn = globals().get("conn")
     dl_dir = ZT1_MOD_DIR or os.path.join(ZT1_PATH, "dlupdates")
     disabled_dir = os.path.join(dl_dir, "_disabled")
     os.makedirs(disabled_dir, exist_ok=True)
 
-    scanned = {}
-    for folder, enabled in [(dl_dir, 1), (disabled_dir, 0)]:
-        if not os.path.isdir(folder):
-            continue
-        for f in os.listdir(folder):
-            if not f.lower().endswith(".ztd"):
-                continue
-            scanned[f] = enabled
-
-    for name, enabled in scanned.items():
-        cursor.execute("SELECT COUNT(*) FROM zt1_mods WHERE name=?", (name, ))
-        exists = cursor.fetchone()[0]
-        if exists == 0:
-            cursor.execute(
-                "INSERT INTO zt1_mods (name, enabled) VALUES (?, ?)",
-                (name, enabled))
-        else:
-            cursor.execute("UPDATE zt1_mods SET enabled=? WHERE name=?",
-                           (enabled, name))
-    conn.commit()
+    catalog, folder_diff = ModCatalog(cursor, conn).refresh(
+        "ZT1", [(dl_dir, LOCATION_ENABLED), (disabled_dir, LOCATION_DISABLED)],
+        ".ztd", commit=False)
+    scanned = {name: 1 if entry.location == LOCATION_ENABLED else 0
+               for name, entry in catalog.items()}
 
-    cursor.execute("SELECT name FROM zt1_mods")
-    for (name, ) in cursor.fetchall():
-        if name not in scanned:
-            cursor.execute("DELETE FROM zt1_mods WHERE name=?", (name, ))
+    renames = {old: e.name for old, e in folder_diff.renamed}
+    rekey_mod_rows(cursor, "zt1_mods", renames, ZT1_NAME_COLUMNS)
+    added, removed, state_changed = sync_mod_rows(cursor, "zt1_mods", scanned)
     conn.commit()
+    return ModSyncDiff(added, removed, state_changed,
+                       [e.name for e in folder_diff.changed], catalog, renames)
 
 ACHIEVEMENTS = {
     "first_mod": {
@@ -1628,6 +1766,8 @@ def enable_zt1_mod(name, text_widget=None):
         shutil.move(src, dst)
         cursor.execute("UPDATE zt1_mods SET enabled=1 WHERE name=?", (name, ))
         conn.commit()
+        mod_catalog.relocate("ZT1", name, LOCATION_ENABLED, dst)
+        zt1_view.update(name, enabled=True)
         log(f"Enabled ZT1 mod: {name}", text_widget)
     except Exception as e:
         messagebox.showerror("Error", f"Failed to enable mod:\n{e}")
@@ -1652,6 +1792,8 @@ def disable_zt1_mod(name, text_widget=None):
         shutil.move(src, dst)
         cursor.execute("UPDATE zt1_mods SET enabled=0 WHERE name=?", (name, ))
         conn.commit()
+        mod_catalog.relocate("ZT1", name, LOCATION_DISABLED, dst)
+        zt1_view.update(name, enabled=False)
         log(f"Disabled ZT1 mod: {name}", text_widget)
     except Exception as e:
         messagebox.showerror("Error", f"Failed to disable mod:\n{e}")
@@ -1934,6 +2076,8 @@ def set_game_path(lbl_widget=None, status_widget=None):
         refresh_tree()
     except Exception as e:
         print(f"refresh_tree() failed: {e}")
+    if globals().get("mod_watcher"):
+        mod_watcher.retarget()
     try:
         if 'populate_xp_icons_async' in globals() and 'xp_icons_holder' in globals():
             populate_xp_icons_async(xp_icons_holder)
@@ -2010,75 +2154,47 @@ def find_mod_file(mod_name):
     return None
 
 
-def index_mod_files(cursor=None, conn=None, force=False):
+
+
+def index_mod_files(cursor=None, conn=None, force=False, engine=None,
+                    progress=None):
+    """Hash the ZT2 catalog in two stages.
+
+    Every new or changed file gets a cheap size + head/tail sample hash; only
+    files whose sample collides with another one are read in full. Returns
+    False if the engine was cancelled part way through.
+    """
     if cursor is None or conn is None:
         cursor = globals().get("cursor")
         conn = globals().get("conn")
 
     if not GAME_PATH:
-        return
-
-    cache_file = os.path.join(CONFIG_DIR, "file_index.json")
-    cache = {}
-    if os.path.isfile(cache_file):
-        try:
-            with open(cache_file, "r", encoding="utf-8") as f:
-                cache = json.load(f)
-        except Exception:
-            cache = {}
-
-    changed = False
-    for folder in [GAME_PATH, mods_disabled_dir()]:
-        if not os.path.isdir(folder):
-            continue
-        for f in os.listdir(folder):
-            if not (f.lower().endswith('.z2f')):
-                continue
-            if f.lower().endswith('.pac'):
-                continue
-            full_path = os.path.join(folder, f)
-            try:
-                mtime = os.path.getmtime(full_path)
-            except OSError:
-                continue
-
-            if not force and f in cache and cache[f].get("_mtime") == mtime:
-                continue
+        return True
 
-            import hashlib
-            h = hashlib.sha1()
-            try:
-                with open(full_path, "rb") as fp:
-                    while True:
-                        chunk = fp.read(65536)
-                        if not chunk:
-                            break
-                        h.update(chunk)
-                mod_hash = h.hexdigest()
-            except Exception:
-                mod_hash = None
+    engine = engine or HashEngine()
+    catalog = ModCatalog(cursor, conn)
+    if force:
+        entries = list(catalog.snapshot("ZT2").values())
+    else:
+        entries = catalog.unsampled("ZT2")
 
-            cache[f] = {"_mtime": mtime, "hash": mod_hash}
-            changed = True
+    catalog.set_sample_hashes("ZT2", engine.sample_hashes(entries, progress))
+    if engine.cancelled:
+        return False
 
-            if mod_hash:
-                cursor.execute("UPDATE mods SET hash=? WHERE name=?",
-                               (mod_hash, f))
-    if changed:
+    candidates = [e for e in catalog.collision_candidates("ZT2")
+                  if force or not e.hash]
+    hashes = engine.full_hashes(candidates, progress)
+    if hashes:
+        catalog.set_hashes("ZT2", hashes)
+        cursor.executemany("UPDATE mods SET hash=? WHERE name=?",
+                           [(h, name) for name, h in hashes.items()])
         conn.commit()
-        with open(cache_file, "w", encoding="utf-8") as f:
-            json.dump(cache, f, indent=2)
+    return not engine.cancelled
 
 
 def file_hash(path):
-    h = hashlib.sha1()
-    try:
-        with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                h.update(chunk)
-        return h.hexdigest()
-    except Exception:
-        return None
+    return full_hash(path)
 
 
 def backup_mods():
@@ -2159,53 +2275,47 @@ def detect_existing_mods(cursor=None, conn=None):
     disabled_dir = mods_disabled_dir()
     os.makedirs(disabled_dir, exist_ok=True)
 
-    scanned = {}
-    for folder, enabled in [(GAME_PATH, 1), (disabled_dir, 0)]:
-        if not os.path.isdir(folder):
-            continue
-        for f in os.listdir(folder):
-            if not (f.lower().endswith('.z2f')):
-                continue
-            if f.lower().endswith('.pac'):
-                continue
-
-            full_path = os.path.join(folder, f)
-            mtime = os.path.getmtime(full_path)
-            scanned[f] = (enabled, mtime)
+    catalog, folder_diff = ModCatalog(cursor, conn).refresh(
+        "ZT2", [(GAME_PATH, LOCATION_ENABLED), (disabled_dir, LOCATION_DISABLED)],
+        ".z2f", commit=False, skip_prefixes=(OVERLAY_PREFIX, ))
+    scanned = {name: 1 if entry.location == LOCATION_ENABLED else 0
+               for name, entry in catalog.items()}
 
-    for mod_name, (enabled, mtime) in scanned.items():
-        cursor.execute("SELECT COUNT(*) FROM mods WHERE name=?", (mod_name, ))
-        exists = cursor.fetchone()[0]
-        if exists == 0:
-            cursor.execute("INSERT INTO mods (name, enabled) VALUES (?, ?)",
-                           (mod_name, enabled))
-        else:
-            cursor.execute("UPDATE mods SET enabled=? WHERE name=?",
-                           (enabled, mod_name))
+    renames = {old: e.name for old, e in folder_diff.renamed}
+    rekey_mod_rows(cursor, "mods", renames, ZT2_NAME_COLUMNS)
+    added, removed, state_changed = sync_mod_rows(cursor, "mods", scanned)
     conn.commit()
+    return ModSyncDiff(added, removed, state_changed,
+                       [e.name for e in folder_diff.changed], catalog, renames)
 
-    cursor.execute("SELECT name FROM mods")
-    for (name, ) in cursor.fetchall():
-        if name not in scanned:
-            cursor.execute("DELETE FROM mods WHERE name=?", (name, ))
-    conn.commit()
 
+def find_duplicate_mods(cursor=None, conn=None):
+    if cursor is None or conn is None:
+        cursor = globals().get("cursor")
+        conn = globals().get("conn")
     try:
-        cursor.execute("""
-            SELECT hash, GROUP_CONCAT(name, ', ') AS mods, COUNT(*) AS c
-            FROM mods
-            WHERE hash IS NOT NULL
-            GROUP BY hash HAVING c > 1
-        """)
-        duplicates = cursor.fetchall()
-        if duplicates:
-            dup_text = "\n".join(f"{mods}" for _, mods, _ in duplicates)
-            log(f"Duplicate mods detected:\n{dup_text}", log_text)
-            messagebox.showwarning(
-                "Duplicate Mods Detected",
-                f"The following mods have identical contents:\n\n{dup_text}")
+        index_mod_files(cursor, conn)
+        return ModCatalog(cursor, conn).duplicates("ZT2")
     except sqlite3.OperationalError:
-        pass
+        return []
+
+
+_warned_duplicates = set()
+
+
+def warn_duplicate_mods(duplicates):
+    """Warn about duplicate mods, but only when the set of groups changed."""
+    global _warned_duplicates
+    groups = {mods for _, mods in duplicates}
+    if not groups or groups == _warned_duplicates:
+        _warned_duplicates = groups
+        return
+    _warned_duplicates = groups
+    dup_text = "\n".join(f"{mods}" for _, mods in duplicates)
+    log(f"Duplicate mods detected:\n{dup_text}", log_text)
+    messagebox.showwarning(
+        "Duplicate Mods Detected",
+        f"The following mods have identical contents:\n\n{dup_text}")
 
 
 def enable_mod(mod_name, text_widget=None, record=True):
@@ -2224,6 +2334,7 @@ def enable_mod(mod_name, text_widget=None, record=True):
     if os.path.isfile(src):
         try:
             shutil.move(src, dst)
+            mod_catalog.relocate("ZT2", mod_name, LOCATION_ENABLED, dst)
             log(f"Enabled mod: {mod_name}", text_widget)
         except Exception as e:
             messagebox.showerror("Error", f"Enable failed: {e}")
@@ -2239,14 +2350,7 @@ def enable_mod(mod_name, text_widget=None, record=True):
     if record:
         record_action("enable", {"mod_name": mod_name})
 
-    for iid in mods_tree.get_children():
-        vals = mods_tree.item(iid, "values")
-        if vals and vals[0] == mod_name:
-            mods_tree.item(iid, values=(vals[0], "Enabled", vals[2], vals[3]))
-            mods_tree.item(iid, tags=("enabled", ))
-            break
-
-    update_status_bar()
+    zt2_view.update(mod_name, enabled=True)
 
 
 def disable_mod(mod_name, text_widget=None, record=True):
@@ -2269,6 +2373,7 @@ def disable_mod(mod_name, text_widget=None, record=True):
     if os.path.isfile(src):
         try:
             shutil.move(src, dst)
+            mod_catalog.relocate("ZT2", mod_name, LOCATION_DISABLED, dst)
             log(f"Disabled mod: {mod_name}", text_widget)
         except Exception as e:
             messagebox.showerror("Error", f"Disable failed: {e}")
@@ -2283,14 +2388,7 @@ def disable_mod(mod_name, text_widget=None, record=True):
     if record:
         record_action("disable", {"mod_name": mod_name})
 
-    for iid in mods_tree.get_children():
-        vals = mods_tree.item(iid, "values")
-        if vals and vals[0] == mod_name:
-            mods_tree.item(iid, values=(vals[0], "Disabled", vals[2], vals[3]))
-            mods_tree.item(iid, tags=("disabled", ))
-            break
-
-    update_status_bar()
+    zt2_view.update(mod_name, enabled=False)
 
 
 def uninstall_mod(mod_name, text_widget=None, record=True):
@@ -2321,6 +2419,7 @@ def uninstall_mod(mod_name, text_widget=None, record=True):
 
     cursor.execute("DELETE FROM mods WHERE name=?", (mod_name, ))
     conn.commit()
+    mod_catalog.forget("ZT2", mod_name)
 
     if record and removed and trash_path:
         record_action("uninstall", {
@@ -2334,16 +2433,15 @@ def uninstall_mod(mod_name, text_widget=None, record=True):
     else:
         log(f"Mod {mod_name} not found on disk, record removed from DB.",
             text_widget)
-    refresh_tree()
-    update_status_bar()
+    zt2_view.remove([mod_name])
 
 
-def install_mods(file_paths, text_widget=None):
+def install_mods(file_paths, text_widget=None, preview=True):
     if not GAME_PATH:
         messagebox.showerror("Error", "Game path not set. Please set your Zoo Tycoon 2 folder first.")
         return
 
-    installed = []
+    candidates = []
     skipped = []
     errors = []
 
@@ -2361,6 +2459,148 @@ def install_mods(file_paths, text_widget=None):
             skipped.append(f"Not a .z2f file: {filename}")
             continue
 
+        candidates.append(path)
+
+    def proceed():
+        copy_mods_to_game(candidates, skipped, errors, text_widget)
+
+    if not preview or not candidates:
+        proceed()
+        return
+
+    def on_previewed(overlaps):
+        if overlaps:
+            show_install_preview(overlaps, proceed)
+        else:
+            proceed()
+
+    def on_failed(e):
+        print(f"[!] Install preview failed: {e}")
+        proceed()
+
+    # Keyed by the files, so each drop gets its own preview and dropping
+    # the same files again supersedes the first one.
+    scan_pipeline.submit("install_preview:" + "|".join(candidates),
+                         lambda: preview_install_conflicts(candidates),
+                         on_previewed, on_failed)
+
+
+def preview_install_conflicts(paths):
+    """filename -> {installed mod: [Overlap]} for archives about to be
+    installed that would change files other mods provide.
+
+    Runs on a worker. Only the central directory of each new archive is
+    read; the installed mods are looked up in the archive index. Archives
+    whose shared files are all byte-identical are left out.
+    """
+    previews = {}
+    worker_conn = open_worker_db()
+    try:
+        index = ArchiveIndex(worker_conn.cursor(), worker_conn)
+        for path in paths:
+            filename = os.path.basename(path)
+            entries = read_archive_entries(path)
+            if not entries:
+                continue
+            # A file of the same name is replaced, not overlapped.
+            overlaps = index.overlaps("ZT2", entries, exclude=[filename], table="mods")
+            if any(o.kind != CONFLICT_IDENTICAL for found in overlaps.values() for o in found):
+                previews[filename] = overlaps
+    finally:
+        worker_conn.close()
+    return previews
+
+
+def show_install_preview(previews, on_confirm):
+    dlg = tk.Toplevel(root)
+    dlg.title("Install Preview")
+    dlg.geometry("760x520")
+    dlg.transient(root)
+    dlg.grab_set()
+
+    main_frame = ttk.Frame(dlg, padding=10)
+    main_frame.pack(fill=tk.BOTH, expand=True)
+
+    ttk.Label(main_frame, text="Files these mods would change",
+              font=("Segoe UI", 12, "bold")).pack(anchor="w", pady=(0, 5))
+    ttk.Label(main_frame,
+              text=f"{len(previews)} mod(s) to install share files with installed mods",
+              bootstyle="warning").pack(anchor="w", pady=(0, 10))
+
+    tree = ttk.Treeview(main_frame, columns=("Mod", "Files", "Differ", "Game"),
+                        show="tree headings", height=12)
+    tree.heading("#0", text="New Mod")
+    tree.heading("Mod", text="Installed Mod")
+    tree.heading("Files", text="# Shared")
+    tree.heading("Differ", text="# Different")
+    tree.heading("Game", text="In Game")
+    tree.column("#0", width=200)
+    tree.column("Mod", width=220)
+    tree.column("Files", width=70, anchor="center")
+    tree.column("Differ", width=80, anchor="center")
+    tree.column("Game", width=110)
+
+    scroll = ttk.Scrollbar(main_frame, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=scroll.set)
+    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+    details = {}
+    for filename, overlaps in sorted(previews.items()):
+        parent = tree.insert("", tk.END, text=filename, open=True)
+        for other, found in sorted(overlaps.items(),
+                                   key=lambda i: -sum(o.kind != CONFLICT_IDENTICAL for o in i[1])):
+            differing = sum(o.kind != CONFLICT_IDENTICAL for o in found)
+            if not found[0].enabled:
+                in_game = "Mod disabled"
+            elif load_order_key(filename) > load_order_key(other):
+                in_game = "New mod wins"
+            else:
+                in_game = "Installed wins"
+            item = tree.insert(parent, tk.END, values=(other, len(found), differing, in_game))
+            details[item] = found
+
+    detail_frame = ttk.LabelFrame(dlg, text="Shared Files", padding=8)
+    detail_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+    detail_text = tk.Text(detail_frame, height=8, state="disabled",
+                          bg="#2b2b2b", fg="#e0e0e0", font=("Consolas", 9))
+    detail_text.pack(fill=tk.X)
+
+    def on_select(event):
+        selected = tree.selection()
+        if not selected or selected[0] not in details:
+            return
+        found = sorted(details[selected[0]],
+                       key=lambda o: (CONFLICT_KINDS.index(o.kind), o.path))
+        detail_text.config(state="normal")
+        detail_text.delete("1.0", tk.END)
+        detail_text.insert("1.0", "\n".join(
+            f"[{CONFLICT_KIND_LABELS[o.kind]}] {o.original_path}" for o in found[:50]))
+        if len(found) > 50:
+            detail_text.insert(tk.END, f"\n... and {len(found) - 50} more")
+        detail_text.config(state="disabled")
+
+    tree.bind("<<TreeviewSelect>>", on_select)
+
+    btn_frame = ttk.Frame(dlg, padding=8)
+    btn_frame.pack(fill=tk.X)
+
+    def confirm():
+        dlg.destroy()
+        on_confirm()
+
+    ttk.Button(btn_frame, text="Install Anyway", command=confirm,
+               bootstyle="success").pack(side=tk.RIGHT, padx=4)
+    ttk.Button(btn_frame, text="Cancel", command=dlg.destroy,
+               bootstyle="secondary").pack(side=tk.RIGHT, padx=4)
+
+
+def copy_mods_to_game(paths, skipped, errors, text_widget=None):
+    installed = []
+
+    for path in paths:
+        filename = os.path.basename(path)
         dest = os.path.join(GAME_PATH, filename)
         if os.path.exists(dest):
             if not messagebox.askyesno("Overwrite?", f"{filename} already exists.\nOverwrite?"):
@@ -2375,8 +2615,7 @@ def install_mods(file_paths, text_widget=None):
             errors.append(f"Failed to copy {filename}: {e}")
 
     if installed:
-        detect_existing_mods()
-        refresh_tree()
+        request_mod_scan()
         record_action("install", {"mod_names": installed})
         increment_stat("mods_installed", len(installed))
 
@@ -2491,8 +2730,7 @@ def install_mod_from_url_dialog():
 
                 try:
                     shutil.move(temp_path, dest)
-                    detect_existing_mods()
-                    refresh_tree()
+                    request_mod_scan()
                     increment_stat("mods_installed")
                     status_var.set(f"Successfully installed: {os.path.basename(dest)}")
                     log(f"Installed mod from URL: {os.path.basename(dest)}", text_widget=log_text)
@@ -2530,57 +2768,178 @@ def export_load_order():
     log(f"Exported load order to {path}", text_widget=log_text)
 
 
-def watch_mods(root, refresh_func, interval=5):
+def mod_watch_folders():
+    if not GAME_PATH:
+        return []
+    return [(GAME_PATH, LOCATION_ENABLED),
+            (mods_disabled_dir(), LOCATION_DISABLED)]
 
-    def worker():
-        last_snapshot = set()
-        while True:
-            try:
-                if not GAME_PATH or not os.path.isdir(GAME_PATH):
-                    time.sleep(interval)
-                    continue
-                found = set()
-            except Exception as e:
-                print("Watcher error:", e)
-                time.sleep(interval)
-
-            found = set()
-            disabled = mods_disabled_dir()
-            for folder in [GAME_PATH, disabled]:
-                if os.path.isdir(folder):
-                    for f in os.listdir(folder):
-                        if f.lower().endswith('.z2f'):
-                            found.add((f, 1 if folder == GAME_PATH else 0))
-            if found != last_snapshot:
-
-                def update_db_and_refresh():
-                    for mod_name, enabled in found:
-                        cursor.execute(
-                            "SELECT COUNT(*) FROM mods WHERE name=?",
-                            (mod_name, ))
-                        if cursor.fetchone()[0] == 0:
-                            cursor.execute(
-                                "INSERT INTO mods (name, enabled) VALUES (?, ?)",
-                                (mod_name, enabled))
-                        else:
-                            cursor.execute(
-                                "UPDATE mods SET enabled=? WHERE name=?",
-                                (enabled, mod_name))
-                    conn.commit()
-                    refresh_func()
-                    update_status_bar()
-
-                    refresh_tree()
 
-                try:
-                    if root.winfo_exists():
-                        root.after(0, update_db_and_refresh)
-                except Exception:
-                    pass
-                last_snapshot = found
-            time.sleep(interval)
+def patch_mod_rows(diff, view=None, table="mods"):
+    """Update only the rows named in a ModSyncDiff."""
+    if diff is None or diff.empty:
+        return
+
+    view = view or zt2_view
+    view.remove(diff.removed + list(diff.renamed))
+    for name in diff.touched:
+        cursor.execute(
+            f"SELECT enabled, category, tags, author FROM {table} WHERE name=?",
+            (name, ))
+        row = cursor.fetchone()
+        if row:
+            view.upsert(
+                ModRow.from_entry(name, row[0], row[1], diff.catalog.get(name),
+                                  row[2], row[3]))
+
+
+def apply_mod_diff(diff):
+    """Apply a watcher diff to the database and patch the affected rows."""
+    diff = mod_catalog.detect_renames("ZT2", diff)
+    mod_catalog.apply_diff("ZT2", diff, commit=False)
+    renames = {old: e.name for old, e in diff.renamed}
+    rekey_mod_rows(cursor, "mods", renames, ZT2_NAME_COLUMNS)
+    present = diff.added + diff.moved + diff.changed + [e for _, e in diff.renamed]
+    scanned = {e.name: 1 if e.location == LOCATION_ENABLED else 0
+               for e in present}
+    added, removed, state_changed = sync_mod_rows(
+        cursor, "mods", scanned, scope=list(scanned) + diff.removed)
+    conn.commit()
+
+    skip = set(added + state_changed) | set(renames.values())
+    patch_mod_rows(ModSyncDiff(added, removed, state_changed,
+                               [e.name for e in present if e.name not in skip],
+                               {e.name: e for e in present}, renames))
+
+    changes = (len(diff.added) + len(diff.removed) + len(diff.moved)
+               + len(diff.changed) + len(diff.renamed))
+    print(f"[ModZT] Applied {changes} folder change(s).")
+    # New and changed rows have no hashes yet, and every change moves the
+    # load order; bring the content indexes up to date behind the patch.
+    if changes:
+        request_catalog_index()
+
+
+def index_zt2_catalog(worker_cursor, worker_conn):
+    """Hash, list and resolve whatever the catalog holds that is not
+    indexed yet; returns the duplicate groups."""
+    duplicates = find_duplicate_mods(worker_cursor, worker_conn)
+    ArchiveIndex(worker_cursor, worker_conn).update("ZT2")
+    LoadOrderResolver(worker_cursor, worker_conn).sync("ZT2")
+    return duplicates
+
+
+def scan_zt2_in_background():
+    worker_conn = open_worker_db()
+    try:
+        worker_cursor = worker_conn.cursor()
+        diff = detect_existing_mods(worker_cursor, worker_conn)
+        duplicates = index_zt2_catalog(worker_cursor, worker_conn)
+        return diff, duplicates
+    finally:
+        worker_conn.close()
+
+
+def index_zt2_in_background():
+    worker_conn = open_worker_db()
+    try:
+        return index_zt2_catalog(worker_conn.cursor(), worker_conn)
+    finally:
+        worker_conn.close()
+
+
+def scan_zt1_in_background():
+    worker_conn = open_worker_db()
+    try:
+        return detect_existing_zt1_mods(worker_conn.cursor(), worker_conn)
+    finally:
+        worker_conn.close()
+
 
-    threading.Thread(target=worker, daemon=True).start()
+def on_zt2_scan(result):
+    diff, duplicates = result
+    patch_mod_rows(diff)
+    print(f"[ModZT] Refreshed mod list ({len(zt2_view.rows)} mods found).")
+    on_zt2_indexed(duplicates)
+
+
+def on_zt2_indexed(duplicates):
+    warn_duplicate_mods(duplicates)
+    request_content_index()
+
+
+def request_catalog_index():
+    """Index catalog rows a watcher diff added or changed, without
+    rescanning the folders; every stage skips what it already knows."""
+    if GAME_PATH:
+        scan_pipeline.submit("zt2_index", index_zt2_in_background, on_zt2_indexed)
+
+
+def index_contents_in_background():
+    worker_conn = open_worker_db()
+    try:
+        worker_cursor = worker_conn.cursor()
+        analyzer = ContentAnalyzer()
+        count = EntityIndex(worker_cursor, worker_conn).update("ZT2", analyzer)
+        authors = MetadataIndex(worker_cursor, worker_conn).update("ZT2", analyzer)
+        return count, authors
+    finally:
+        worker_conn.close()
+
+
+def on_contents_indexed(result):
+    count, authors = result
+    for name, author in authors.items():
+        zt2_view.update(name, author=author)
+    if count:
+        print(f"[ModZT] Indexed entities of {count} mod(s).")
+        if search_mode_var.get() == "Entities":
+            run_mod_search(search_var.get())
+
+
+def request_content_index():
+    """Parse archives the entity and metadata indexes have not seen, off
+    the UI thread."""
+    scan_pipeline.submit("contents", index_contents_in_background,
+                         on_contents_indexed)
+
+
+def request_mod_scan():
+    """Rescan the ZT2 folders on a worker; a newer request supersedes it."""
+    if GAME_PATH:
+        scan_pipeline.submit("zt2", scan_zt2_in_background, on_zt2_scan)
+
+
+def request_zt1_scan():
+    if ZT1_PATH:
+        scan_pipeline.submit(
+            "zt1", scan_zt1_in_background,
+            lambda diff: patch_mod_rows(diff, zt1_view, "zt1_mods"))
+
+
+def watch_mods(root, interval=3):
+    """Start the folder watcher; bursts of changes arrive as one diff."""
+
+    def on_change(diff):
+        try:
+            if root.winfo_exists():
+                root.after(0, lambda: apply_mod_diff(diff))
+        except Exception:
+            pass
+
+    def on_error(message):
+        try:
+            if root.winfo_exists():
+                root.after(0, lambda: log(message, text_widget=log_text))
+        except Exception:
+            pass
+
+    # UI theme overlays live beside the mods but are managed by UIManager.
+    watcher = FolderWatcher(mod_watch_folders, ".z2f", on_change,
+                            poll_interval=interval, skip_prefixes=(OVERLAY_PREFIX, ),
+                            on_error=on_error)
+    watcher.start()
+    return watcher
 
 
 def bundle_create_dialog():
@@ -3024,12 +3383,17 @@ def export_bundle_as_mod_ui(bundle_name=None):
                 text_widget=log_text)
             continue
         mod_paths[m] = p
-        try:
-            with zipfile.ZipFile(p, 'r') as zf:
-                for mem in zf.namelist():
-                    file_map.setdefault(mem, []).append(m)
-        except zipfile.BadZipFile:
+        listing = archive_index.entries("ZT2", m)
+        if listing is not None:
+            for entry in listing:
+                file_map.setdefault(entry.original_path, []).append(m)
+            continue
+        directory = read_central_directory(p)
+        if directory is None:
             log(f"Bad zip file: {p}", text_widget=log_text)
+            continue
+        for mem in directory.names():
+            file_map.setdefault(mem, []).append(m)
 
     files = sorted(file_map.keys())
     if not files:
@@ -3106,6 +3470,7 @@ root.style.configure("Treeview", rowheight=30, font=("Segoe UI", 10))
 root.style.configure("Treeview.Heading", font=("Segoe UI", 10, "bold"))
 
 root.title(f"ModZT v{APP_VERSION}")
+scan_pipeline = ScanPipeline(root)
 
 _startup_settings = load_settings()
 _saved_geometry = _startup_settings.get("window_geometry", "1200x800")
@@ -3359,18 +3724,29 @@ def detect_modded_expansions(game_path):
     
     cache_dir = os.path.join(CONFIG_DIR, "mod_xp_icons")
     os.makedirs(cache_dir, exist_ok=True)
+
+    # Archives the index has already listed are ruled out without opening them.
+    index_conn = open_worker_db()
+    try:
+        has_xpinfo = ArchiveIndex(index_conn.cursor(), index_conn).paths_matching(
+            "ZT2", "%xpinfo%")
+    except sqlite3.Error:
+        has_xpinfo = {}
+    finally:
+        index_conn.close()
     
     def scan_z2f_for_xpinfo(z2f_path):
+        if has_xpinfo.get(z2f_path) is False:
+            return None
         try:
-            if not zipfile.is_zipfile(z2f_path):
+            # Base archives hold tens of thousands of members; look for
+            # xpInfo in the raw directory before building a ZipFile.
+            directory = read_central_directory(z2f_path)
+            if directory is None or not directory.find('xpinfo'):
                 return None
             
             with zipfile.ZipFile(z2f_path, 'r') as zf:
-                namelist = zf.namelist()
-                
-                xpinfo_entries = [n for n in namelist if 'xpinfo' in n.lower()]
-                if not xpinfo_entries:
-                    return None
+                namelist = directory.names()
                 
                 print(f"[Z2F Scan] Found xpInfo in: {z2f_path}")
                 
@@ -3803,6 +4179,7 @@ tools_menu = tk.Menu(tools_menu_btn, tearoff=0)
 tools_menu.add_command(label="Validate Mods", command=lambda: messagebox.showinfo("Validate Mods", "All mods validated successfully."))
 tools_menu.add_command(label="Scan for Conflicts", command=lambda: scan_mod_conflicts())
 tools_menu.add_command(label="Smart Categories", command=lambda: smart_categorize_all_mods())
+tools_menu.add_command(label="Rebuild Hash Index", command=lambda: rebuild_hash_index())
 tools_menu.add_command(label="Clean Temporary Files", command=lambda: messagebox.showinfo("Cleanup", "Temporary files cleaned up."))
 tools_menu.add_separator()
 tools_menu.add_command(label="Scheduled Profiles", command=lambda: open_scheduled_profiles_dialog())
@@ -3859,18 +4236,7 @@ status_disk_label.pack(side=tk.RIGHT, padx=10, pady=2)
 
 def update_status_bar():
     try:
-        disabled_dir = mods_disabled_dir()
-        total_size = 0
-
-        for folder in [GAME_PATH, disabled_dir]:
-            if folder and os.path.isdir(folder):
-                for f in os.listdir(folder):
-                    if f.lower().endswith(".z2f"):
-                        path = os.path.join(folder, f)
-                        try:
-                            total_size += os.path.getsize(path)
-                        except OSError:
-                            pass
+        total_size = mod_catalog.total_size("ZT2")
 
         if total_size >= 1024 * 1024 * 1024:
             size_str = f"{total_size / (1024**3):.2f} GB"
@@ -3916,7 +4282,7 @@ search_entry.pack(side="left", fill="x", expand=True, padx=(4, 6))
 zt1_frame = ttk.Frame(zt1_tab)
 zt1_frame.pack(fill=tk.BOTH, expand=True, pady=4)
 
-zt1_tree = ttk.Treeview(
+zt1_tree = VirtualTreeview(
     zt1_frame,
     columns=("Name", "Status", "Category", "Size", "Modified"),
     show="headings",
@@ -3933,7 +4299,7 @@ for col in ("Name", "Status", "Category", "Size", "Modified"):
         heading_text = col
     zt1_tree.heading(col,
                      text=heading_text,
-                     command=lambda c=col: sort_zt1_tree(c, False))
+                     command=lambda c=col: sort_zt1_tree(c))
 
 zt1_tree.column("Name", anchor="w", width=300)
 zt1_tree.column("Status", anchor="center", width=100)
@@ -4000,7 +4366,7 @@ def set_zt1_mod_category():
                                  parent=root)
     if new:
         set_mod_category(name, new, zt1=True)
-        refresh_zt1_tree()
+        zt1_view.update(name, category=new)
 
 
 def set_zt1_mod_tags():
@@ -4016,7 +4382,7 @@ def set_zt1_mod_tags():
     if new is not None:
         tags = [t.strip() for t in new.split(",")]
         set_mod_tags(name, tags, zt1=True)
-        refresh_zt1_tree()
+        zt1_view.update(name, tags=", ".join(get_mod_tags(name, zt1=True)))
 
 
 zt1_footer = ttk.Label(zt1_tab,
@@ -4024,6 +4390,10 @@ zt1_footer = ttk.Label(zt1_tab,
                        bootstyle="secondary")
 zt1_footer.pack(anchor="w", padx=6, pady=(2, 0))
 
+zt1_view = ModListModel(zt1_tree, on_change=lambda: update_zt1_counts())
+restore_sort("ZT1", zt1_view)
+update_sort_headings(zt1_tree, zt1_view, lambda c: sort_zt1_tree(c))
+
 zt1_mod_btns = ttk.Frame(zt1_tab, padding=6)
 zt1_mod_btns.pack(fill=tk.X)
 
@@ -4079,107 +4449,29 @@ ttk.Button(zt1_bulk_btns,
            width=12,
            command=lambda: show_favorites_dialog()).pack(side=tk.LEFT, padx=4)
 
-def sort_zt1_tree(col, reverse=False):
-    data = [(zt1_tree.set(k, col), k) for k in zt1_tree.get_children("")]
-
-    if col == "Size":
-
-        def parse_size(s):
-            try:
-                return float(s.split()[0]) if "KB" in s else 0
-            except Exception:
-                return 0
-
-        data.sort(key=lambda t: parse_size(t[0]), reverse=reverse)
-    else:
-        data.sort(key=lambda t: str(t[0]).lower(), reverse=reverse)
-
-    for index, (val, k) in enumerate(data):
-        zt1_tree.move(k, "", index)
-
-    zt1_tree.heading(col, command=lambda: sort_zt1_tree(col, not reverse))
-
-    for c in ("Name", "Status", "Category", "Tags", "Size"):
-        label = c
-        if c == col:
-            label += " v" if reverse else " ^"
-        zt1_tree.heading(
-            c,
-            text=label,
-            command=lambda c=c: sort_zt1_tree(c, not (c == col and reverse)))
+def sort_zt1_tree(col):
+    zt1_view.sort_by(col)
+    remember_sort("ZT1", zt1_view)
+    update_sort_headings(zt1_tree, zt1_view, sort_zt1_tree)
 
 
 def refresh_zt1_tree(filter_text=""):
-    for row in zt1_tree.get_children():
-        zt1_tree.delete(row)
-
-    detect_existing_zt1_mods()
-
-    cursor.execute("SELECT COUNT(*), SUM(enabled) FROM zt1_mods")
-    total, enabled_count = cursor.fetchone()
-    enabled_count = enabled_count or 0
-    disabled_count = total - enabled_count
+    # Show the cached catalog right away; the rescan patches what changed.
+    zt1_view.load(load_mod_rows("zt1_mods", mod_catalog.snapshot("ZT1")))
 
-    cursor.execute(
-        "SELECT name, enabled, category FROM zt1_mods ORDER BY enabled DESC, name ASC")
-    all_rows = cursor.fetchall()
-
-    filter_text = (zt1_search_var.get() or "").strip().lower()
-
-    visible_rows = []
-    for name, enabled, category in all_rows:
-        status_str = "enabled" if enabled else "disabled"
-        combined = f"{name.lower()} {category.lower() if category else ''} {status_str}"
-
-        if filter_text and filter_text not in combined:
-            continue
-
-        visible_rows.append((name, enabled, category))
-
-    for name, enabled, category in visible_rows:
-        status = "enabled" if enabled else "disabled"
-        display_status = "Enabled" if enabled else "Disabled"
-
-        mod_path = None
-        if ZT1_MOD_DIR:
-            enabled_path = os.path.join(ZT1_MOD_DIR, name)
-            disabled_path = os.path.join(zt1_mods_disabled_dir() or "", name)
-            if os.path.exists(enabled_path):
-                mod_path = enabled_path
-            elif os.path.exists(disabled_path):
-                mod_path = disabled_path
-
-        if mod_path and os.path.exists(mod_path):
-            size_mb = os.path.getsize(mod_path) / (1024 * 1024)
-            size = f"{size_mb:.2f}"
-            modified = time.strftime("%Y-%m-%d %H:%M:%S",
-                                     time.localtime(os.path.getmtime(mod_path)))
-        else:
-            size = "-"
-            modified = "N/A"
+    apply_zt1_tree_theme()
+    request_zt1_scan()
 
-        zt1_tree.insert("",
-                        tk.END,
-                        values=(name, display_status, category or "-", size, modified),
-                        tags=(status, ))
 
+def update_zt1_counts():
+    total, enabled_count = zt1_view.counts()
     zt1_footer.config(
         text=
-        f"Total mods: {total} | Enabled: {enabled_count} | Disabled: {disabled_count}"
+        f"Total mods: {total} | Enabled: {enabled_count} | Disabled: {total - enabled_count}"
     )
 
-    apply_zt1_tree_theme()
-
-
-zt1_search_var.trace_add("write", lambda *_: refresh_zt1_tree())
 
-
-def on_search_zt1(*args):
-    text = zt1_search_var.get().strip()
-    refresh_zt1_tree(text)
-
-
-zt1_search_var.trace_add("write", on_search_zt1)
+zt1_view.bind_search(zt1_search_var)
 
 
 def get_selected_zt1_mod():
@@ -4194,14 +4486,12 @@ def enable_selected_zt1_mod():
     mod = get_selected_zt1_mod()
     if mod:
         enable_zt1_mod(mod, text_widget=log_text)
-        refresh_zt1_tree()
 
 
 def disable_selected_zt1_mod():
     mod = get_selected_zt1_mod()
     if mod:
         disable_zt1_mod(mod, text_widget=log_text)
-        refresh_zt1_tree()
 
 
 def enable_selected_zt1_mods():
@@ -4217,7 +4507,6 @@ def enable_selected_zt1_mods():
             count += 1
         except Exception as e:
             log(f"[!] Failed to enable {name}: {e}", log_text)
-    refresh_zt1_tree()
     if count > 1:
         log(f"Enabled {count} ZT1 mods.", log_text)
 
@@ -4235,7 +4524,6 @@ def disable_selected_zt1_mods():
             count += 1
         except Exception as e:
             log(f"[!] Failed to disable {name}: {e}", log_text)
-    refresh_zt1_tree()
     if count > 1:
         log(f"Disabled {count} ZT1 mods.", log_text)
 
@@ -4263,7 +4551,6 @@ def bulk_enable_zt1_mods(all_mods=False):
             count += 1
         except:
             pass
-    refresh_zt1_tree()
     log(f"Enabled {count} ZT1 mods.", log_text)
 
 
@@ -4290,7 +4577,6 @@ def bulk_disable_zt1_mods(all_mods=False):
             count += 1
         except:
             pass
-    refresh_zt1_tree()
     log(f"Disabled {count} ZT1 mods.", log_text)
 
 
@@ -4425,6 +4711,13 @@ ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
 search_var = tk.StringVar()
 search_entry = ttk.Entry(search_frame, textvariable=search_var)
 search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(4, 6))
+search_mode_var = tk.StringVar(value="Mods")
+search_mode_combo = ttk.Combobox(search_frame, textvariable=search_mode_var,
+                                 values=("Mods", "Entities"), state="readonly",
+                                 width=9)
+search_mode_combo.pack(side=tk.LEFT)
+search_status = ttk.Label(search_frame, text="", bootstyle="secondary")
+search_status.pack(side=tk.LEFT, padx=(6, 0))
 
 mods_tree_frame = ttk.Frame(mods_tab)
 mods_tree_frame.pack(fill=tk.BOTH, expand=True, pady=(4, 0))
@@ -4432,11 +4725,11 @@ mods_tree_frame.pack(fill=tk.BOTH, expand=True, pady=(4, 0))
 mods_tree_scroll = ttk.Scrollbar(mods_tree_frame)
 mods_tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
 
-mods_tree = ttk.Treeview(mods_tree_frame,
-                         columns=("Name", "Status", "Category", "Size", "Modified"),
-                         show="headings",
-                         selectmode="extended",
-                         yscrollcommand=mods_tree_scroll.set)
+mods_tree = VirtualTreeview(mods_tree_frame,
+                             columns=("Name", "Status", "Category", "Size", "Modified"),
+                             show="headings",
+                             selectmode="extended",
+                             yscrollcommand=mods_tree_scroll.set)
 mods_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
 mods_tree_scroll.config(command=mods_tree.yview)
@@ -4468,6 +4761,10 @@ mod_count_label = ttk.Label(mods_tab,
                             bootstyle="secondary")
 mod_count_label.pack(anchor="w", padx=6, pady=(2, 0))
 
+zt2_view = ModListModel(mods_tree, on_change=lambda: update_mod_counts())
+restore_sort("ZT2", zt2_view)
+update_sort_headings(mods_tree, zt2_view, lambda c: sort_tree_by(c))
+
 mod_btns = ttk.Frame(mods_tab, padding=6)
 mod_btns.pack(fill=tk.X, pady=(0, 4))
 
@@ -4506,9 +4803,8 @@ def set_mod_category_dialog():
                                  parent=root)
     if new:
         for iid in selected:
-            mod_name = mods_tree.item(iid)["values"][0]
-            set_mod_category(mod_name, new, zt1=False)
-        refresh_tree()
+            set_mod_category(iid, new, zt1=False)
+            zt2_view.update(iid, category=new)
 
 
 def on_mod_right_click(event):
@@ -4609,8 +4905,7 @@ uninstall_btn = ttk.Button(mod_btns,
 uninstall_btn.pack(side=tk.LEFT, padx=4)
 refresh_btn = ttk.Button(mod_btns,
                          text="Refresh List",
-                         command=lambda:
-                         (detect_existing_mods(), refresh_tree()))
+                         command=lambda: refresh_tree())
 refresh_btn.pack(side=tk.LEFT, padx=4)
 
 ttk.Separator(mod_btns, orient="vertical").pack(side=tk.LEFT, padx=8, fill=tk.Y)
@@ -4829,21 +5124,23 @@ def open_mod_report_dialog():
         categories = {}
         
         if inc_zt2.get():
+            catalog = mod_catalog.snapshot("ZT2")
+            entity_counts_by_mod = mod_metadata.counts("ZT2")
             cursor.execute("SELECT name, enabled, category, tags, author FROM mods ORDER BY name")
             for row in cursor.fetchall():
                 name, enabled, category, tags, author = row
                 mod_info = {"name": name, "enabled": bool(enabled), "category": category or "Uncategorized", "game": "ZT2"}
+                if author:
+                    mod_info["author"] = author
+                if name in entity_counts_by_mod:
+                    mod_info["entities"] = entity_counts_by_mod[name]
                 
                 if inc_sizes.get():
-                    path = find_mod_file(name)
-                    if path:
-                        try:
-                            size = os.path.getsize(path)
-                            mod_info["size"] = size
-                            mod_info["size_formatted"] = format_size(size)
-                            total_size += size
-                        except:
-                            mod_info["size"] = 0
+                    entry = catalog.get(name)
+                    if entry is not None:
+                        mod_info["size"] = entry.size
+                        mod_info["size_formatted"] = format_size(entry.size)
+                        total_size += entry.size
                 
                 if enabled:
                     zt2_enabled += 1
@@ -4958,47 +5255,7 @@ def auto_categorize_mod(mod_name):
     path = find_mod_file(mod_name)
     if not path:
         return "Uncategorized"
-    
-    contents = parse_z2f_contents(path)
-    if not contents:
-        return "Uncategorized"
-    
-    if len(contents["animals"]) > 0:
-        if len(contents["animals"]) > 5:
-            return "Animal Pack"
-        return "Animals"
-    elif len(contents["buildings"]) > 0:
-        return "Buildings"
-    elif len(contents["scenery"]) > 0:
-        return "Scenery"
-    elif len(contents["foliage"]) > 0:
-        return "Foliage"
-    elif len(contents["fences"]) > 0:
-        return "Fences"
-    elif len(contents["paths"]) > 0:
-        return "Paths"
-    elif len(contents["objects"]) > 0:
-        return "Objects"
-    
-    name_lower = mod_name.lower()
-    if any(x in name_lower for x in ['animal', 'creature', 'species']):
-        return "Animals"
-    elif any(x in name_lower for x in ['building', 'shop', 'restaurant', 'restroom']):
-        return "Buildings"
-    elif any(x in name_lower for x in ['tree', 'plant', 'flower', 'bush']):
-        return "Foliage"
-    elif any(x in name_lower for x in ['scenery', 'rock', 'decoration']):
-        return "Scenery"
-    elif any(x in name_lower for x in ['fence', 'wall', 'barrier']):
-        return "Fences"
-    elif any(x in name_lower for x in ['path', 'road', 'walkway']):
-        return "Paths"
-    elif any(x in name_lower for x in ['ui', 'interface', 'menu', 'hack']):
-        return "UI/Hacks"
-    elif any(x in name_lower for x in ['map', 'scenario', 'zoo']):
-        return "Maps/Scenarios"
-    
-    return "Uncategorized"
+    return suggest_category(mod_name, entity_counts(path))
 
 
 def smart_categorize_all_mods():
@@ -5016,34 +5273,113 @@ def smart_categorize_all_mods():
     
     progress = tk.Toplevel(root)
     progress.title("Categorizing Mods...")
-    progress.geometry("400x100")
+    progress.geometry("400x130")
     progress.transient(root)
     
     ttk.Label(progress, text="Analyzing mods...", font=("Segoe UI", 11)).pack(pady=10)
     pbar = ttk.Progressbar(progress, length=350, mode='determinate')
-    pbar.pack(pady=10)
+    pbar.pack(pady=5)
     status_label = ttk.Label(progress, text="")
     status_label.pack()
-    
-    categorized = 0
+
+    analyzer = ContentAnalyzer()
+    ttk.Button(progress, text="Cancel", bootstyle="secondary",
+               command=analyzer.cancel).pack(pady=5)
+    progress.protocol("WM_DELETE_WINDOW", analyzer.cancel)
+
     total = len(uncategorized)
-    
-    def do_categorize():
-        nonlocal categorized
-        for i, (name,) in enumerate(uncategorized):
-            category = auto_categorize_mod(name)
-            if category != "Uncategorized":
-                cursor.execute("UPDATE mods SET category = ? WHERE name = ?", (category, name))
-                categorized += 1
-            pbar['value'] = ((i + 1) / total) * 100
-            status_label.config(text=f"Processing: {name[:40]}...")
-            progress.update()
-        conn.commit()
-        progress.destroy()
-        refresh_tree()
-        messagebox.showinfo("Smart Categories", f"Categorized {categorized} of {total} mods!")
-    
-    progress.after(100, do_categorize)
+
+    def on_progress(done, count, name):
+        def update():
+            if progress.winfo_exists():
+                pbar['value'] = (done / count) * 100
+                status_label.config(text=f"Processing: {name[:40]}...")
+        root.after(0, update)
+
+    def work():
+        worker_conn = open_worker_db()
+        try:
+            return categorize_mods(worker_conn.cursor(), worker_conn,
+                                   [name for name, in uncategorized],
+                                   analyzer, on_progress)
+        finally:
+            worker_conn.close()
+
+    def on_done(categorized):
+        if progress.winfo_exists():
+            progress.destroy()
+        for name, category in categorized.items():
+            zt2_view.update(name, category=category)
+        verb = "Cancelled after categorizing" if analyzer.cancelled else "Categorized"
+        messagebox.showinfo("Smart Categories",
+                            f"{verb} {len(categorized)} of {total} mods!")
+
+    def on_failed(e):
+        if progress.winfo_exists():
+            progress.destroy()
+        messagebox.showerror("Smart Categories", f"Categorization failed:\n{e}")
+
+    scan_pipeline.submit("categorize", work, on_done, on_failed)
+
+
+def rebuild_hash_index():
+    if not GAME_PATH:
+        messagebox.showerror("Error", "Set your Zoo Tycoon 2 path first.")
+        return
+
+    progress = tk.Toplevel(root)
+    progress.title("Indexing Mods...")
+    progress.geometry("400x130")
+    progress.transient(root)
+
+    ttk.Label(progress, text="Hashing mod files...", font=("Segoe UI", 11)).pack(pady=10)
+    pbar = ttk.Progressbar(progress, length=350, mode='determinate')
+    pbar.pack(pady=5)
+    status_label = ttk.Label(progress, text="")
+    status_label.pack()
+
+    engine = HashEngine()
+    ttk.Button(progress, text="Cancel", bootstyle="secondary",
+               command=engine.cancel).pack(pady=5)
+    progress.protocol("WM_DELETE_WINDOW", engine.cancel)
+
+    def on_progress(done, total, name):
+        def update():
+            if progress.winfo_exists():
+                pbar['value'] = (done / total) * 100
+                status_label.config(text=f"{done}/{total}: {name[:40]}")
+        root.after(0, update)
+
+    def work():
+        worker_conn = open_worker_db()
+        try:
+            worker_cursor = worker_conn.cursor()
+            finished = index_mod_files(worker_cursor, worker_conn, force=True,
+                                       engine=engine, progress=on_progress)
+            return finished, ModCatalog(worker_cursor, worker_conn).duplicates("ZT2")
+        finally:
+            worker_conn.close()
+
+    def on_done(result):
+        finished, duplicates = result
+        if progress.winfo_exists():
+            progress.destroy()
+        if not finished:
+            log("Hash index rebuild cancelled", log_text)
+        elif duplicates:
+            dup_text = "\n".join(mods for _, mods in duplicates)
+            messagebox.showwarning(
+                "Duplicate Mods Detected",
+                f"The following mods have identical contents:\n\n{dup_text}")
+        else:
+            messagebox.showinfo("Hash Index", "No duplicate mods found.")
+
+    def on_failed(e):
+        if progress.winfo_exists():
+            progress.destroy()
+        messagebox.showerror("Hash Index", f"Hash index rebuild failed:\n{e}")
+
+    scan_pipeline.submit("hash_index", work, on_done, on_failed)
 
 CLOUD_SYNC_FILE = "modzt_sync.json"
 
@@ -5410,16 +5746,16 @@ def analyze_startup_time():
     
     cursor.execute("SELECT name FROM mods WHERE enabled=1")
     enabled_mods = cursor.fetchall()
+    catalog = mod_catalog.snapshot("ZT2")
     
     total_size = 0
     mod_sizes = []
     
     for (name,) in enabled_mods:
-        path = find_mod_file(name)
-        if path and os.path.isfile(path):
-            size = os.path.getsize(path)
-            total_size += size
-            mod_sizes.append((name, size))
+        entry = catalog.get(name)
+        if entry is not None:
+            total_size += entry.size
+            mod_sizes.append((name, entry.size))
     
     mod_sizes.sort(key=lambda x: x[1], reverse=True)
     
@@ -9010,7 +9346,6 @@ def bundle_enable_all():
     for m in mods:
         enable_mod(m, text_widget=log_text)
     refresh_bundle_preview()
-    refresh_tree()
 
 
 def bundle_disable_all():
@@ -9022,7 +9357,6 @@ def bundle_disable_all():
     for m in mods:
         disable_mod(m, text_widget=log_text)
     refresh_bundle_preview()
-    refresh_tree()
 
 
 refresh_bundles_list()
@@ -9037,106 +9371,45 @@ log_text.pack(fill=tk.BOTH, expand=True)
 log_frame = ttk.Frame(root)
 log_text = tk.Text(log_frame, height=1, state='disabled')
 
-def refresh_tree():
-    mods_tree.delete(*mods_tree.get_children())
-
-    if not GAME_PATH:
-        return
-
-    detect_existing_mods()
-
-    disabled_dir = mods_disabled_dir()
-    if disabled_dir:
-        os.makedirs(disabled_dir, exist_ok=True)
-
+def load_mod_rows(table, catalog):
     cursor.execute(
-        "SELECT name, enabled, category FROM mods ORDER BY enabled DESC, name ASC")
-    mods = cursor.fetchall()
-
-    total = len(mods)
-    enabled_count = sum(1 for _, e, _ in mods if e)
-    disabled_count = total - enabled_count
-
-    for name, enabled_flag, category in mods:
-        path = find_mod_file(name)
-        exists = path and os.path.isfile(path)
-
-        size_mb = os.path.getsize(path) / (1024 * 1024) if exists else 0
-        modified = (time.strftime("%Y-%m-%d %H:%M:%S",
-                                  time.localtime(os.path.getmtime(path)))
-                    if exists else "N/A")
+        f"SELECT name, enabled, category, tags, author FROM {table} "
+        "ORDER BY enabled DESC, name ASC")
+    return [ModRow.from_entry(name, enabled, category, catalog.get(name),
+                              tags, author)
+            for name, enabled, category, tags, author in cursor.fetchall()]
 
-        status = ("Enabled" if enabled_flag else
-                  ("Missing" if not exists else "Disabled"))
-
-        mods_tree.insert("",
-                         tk.END,
-                         values=(name, status, category or "-", f"{size_mb:.2f}", modified),
-                         tags=("enabled" if enabled_flag else
-                               ("missing" if not exists else "disabled"), ))
 
+def update_mod_counts():
+    total, enabled_count = zt2_view.counts()
+    if zt2_view.query:
+        shown = f"{len(mods_tree.get_children())} (Filtered)"
+    else:
+        shown = total
     mod_count_label.config(
         text=
-        f"Total mods: {total} | Enabled: {enabled_count} | Disabled: {disabled_count}"
+        f"Total mods: {shown} | Enabled: {enabled_count} | Disabled: {total - enabled_count}"
     )
-
-    apply_tree_theme()
-    refresh_bundles_list()
     update_status_bar()
 
-    print(f"[ModZT] Refreshed mod list ({total} mods found).")
-
-
-def sort_tree_by(column):
-    if sort_state["column"] == column:
-        sort_state["reverse"] = not sort_state["reverse"]
-    else:
-        sort_state["column"] = column
-        sort_state["reverse"] = False
-
-    items = [mods_tree.item(iid)["values"] for iid in mods_tree.get_children()]
-
-    col_index = {"Name": 0, "Status": 1, "Category": 2, "Size": 3, "Modified": 4}[column]
-
-    def sort_key(row):
-        val = row[col_index]
-        if column == "Size":
-            try:
-                return float(val)
-            except ValueError:
-                return 0
-        elif column == "Modified":
-            try:
-                return time.mktime(time.strptime(val, "%Y-%m-%d %H:%M:%S"))
-            except Exception:
-                return 0
-        else:
-            return str(val).lower()
-
-    items.sort(key=sort_key, reverse=sort_state["reverse"])
 
-    for row in mods_tree.get_children():
-        mods_tree.delete(row)
+def refresh_tree():
+    if not GAME_PATH:
+        zt2_view.load([])
+        return
 
-    for r in items:
-        status_text = r[1]
-        if "Enabled" in status_text:
-            tag = "enabled"
-        elif "Missing" in status_text:
-            tag = "missing"
-        else:
-            tag = "disabled"
-        mods_tree.insert("", tk.END, values=r, tags=(tag, ))
+    # Show the cached catalog right away; the rescan patches what changed.
+    zt2_view.load(load_mod_rows("mods", mod_catalog.snapshot("ZT2")))
 
     apply_tree_theme()
+    refresh_bundles_list()
+    request_mod_scan()
 
-    for col in ("Name", "Status", "Category", "Size", "Modified"):
-        arrow = ""
-        if col == column:
-            arrow = "^" if sort_state["reverse"] else "v"
-        mods_tree.heading(col,
-                          text=f"{col} {arrow}",
-                          command=lambda c=col: sort_tree_by(c))
+
+def sort_tree_by(column):
+    zt2_view.sort_by(column)
+    remember_sort("ZT2", zt2_view)
+    update_sort_headings(mods_tree, zt2_view, sort_tree_by)
 
 
 def apply_tree_theme():
@@ -9285,152 +9558,7 @@ def open_mod_folder():
     messagebox.showinfo("Not Found", f"Could not find {mod} on disk.")
 
 
-def parse_z2f_contents(z2f_path):
-    contents = {
-        "animals": [],
-        "objects": [],
-        "buildings": [],
-        "scenery": [],
-        "foliage": [],
-        "fences": [],
-        "paths": [],
-        "guests": [],
-        "staff": [],
-        "other": [],
-        "files": [],
-        "total_size": 0,
-        "compressed_size": 0
-    }
-
-    try:
-        with zipfile.ZipFile(z2f_path, 'r') as zf:
-            for info in zf.infolist():
-                contents["total_size"] += info.file_size
-                contents["compressed_size"] += info.compress_size
-                contents["files"].append({
-                    "name": info.filename,
-                    "size": info.file_size,
-                    "compressed": info.compress_size
-                })
-
-                if info.filename.lower().endswith('.xml'):
-                    try:
-                        xml_data = zf.read(info.filename).decode('utf-8', errors='ignore')
-                        if xml_data.startswith('\ufeff'):
-                            xml_data = xml_data[1:]
-
-                        root_elem = ET.fromstring(xml_data)
-
-                        entity_info = extract_entity_info(root_elem, info.filename)
-                        if entity_info:
-                            category = entity_info.get("category", "other")
-                            if category in contents:
-                                contents[category].append(entity_info)
-                            else:
-                                contents["other"].append(entity_info)
-                    except ET.ParseError:
-                        pass
-                    except Exception:
-                        pass
-    except zipfile.BadZipFile:
-        return None
-
-    return contents
-
-
-def extract_entity_info(root_elem, filename):
-    info = {
-        "filename": filename,
-        "name": None,
-        "codename": None,
-        "type": None,
-        "category": "other",
-        "icon": None,
-        "description": None
-    }
-
-    root_tag = root_elem.tag.lower() if root_elem.tag else ""
-
-    if root_tag == "bfaitype" or root_elem.find(".//BFAIType") is not None:
-        info["category"] = "animals"
-        info["type"] = "Animal"
-    elif root_tag == "bfbuildingtype" or root_elem.find(".//BFBuildingType") is not None:
-        info["category"] = "buildings"
-        info["type"] = "Building"
-    elif root_tag == "bfscenerytype" or root_elem.find(".//BFSceneryType") is not None:
-        info["category"] = "scenery"
-        info["type"] = "Scenery"
-    elif root_tag == "bffencetype" or root_elem.find(".//BFFenceType") is not None:
-        info["category"] = "fences"
-        info["type"] = "Fence"
-    elif root_tag == "bfpathtype" or root_elem.find(".//BFPathType") is not None:
-        info["category"] = "paths"
-        info["type"] = "Path"
-    elif root_tag == "bffoliagetype" or root_elem.find(".//BFFoliageType") is not None:
-        info["category"] = "foliage"
-        info["type"] = "Foliage"
-    elif root_tag == "bfguesttype" or root_elem.find(".//BFGuestType") is not None:
-        info["category"] = "guests"
-        info["type"] = "Guest"
-    elif root_tag == "bfstafftype" or root_elem.find(".//BFStaffType") is not None:
-        info["category"] = "staff"
-        info["type"] = "Staff"
-    elif root_tag == "bfunittype" or root_elem.find(".//BFUnitType") is not None:
-        info["category"] = "objects"
-        info["type"] = "Object"
-    else:
-        path_lower = filename.lower()
-        if "/animals/" in path_lower or "\\animals\\" in path_lower:
-            info["category"] = "animals"
-            info["type"] = "Animal"
-        elif "/buildings/" in path_lower or "\\buildings\\" in path_lower:
-            info["category"] = "buildings"
-            info["type"] = "Building"
-        elif "/scenery/" in path_lower or "\\scenery\\" in path_lower:
-            info["category"] = "scenery"
-            info["type"] = "Scenery"
-        elif "/foliage/" in path_lower or "\\foliage\\" in path_lower:
-            info["category"] = "foliage"
-            info["type"] = "Foliage"
-        elif "/fences/" in path_lower or "\\fences\\" in path_lower:
-            info["category"] = "fences"
-            info["type"] = "Fence"
-        elif "/paths/" in path_lower or "\\paths\\" in path_lower:
-            info["category"] = "paths"
-            info["type"] = "Path"
-        else:
-            return None
-
-    for tag in ["codename", "Codename", "cCodename", "ccodename"]:
-        elem = root_elem.find(f".//{tag}")
-        if elem is not None and elem.text:
-            info["codename"] = elem.text.strip()
-            break
-
-    if not info["codename"]:
-        type_attr = root_elem.get("Type") or root_elem.get("type")
-        if type_attr:
-            info["codename"] = type_attr
-        else:
-            base = os.path.basename(filename)
-            info["codename"] = os.path.splitext(base)[0]
-
-    for tag in ["cIconName", "ciconname", "IconName", "Name", "name", "cName"]:
-        elem = root_elem.find(f".//{tag}")
-        if elem is not None and elem.text:
-            info["name"] = elem.text.strip()
-            break
-
-    if not info["name"]:
-        info["name"] = info["codename"]
-
-    for tag in ["cDescription", "Description", "description"]:
-        elem = root_elem.find(f".//{tag}")
-        if elem is not None and elem.text:
-            info["description"] = elem.text.strip()
-            break
-
-    return info
+INSPECT_BATCH = 250
 
 
 def inspect_selected_mod():
@@ -9443,10 +9571,14 @@ def inspect_selected_mod():
         messagebox.showerror("Error", f"Cannot find file for '{mod}'.")
         return
 
-    contents = parse_z2f_contents(path)
-    if contents is None:
-        messagebox.showerror("Error", "This mod file is not a valid Z2F file.")
-        return
+    # Both indexes are keyed by content, so a mod seen before opens with its
+    # listing and entities straight from the database; anything missing is
+    # read on a worker while the dialog fills in.
+    listing = archive_index.entries_at(path)
+    cached = entity_index.entities_at(path)
+
+    contents = {category: [] for category in ENTITY_CATEGORIES}
+    contents.update({"files": [], "total_size": 0, "compressed_size": 0})
 
     dlg = tk.Toplevel(root)
     dlg.title(f"Z2F Contents: {mod}")
@@ -9462,18 +9594,15 @@ def inspect_selected_mod():
               text=f"Contents of {mod}",
               font=("Segoe UI", 14, "bold")).pack(side=tk.LEFT)
 
-    total_entities = sum(len(contents[cat]) for cat in
-                         ["animals", "objects", "buildings", "scenery", "foliage", "fences", "paths"])
-    size_mb = contents["total_size"] / (1024 * 1024)
-    comp_mb = contents["compressed_size"] / (1024 * 1024)
-
-    ttk.Label(header,
-              text=f"Size: {size_mb:.2f} MB ({comp_mb:.2f} MB compressed)",
-              bootstyle="secondary").pack(side=tk.RIGHT)
+    size_label = ttk.Label(header, text="Reading archive...", bootstyle="secondary")
+    size_label.pack(side=tk.RIGHT)
 
     summary_frame = ttk.Frame(main_frame)
     summary_frame.pack(fill=tk.X, pady=(0, 10))
 
+    status_label = ttk.Label(main_frame, text="", bootstyle="secondary")
+    status_label.pack(anchor="w")
+
     categories = [
         ("Animals", "animals", "success"),
         ("Buildings", "buildings", "info"),
@@ -9484,13 +9613,16 @@ def inspect_selected_mod():
         ("Objects", "objects", "primary"),
     ]
 
-    for i, (label, key, style) in enumerate(categories):
-        count = len(contents[key])
-        if count > 0:
-            card = ttk.Frame(summary_frame)
-            card.pack(side=tk.LEFT, padx=4)
-            ttk.Label(card, text=str(count), font=("Segoe UI", 16, "bold")).pack()
-            ttk.Label(card, text=label, bootstyle=style).pack()
+    def refresh_summary():
+        for child in summary_frame.winfo_children():
+            child.destroy()
+        for label, key, style in categories:
+            count = len(contents[key])
+            if count > 0:
+                card = ttk.Frame(summary_frame)
+                card.pack(side=tk.LEFT, padx=4)
+                ttk.Label(card, text=str(count), font=("Segoe UI", 16, "bold")).pack()
+                ttk.Label(card, text=label, bootstyle=style).pack()
 
     notebook = ttk.Notebook(main_frame)
     notebook.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
@@ -9527,19 +9659,17 @@ def inspect_selected_mod():
         "other": "Other"
     }
 
-    for cat_key, cat_label in type_icons.items():
-        for entity in contents[cat_key]:
-            content_tree.insert("", tk.END,
-                              values=(cat_label,
-                                     entity.get("name", "Unknown"),
-                                     entity.get("codename", "Unknown")))
-
     files_tab = ttk.Frame(notebook, padding=6)
-    notebook.add(files_tab, text=f"Files ({len(contents['files'])})")
-
-    files_tree = ttk.Treeview(files_tab,
-                               columns=("Filename", "Size", "Compressed"),
-                               show="headings", height=15)
+    notebook.add(files_tab, text="Files")
+
+    # Packs can hold tens of thousands of members; only visible rows are
+    # real Treeview items.
+    files_scroll = ttk.Scrollbar(files_tab, orient="vertical")
+    files_tree = VirtualTreeview(files_tab,
+                                 columns=("Filename", "Size", "Compressed"),
+                                 show="headings", height=15,
+                                 yscrollcommand=files_scroll.set)
+    files_scroll.config(command=files_tree.yview)
     files_tree.heading("Filename", text="Filename")
     files_tree.heading("Size", text="Size (KB)")
     files_tree.heading("Compressed", text="Compressed (KB)")
@@ -9547,18 +9677,9 @@ def inspect_selected_mod():
     files_tree.column("Size", width=100, anchor="e")
     files_tree.column("Compressed", width=100, anchor="e")
 
-    files_scroll = ttk.Scrollbar(files_tab, orient="vertical", command=files_tree.yview)
-    files_tree.configure(yscrollcommand=files_scroll.set)
-
     files_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
     files_scroll.pack(side=tk.RIGHT, fill=tk.Y)
 
-    for f in contents["files"]:
-        size_kb = f["size"] / 1024
-        comp_kb = f["compressed"] / 1024
-        files_tree.insert("", tk.END,
-                         values=(f["name"], f"{size_kb:.1f}", f"{comp_kb:.1f}"))
-
     detail_frame = ttk.LabelFrame(main_frame, text="Details", padding=8)
     detail_frame.pack(fill=tk.X, pady=(10, 0))
 
@@ -9580,6 +9701,131 @@ def inspect_selected_mod():
 
     content_tree.bind("<<TreeviewSelect>>", on_content_select)
 
+    messages = queue.Queue()
+    cancel = threading.Event()
+    pending_files = []
+    pending_entities = []
+    state = {"files": 0, "entities": 0, "xml_done": 0, "xml_total": None,
+             "finished": False}
+
+    def close():
+        cancel.set()
+        dlg.destroy()
+
+    dlg.protocol("WM_DELETE_WINDOW", close)
+
+    def work():
+        found = []
+        try:
+            with zipfile.ZipFile(path, "r") as zf:
+                infos = zf.infolist()
+                if listing is None:
+                    messages.put(("files", [(i.filename, i.file_size, i.compress_size)
+                                            for i in infos]))
+                if cached is None:
+                    xml = [i for i in infos if i.filename.lower().endswith(".xml")]
+                    messages.put(("total", len(xml)))
+                    batch, flushed = [], time.monotonic()
+                    for done, info in enumerate(xml, 1):
+                        if cancel.is_set():
+                            return
+                        entity = classify_member(zf, info)
+                        if entity:
+                            batch.append(entity)
+                        if done == len(xml) or time.monotonic() - flushed > 0.1:
+                            messages.put(("entities", (batch, done)))
+                            found.extend(batch)
+                            batch, flushed = [], time.monotonic()
+        except (OSError, zipfile.BadZipFile) as e:
+            messages.put(("error", str(e)))
+            return
+        if cached is None:
+            worker_conn = open_worker_db()
+            try:
+                EntityIndex(worker_conn.cursor(), worker_conn).store_at(path, found)
+            except sqlite3.Error as e:
+                print(f"[!] Could not cache entities of {mod}: {e}")
+            finally:
+                worker_conn.close()
+        messages.put(("done", None))
+
+    def receive(kind, payload):
+        if kind == "files":
+            for name, size, compressed in payload:
+                contents["total_size"] += size
+                contents["compressed_size"] += compressed
+                contents["files"].append({"name": name, "size": size,
+                                          "compressed": compressed})
+            pending_files.extend(payload)
+            size_mb = contents["total_size"] / (1024 * 1024)
+            comp_mb = contents["compressed_size"] / (1024 * 1024)
+            size_label.config(text=f"Size: {size_mb:.2f} MB ({comp_mb:.2f} MB compressed)")
+            notebook.tab(files_tab, text=f"Files ({len(contents['files'])})")
+        elif kind == "total":
+            state["xml_total"] = payload
+        elif kind == "entities":
+            entities, state["xml_done"] = payload
+            for entity in entities:
+                category = entity.get("category", "other")
+                contents[category if category in contents else "other"].append(entity)
+            pending_entities.extend(entities)
+            if entities:
+                refresh_summary()
+        elif kind == "done":
+            state["finished"] = True
+
+    def pump():
+        if not dlg.winfo_exists():
+            cancel.set()
+            return
+        while True:
+            try:
+                kind, payload = messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "error":
+                dlg.destroy()
+                messagebox.showerror("Error", f"This mod file is not a valid Z2F file.\n\n{payload}")
+                return
+            receive(kind, payload)
+
+        # A bounded number of rows per tick keeps the dialog responsive.
+        start = state["entities"]
+        for entity in pending_entities[start:start + INSPECT_BATCH]:
+            category = entity.get("category", "other")
+            content_tree.insert("", tk.END,
+                                values=(type_icons.get(category, "Other"),
+                                        entity.get("name", "Unknown"),
+                                        entity.get("codename", "Unknown")))
+        state["entities"] = min(len(pending_entities), start + INSPECT_BATCH)
+        start = state["files"]
+        for name, size, compressed in pending_files[start:start + INSPECT_BATCH * 20]:
+            files_tree.insert("", tk.END,
+                              values=(name, f"{size / 1024:.1f}", f"{compressed / 1024:.1f}"))
+        state["files"] = min(len(pending_files), start + INSPECT_BATCH * 20)
+
+        notebook.tab(content_tab, text=f"Content ({state['entities']})")
+        behind = (state["entities"] < len(pending_entities)
+                  or state["files"] < len(pending_files))
+        if state["xml_total"] and not state["finished"]:
+            status_label.config(
+                text=f"Analyzing {state['xml_done']}/{state['xml_total']} XML files...")
+        elif not behind:
+            status_label.config(text="")
+        if behind or not state["finished"]:
+            dlg.after(30, pump)
+
+    if listing is not None:
+        messages.put(("files", [(e.original_path, e.size, e.compressed_size)
+                                for e in listing]))
+    if cached is not None:
+        messages.put(("entities", (cached, 0)))
+    if listing is None or cached is None:
+        threading.Thread(target=work, daemon=True).start()
+    else:
+        messages.put(("done", None))
+    pump()
+
     btns = ttk.Frame(dlg, padding=6)
     btns.pack(fill=tk.X)
 
@@ -9593,7 +9839,7 @@ def inspect_selected_mod():
                command=lambda: copy_content_list(contents),
                bootstyle="secondary").pack(side=tk.LEFT, padx=4)
 
-    ttk.Button(btns, text="Close", command=dlg.destroy).pack(side=tk.RIGHT, padx=4)
+    ttk.Button(btns, text="Close", command=close).pack(side=tk.RIGHT, padx=4)
 
 
 def copy_content_list(contents):
@@ -9627,18 +9873,84 @@ def copy_content_list(contents):
     messagebox.showinfo("Copied", "Content list copied to clipboard!")
 
 
+def load_conflicts(filter_type="all"):
+    """File path -> mods sharing it, queried from the archive index.
+
+    filter_type "enabled" keeps paths shared by two enabled mods and
+    "critical" keeps XML files. "entities" returns codename -> entity
+    definitions instead (see load_codename_conflicts).
+    """
+    if filter_type == "entities":
+        return load_codename_conflicts()
+    conflicts = {}
+    for file_path, mod_name, size, original_path, enabled, crc in archive_index.conflicts(
+            "ZT2", table="mods", enabled_only=filter_type == "enabled",
+            suffix=".xml" if filter_type == "critical" else None):
+        conflicts.setdefault(file_path, []).append({
+            "mod": mod_name,
+            "size": size,
+            "enabled": enabled == 1,
+            "original_path": original_path,
+            "crc": crc
+        })
+    return conflicts
+
+
+def load_codename_conflicts():
+    """Codename -> definitions, for codenames that enabled mods define in
+    different files. Read from the entity index; no XML is parsed."""
+    clashes = {}
+    for clash in entity_index.codename_conflicts("ZT2", table="mods", enabled_only=True):
+        clashes.setdefault(clash.codename.lower(), []).append({
+            "mod": clash.mod,
+            "enabled": clash.enabled == 1,
+            "codename": clash.codename,
+            "type": clash.type,
+            "name": clash.name,
+            "filename": clash.filename
+        })
+    return clashes
+
+
+CONFLICT_KIND_LABELS = {
+    CONFLICT_DIFFERENT: "Different",
+    CONFLICT_CASE_ONLY: "Case only",
+    CONFLICT_IDENTICAL: "Identical",
+}
+
+
+def conflict_kind(mods):
+    """classify_copies() for the mod list of one conflicting path."""
+    return classify_copies((m["original_path"], m["size"], m["crc"]) for m in mods)
+
+
 def scan_mod_conflicts():
     if not GAME_PATH or not os.path.isdir(GAME_PATH):
         messagebox.showwarning("No Game Path", "Please set your Zoo Tycoon 2 game path first.")
         return
 
-    cursor.execute("SELECT name, enabled FROM mods")
-    all_mods = cursor.fetchall()
+    cursor.execute("SELECT COUNT(*) FROM mods")
+    total_mods = cursor.fetchone()[0]
 
-    if not all_mods:
+    if not total_mods:
         messagebox.showinfo("No Mods", "No mods found to scan.")
         return
 
+    def resolve_load_order():
+        worker_conn = open_worker_db()
+        try:
+            LoadOrderResolver(worker_conn.cursor(), worker_conn).sync("ZT2")
+        finally:
+            worker_conn.close()
+
+    # The index follows installs, removals and edits on every folder scan,
+    # so usually there is nothing to read and the report opens at once;
+    # only the load order is brought up to date, off the Tk thread.
+    if not archive_index.pending("ZT2"):
+        scan_pipeline.submit("conflict_scan", resolve_load_order,
+                             lambda _: show_conflict_results(load_conflicts, total_mods))
+        return
+
     progress_dlg = tk.Toplevel(root)
     progress_dlg.title("Scanning for Conflicts")
     progress_dlg.geometry("400x120")
@@ -9656,53 +9968,39 @@ def scan_mod_conflicts():
     status_var = tk.StringVar(value="Initializing...")
     ttk.Label(progress_dlg, textvariable=status_var).pack()
 
-    progress_dlg.update()
-
-    file_index = {}
-    mod_count = len(all_mods)
-
-    for i, (mod_name, enabled) in enumerate(all_mods):
-        progress_var.set((i / mod_count) * 100)
-        status_var.set(f"Scanning: {mod_name[:40]}...")
-        progress_dlg.update()
-
-        mod_path = find_mod_file(mod_name)
-        if not mod_path or not os.path.isfile(mod_path):
-            continue
+    def on_progress(done, total, name):
+        def update():
+            if progress_dlg.winfo_exists():
+                progress_var.set((done / total) * 100)
+                status_var.set(f"Indexing: {name[:40]}...")
+        root.after(0, update)
 
+    def index_archives():
+        worker_conn = open_worker_db()
         try:
-            with zipfile.ZipFile(mod_path, 'r') as zf:
-                for info in zf.infolist():
-                    file_path = info.filename.lower().replace('\\', '/')
-
-                    if file_path.endswith('/'):
-                        continue
-
-                    if file_path not in file_index:
-                        file_index[file_path] = []
-
-                    file_index[file_path].append({
-                        "mod": mod_name,
-                        "size": info.file_size,
-                        "enabled": enabled == 1,
-                        "original_path": info.filename
-                    })
-        except zipfile.BadZipFile:
-            continue
-        except Exception:
-            continue
+            ArchiveIndex(worker_conn.cursor(), worker_conn).update(
+                "ZT2", progress=on_progress)
+            LoadOrderResolver(worker_conn.cursor(), worker_conn).sync("ZT2")
+        finally:
+            worker_conn.close()
 
-    progress_dlg.destroy()
+    def on_indexed(_):
+        if progress_dlg.winfo_exists():
+            progress_dlg.destroy()
+        show_conflict_results(load_conflicts, total_mods)
 
-    conflicts = {}
-    for file_path, mods in file_index.items():
-        if len(mods) > 1:
-            conflicts[file_path] = mods
+    def on_failed(e):
+        if progress_dlg.winfo_exists():
+            progress_dlg.destroy()
+        messagebox.showerror("Error", f"Conflict scan failed:\n{e}")
 
-    show_conflict_results(conflicts, len(all_mods))
+    scan_pipeline.submit("conflict_scan", index_archives, on_indexed, on_failed)
 
 
-def show_conflict_results(conflicts, total_mods):
+def show_conflict_results(query, total_mods):
+    """Conflict report; query(filter_type) returns path -> mods (see
+    load_conflicts) and is rerun whenever the filter changes."""
+    conflicts = query("all")
     dlg = tk.Toplevel(root)
     dlg.title("Mod Conflict Scanner")
     dlg.geometry("1000x700")
@@ -9721,17 +10019,24 @@ def show_conflict_results(conflicts, total_mods):
     for file_path, mods in conflicts.items():
         for mod_info in mods:
             affected_mods.add(mod_info["mod"])
+    identical_count = sum(1 for mods in conflicts.values()
+                          if conflict_kind(mods) == CONFLICT_IDENTICAL)
+    clashes = query("entities")
 
-    if conflict_count == 0:
+    if conflict_count == 0 and not clashes:
         summary_text = f"No conflicts found among {total_mods} mods!"
         summary_style = "success"
     else:
-        summary_text = f"Found {conflict_count} file conflicts affecting {len(affected_mods)} mods"
+        summary_text = (f"Found {conflict_count} file conflicts affecting {len(affected_mods)} mods"
+                        f" ({conflict_count - identical_count} to review, "
+                        f"{identical_count} identical)")
+        if clashes:
+            summary_text += f", {len(clashes)} codename collisions"
         summary_style = "warning"
 
     ttk.Label(header, text=summary_text, bootstyle=summary_style).pack(side=tk.RIGHT)
 
-    if conflict_count == 0:
+    if conflict_count == 0 and not clashes:
         ttk.Label(main_frame,
                   text="All mods are compatible - no file overwrites detected.",
                   font=("Segoe UI", 12)).pack(pady=50)
@@ -9749,6 +10054,14 @@ def show_conflict_results(conflicts, total_mods):
                     value="enabled").pack(side=tk.LEFT, padx=5)
     ttk.Radiobutton(filter_frame, text="Critical (XML files)", variable=filter_var,
                     value="critical").pack(side=tk.LEFT, padx=5)
+    ttk.Radiobutton(filter_frame, text="Entity Codenames", variable=filter_var,
+                    value="entities").pack(side=tk.LEFT, padx=5)
+
+    # Byte-identical copies overwrite each other harmlessly (shared textures
+    # in packs), so they are hidden unless asked for.
+    show_identical_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(filter_frame, text="Show identical copies",
+                    variable=show_identical_var).pack(side=tk.RIGHT, padx=5)
 
     paned = ttk.PanedWindow(main_frame, orient=tk.HORIZONTAL)
     paned.pack(fill=tk.BOTH, expand=True)
@@ -9760,14 +10073,18 @@ def show_conflict_results(conflicts, total_mods):
               font=("Segoe UI", 11, "bold")).pack(anchor="w")
 
     conflict_tree = ttk.Treeview(left_frame,
-                                  columns=("File", "Mods", "Type"),
+                                  columns=("File", "Mods", "Type", "Kind", "Winner"),
                                   show="headings", height=20)
     conflict_tree.heading("File", text="File Path")
     conflict_tree.heading("Mods", text="# Mods")
     conflict_tree.heading("Type", text="Type")
+    conflict_tree.heading("Kind", text="Content")
+    conflict_tree.heading("Winner", text="In Game")
     conflict_tree.column("File", width=350)
     conflict_tree.column("Mods", width=60, anchor="center")
     conflict_tree.column("Type", width=80)
+    conflict_tree.column("Kind", width=80)
+    conflict_tree.column("Winner", width=150)
 
     conflict_scroll = ttk.Scrollbar(left_frame, orient="vertical",
                                      command=conflict_tree.yview)
@@ -9783,14 +10100,16 @@ def show_conflict_results(conflicts, total_mods):
               font=("Segoe UI", 11, "bold")).pack(anchor="w")
 
     detail_tree = ttk.Treeview(right_frame,
-                                columns=("Mod", "Status", "Size"),
+                                columns=("Mod", "Status", "Size", "CRC"),
                                 show="headings", height=10)
     detail_tree.heading("Mod", text="Mod Name")
     detail_tree.heading("Status", text="Status")
     detail_tree.heading("Size", text="File Size")
+    detail_tree.heading("CRC", text="CRC32")
     detail_tree.column("Mod", width=250)
     detail_tree.column("Status", width=80)
     detail_tree.column("Size", width=80, anchor="e")
+    detail_tree.column("CRC", width=80, anchor="center")
 
     detail_scroll = ttk.Scrollbar(right_frame, orient="vertical",
                                    command=detail_tree.yview)
@@ -9807,6 +10126,10 @@ def show_conflict_results(conflicts, total_mods):
     info_text.pack(fill=tk.X)
 
     conflicts_data = conflicts
+    results = {"all": conflicts, "entities": clashes}
+    kinds = {}
+    # Synced on the pipeline before the dialog opens (see scan_mod_conflicts).
+    resolved = {r.path: r for r in load_order.resolve("ZT2", conflicts)}
 
     def get_file_type(filepath):
         ext = os.path.splitext(filepath)[1].lower()
@@ -9826,30 +10149,71 @@ def show_conflict_results(conflicts, total_mods):
             return "Other"
 
     def populate_conflict_tree(filter_type="all"):
+        nonlocal conflicts_data
+        if filter_type not in results:
+            results[filter_type] = query(filter_type)
+        conflicts_data = results[filter_type]
+        kinds.clear()
         conflict_tree.delete(*conflict_tree.get_children())
+        conflict_tree.heading("File", text="Codename" if filter_type == "entities"
+                              else "File Path")
+        if filter_type == "entities":
+            populate_codenames()
+            return
+        kinds.update((path, conflict_kind(mods)) for path, mods in conflicts_data.items())
 
-        for file_path, mods in conflicts_data.items():
-            if filter_type == "enabled":
-                enabled_mods = [m for m in mods if m["enabled"]]
-                if len(enabled_mods) < 2:
-                    continue
-                display_mods = enabled_mods
-            elif filter_type == "critical":
-                if not file_path.endswith('.xml'):
-                    continue
-                display_mods = mods
-            else:
-                display_mods = mods
+        show_identical = show_identical_var.get()
+        for file_path in sorted(conflicts_data,
+                                key=lambda p: (CONFLICT_KINDS.index(kinds[p]), p)):
+            kind = kinds[file_path]
+            if kind == CONFLICT_IDENTICAL and not show_identical:
+                continue
+            display_mods = conflicts_data[file_path]
 
             file_type = get_file_type(file_path)
             display_path = file_path
             if len(display_path) > 50:
                 display_path = "..." + display_path[-47:]
 
+            resolution = resolved.get(file_path)
             item_id = conflict_tree.insert("", tk.END,
-                                           values=(display_path, len(display_mods), file_type),
+                                           values=(display_path, len(display_mods), file_type,
+                                                   CONFLICT_KIND_LABELS[kind],
+                                                   resolution.winner if resolution else ""),
                                            tags=(file_path,))
 
+    def populate_codenames():
+        for key in sorted(conflicts_data):
+            definitions = conflicts_data[key]
+            conflict_tree.insert("", tk.END,
+                                 values=(definitions[0]["codename"],
+                                         len({d["mod"] for d in definitions}),
+                                         definitions[0]["type"] or "", "Codename", ""),
+                                 tags=(key,))
+
+    def show_codename(key):
+        definitions = conflicts_data[key]
+        detail_tree.delete(*detail_tree.get_children())
+        for definition in definitions:
+            detail_tree.insert("", tk.END,
+                               values=(definition["mod"], "Enabled", "", ""),
+                               tags=("enabled",))
+        detail_tree.tag_configure("enabled", foreground="#2ecc71")
+
+        info_lines = [
+            f"Codename: {definitions[0]['codename']}",
+            f"Type: {definitions[0]['type'] or 'Unknown'}",
+            f"Defined by {len({d['mod'] for d in definitions})} enabled mods in different files:",
+        ]
+        info_lines += [f"  {d['mod']}: {d['filename']}" for d in definitions]
+        pending = entity_index.pending("ZT2")
+        if pending:
+            info_lines.append(f"({pending} mod(s) not analysed yet)")
+        info_text.config(state="normal")
+        info_text.delete("1.0", tk.END)
+        info_text.insert("1.0", "\n".join(info_lines))
+        info_text.config(state="disabled")
+
     def on_conflict_select(event):
         selected = conflict_tree.selection()
         if not selected:
@@ -9861,15 +10225,33 @@ def show_conflict_results(conflicts, total_mods):
         if not file_path or file_path not in conflicts_data:
             return
 
+        if filter_var.get() == "entities":
+            show_codename(file_path)
+            return
+
         mods = conflicts_data[file_path]
+        resolution = resolved.get(file_path)
+        # Latest loaded first: the winner, then what it shadows, then mods
+        # the game does not load.
+        stack = [resolution.winner] + resolution.shadowed if resolution else []
+        mods = sorted(mods, key=lambda m: (stack.index(m["mod"]) if m["mod"] in stack
+                                           else len(stack), m["mod"].lower()))
 
         detail_tree.delete(*detail_tree.get_children())
 
         for mod_info in mods:
-            status = "Enabled" if mod_info["enabled"] else "Disabled"
+            if not mod_info["enabled"]:
+                status = "Disabled"
+            elif resolution and mod_info["mod"] == resolution.winner:
+                status = "Wins"
+            elif mod_info["mod"] in stack:
+                status = "Shadowed"
+            else:
+                status = "Enabled"
             size_kb = mod_info["size"] / 1024
             detail_tree.insert("", tk.END,
-                              values=(mod_info["mod"], status, f"{size_kb:.1f} KB"),
+                              values=(mod_info["mod"], status, f"{size_kb:.1f} KB",
+                                      f"{mod_info['crc']:08X}"),
                               tags=("enabled" if mod_info["enabled"] else "disabled",))
 
         detail_tree.tag_configure("enabled", foreground="#2ecc71")
@@ -9878,13 +10260,18 @@ def show_conflict_results(conflicts, total_mods):
         info_text.config(state="normal")
         info_text.delete("1.0", tk.END)
 
+        kind = kinds[file_path]
         info_lines = [
             f"File: {file_path}",
             f"Type: {get_file_type(file_path)}",
             f"Conflicting mods: {len(mods)}",
+            {CONFLICT_DIFFERENT: "Content: differs between mods",
+             CONFLICT_CASE_ONLY: "Content: identical, paths differ only in case",
+             CONFLICT_IDENTICAL: "Content: identical in every mod (harmless)"}[kind],
             "",
-            "Note: The last loaded mod will overwrite earlier ones.",
-            "Load order depends on alphabetical filename order."
+            (f"In game: {resolution.winner} ({resolution.original_path})"
+             if resolution else "In game: not loaded by any enabled mod"),
+            "Archives load in alphabetical filename order; the last one wins."
         ]
         info_text.insert("1.0", "\n".join(info_lines))
         info_text.config(state="disabled")
@@ -9895,6 +10282,7 @@ def show_conflict_results(conflicts, total_mods):
         populate_conflict_tree(filter_var.get())
 
     filter_var.trace_add("write", on_filter_change)
+    show_identical_var.trace_add("write", on_filter_change)
 
     populate_conflict_tree()
 
@@ -9912,15 +10300,29 @@ def show_conflict_results(conflicts, total_mods):
 
         lines = ["Conflict Report", "=" * 50, "",
                  f"Total conflicts: {len(conflicts_data)}",
-                 f"Affected mods: {len(affected_mods)}", ""]
+                 f"Affected mods: {len({m['mod'] for mods in conflicts_data.values() for m in mods})}",
+                 ""]
+
+        if filter_var.get() == "entities":
+            for key in sorted(conflicts_data):
+                definitions = conflicts_data[key]
+                lines.append(f"\nCodename: {definitions[0]['codename']}")
+                lines.append(f"Type: {definitions[0]['type'] or 'Unknown'}")
+                lines.append("Defined in:")
+                for definition in definitions:
+                    lines.append(f"  - {definition['mod']}: {definition['filename']}")
 
-        for file_path, mods in sorted(conflicts_data.items()):
-            lines.append(f"\nFile: {file_path}")
-            lines.append(f"Type: {get_file_type(file_path)}")
-            lines.append("Mods:")
-            for mod_info in mods:
-                status = "[ENABLED]" if mod_info["enabled"] else "[disabled]"
-                lines.append(f"  - {mod_info['mod']} {status}")
+        else:
+            for file_path in sorted(conflicts_data,
+                                    key=lambda p: (CONFLICT_KINDS.index(kinds[p]), p)):
+                mods = conflicts_data[file_path]
+                lines.append(f"\nFile: {file_path}")
+                lines.append(f"Type: {get_file_type(file_path)}")
+                lines.append(f"Content: {CONFLICT_KIND_LABELS[kinds[file_path]]}")
+                lines.append("Mods:")
+                for mod_info in mods:
+                    status = "[ENABLED]" if mod_info["enabled"] else "[disabled]"
+                    lines.append(f"  - {mod_info['mod']} {status}")
 
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
@@ -9953,39 +10355,33 @@ def check_mod_conflicts_for(mod_name):
         messagebox.showerror("Error", f"Cannot find file for '{mod_name}'.")
         return
 
-    target_files = set()
-    try:
-        with zipfile.ZipFile(mod_path, 'r') as zf:
-            for info in zf.infolist():
-                if not info.filename.endswith('/'):
-                    target_files.add(info.filename.lower().replace('\\', '/'))
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to read mod:\n{e}")
-        return
+    def work():
+        worker_conn = open_worker_db()
+        try:
+            index = ArchiveIndex(worker_conn.cursor(), worker_conn)
+            if index.entries("ZT2", mod_name) is not None:
+                return index.overlaps_for("ZT2", mod_name, table="mods")
+            # Not indexed yet: list just this archive rather than the folder.
+            entries = read_archive_entries(mod_path)
+            if entries is None:
+                return None
+            return index.overlaps("ZT2", entries, exclude=[mod_name], table="mods")
+        finally:
+            worker_conn.close()
 
-    cursor.execute("SELECT name FROM mods WHERE name != ?", (mod_name,))
-    other_mods = [row[0] for row in cursor.fetchall()]
+    def on_done(conflicts):
+        if conflicts is None:
+            messagebox.showerror("Error", f"Failed to read mod:\n{mod_path}")
+        else:
+            show_mod_conflicts(mod_name, conflicts)
 
-    conflicts = {}
+    def on_failed(e):
+        messagebox.showerror("Error", f"Conflict check failed:\n{e}")
 
-    for other_mod in other_mods:
-        other_path = find_mod_file(other_mod)
-        if not other_path or not os.path.isfile(other_path):
-            continue
+    scan_pipeline.submit("mod_conflicts:" + mod_name, work, on_done, on_failed)
 
-        try:
-            with zipfile.ZipFile(other_path, 'r') as zf:
-                for info in zf.infolist():
-                    if info.filename.endswith('/'):
-                        continue
-                    file_path = info.filename.lower().replace('\\', '/')
-                    if file_path in target_files:
-                        if other_mod not in conflicts:
-                            conflicts[other_mod] = []
-                        conflicts[other_mod].append(info.filename)
-        except Exception:
-            continue
 
+def show_mod_conflicts(mod_name, conflicts):
     if not conflicts:
         messagebox.showinfo("No Conflicts",
                            f"'{mod_name}' has no file conflicts with other mods.")
@@ -10006,12 +10402,14 @@ def check_mod_conflicts_for(mod_name):
               text=f"Found conflicts with {len(conflicts)} other mod(s)",
               bootstyle="warning").pack(anchor="w", pady=(0, 10))
 
-    tree = ttk.Treeview(main_frame, columns=("Mod", "Files"),
+    tree = ttk.Treeview(main_frame, columns=("Mod", "Files", "Differ"),
                         show="headings", height=15)
     tree.heading("Mod", text="Conflicting Mod")
     tree.heading("Files", text="# Conflicting Files")
+    tree.heading("Differ", text="# Different")
     tree.column("Mod", width=400)
     tree.column("Files", width=150, anchor="center")
+    tree.column("Differ", width=100, anchor="center")
 
     scroll = ttk.Scrollbar(main_frame, orient="vertical", command=tree.yview)
     tree.configure(yscrollcommand=scroll.set)
@@ -10019,8 +10417,13 @@ def check_mod_conflicts_for(mod_name):
     tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
     scroll.pack(side=tk.RIGHT, fill=tk.Y)
 
-    for other_mod, files in sorted(conflicts.items(), key=lambda x: -len(x[1])):
-        tree.insert("", tk.END, values=(other_mod, len(files)), tags=(other_mod,))
+    def differing(overlaps):
+        return sum(o.kind != CONFLICT_IDENTICAL for o in overlaps)
+
+    for other_mod, overlaps in sorted(conflicts.items(),
+                                      key=lambda x: (-differing(x[1]), -len(x[1]))):
+        tree.insert("", tk.END, values=(other_mod, len(overlaps), differing(overlaps)),
+                    tags=(other_mod,))
 
     detail_frame = ttk.LabelFrame(dlg, text="Conflicting Files", padding=8)
     detail_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
@@ -10036,11 +10439,14 @@ def check_mod_conflicts_for(mod_name):
         item = tree.item(selected[0])
         other_mod = item["tags"][0] if item["tags"] else None
         if other_mod and other_mod in conflicts:
+            overlaps = sorted(conflicts[other_mod],
+                              key=lambda o: (CONFLICT_KINDS.index(o.kind), o.path))
             detail_text.config(state="normal")
             detail_text.delete("1.0", tk.END)
-            detail_text.insert("1.0", "\n".join(conflicts[other_mod][:50]))
-            if len(conflicts[other_mod]) > 50:
-                detail_text.insert(tk.END, f"\n... and {len(conflicts[other_mod]) - 50} more")
+            detail_text.insert("1.0", "\n".join(
+                f"[{CONFLICT_KIND_LABELS[o.kind]}] {o.other_path}" for o in overlaps[:50]))
+            if len(overlaps) > 50:
+                detail_text.insert(tk.END, f"\n... and {len(overlaps) - 50} more")
             detail_text.config(state="disabled")
 
     tree.bind("<<TreeviewSelect>>", on_select)
@@ -10081,19 +10487,7 @@ def show_mod_details():
     bundle_rows = cursor.fetchall()
     bundle_names = [r[0] for r in bundle_rows] if bundle_rows else []
 
-    readme_text = ""
-    try:
-        import zipfile
-        with zipfile.ZipFile(path, 'r') as zf:
-            for name in zf.namelist():
-                if "readme" in name.lower() and name.lower().endswith(
-                    (".txt", ".md")):
-                    with zf.open(name) as f:
-                        data = f.read().decode("utf-8", errors="ignore")
-                        readme_text = data[:2000]
-                        break
-    except Exception:
-        pass
+    metadata = mod_metadata.get("ZT2", mod)
 
     dlg = tk.Toplevel(root)
     dlg.title(f"Mod Details - {mod}")
@@ -10110,6 +10504,8 @@ def show_mod_details():
     ttk.Label(frame, text=f"Size: {size_mb:.2f} MB").pack(anchor="w")
     ttk.Label(frame, text=f"Last Modified: {modified}").pack(anchor="w",
                                                              pady=(0, 5))
+    meta_frame = ttk.Frame(frame)
+    meta_frame.pack(fill=tk.X)
 
     if bundle_names:
         ttk.Label(frame,
@@ -10124,11 +10520,58 @@ def show_mod_details():
               font=("Segoe UI", 10, "bold")).pack(anchor="w")
     txt = tk.Text(frame, height=15, wrap="word")
     txt.pack(fill=tk.BOTH, expand=True)
-    txt.insert(tk.END, readme_text or "(No readme found in mod)")
-    txt.configure(state="disabled")
 
     ttk.Button(frame, text="Close", command=dlg.destroy).pack(pady=8)
 
+    def show_metadata(metadata):
+        if not dlg.winfo_exists():
+            return
+        for child in meta_frame.winfo_children():
+            child.destroy()
+        if metadata and metadata.author:
+            ttk.Label(meta_frame, text=f"Author: {metadata.author}").pack(anchor="w")
+        if metadata and metadata.counts:
+            counts = ", ".join(f"{count} {category}" for category, count in
+                               sorted(metadata.counts.items(), key=lambda kv: -kv[1]))
+            ttk.Label(meta_frame, text=f"Contents: {counts}",
+                      wraplength=560).pack(anchor="w", pady=(0, 5))
+        if metadata and metadata.thumbnail:
+            try:
+                icon = ImageTk.PhotoImage(Image.open(io.BytesIO(metadata.thumbnail)))
+                icon_label = ttk.Label(frame, image=icon)
+                icon_label.image = icon
+                icon_label.place(relx=1.0, x=-4, y=4, anchor="ne")
+            except Exception:
+                pass
+        txt.configure(state="normal")
+        txt.delete("1.0", tk.END)
+        txt.insert(tk.END, (metadata and metadata.readme) or "(No readme found in mod)")
+        txt.configure(state="disabled")
+
+    if metadata is not None:
+        show_metadata(metadata)
+        return
+
+    # Not extracted yet (e.g. the background pass is still running): read
+    # this one archive on a worker, keep the result and fill the dialog in.
+    ttk.Label(meta_frame, text="Reading mod contents...").pack(anchor="w")
+    txt.insert(tk.END, "(Loading...)")
+    txt.configure(state="disabled")
+
+    def work():
+        extracted = extract_metadata(path)
+        worker_conn = open_worker_db()
+        try:
+            index = MetadataIndex(worker_conn.cursor(), worker_conn)
+            if index.store_at(path, extracted):
+                return index.get("ZT2", mod)
+        finally:
+            worker_conn.close()
+        return ModMetadata(counts=None, **extracted) if extracted else None
+
+    scan_pipeline.submit("mod_details:" + mod, work, show_metadata,
+                         lambda e: show_metadata(None))
+
 
 def refresh_bundles_list():
     bundle_list.delete(0, tk.END)
@@ -10223,66 +10666,43 @@ def on_export_bundle_as_mod():
     export_bundle_as_mod_ui(name)
 
 
-search_var.trace_add('write', lambda *_: filter_tree())
-
-
-def filter_tree(*_):
-    query = search_var.get().strip().lower()
-
-    for row in mods_tree.get_children():
-        mods_tree.delete(row)
-
-    cursor.execute(
-        "SELECT name, enabled, category FROM mods ORDER BY enabled DESC, name ASC")
-    mods = cursor.fetchall()
-
-    visible_rows = []
-    for name, enabled_flag, category in mods:
-        status_str = "enabled" if enabled_flag else "disabled"
+def run_mod_search(text):
+    if search_mode_var.get() == "Entities":
+        search_mod_entities(text)
+    else:
+        search_status.config(text="")
+        zt2_view.restrict(None)
+        zt2_view.filter(text)
 
-        combined = f"{name.lower()} {category.lower() if category else ''} {status_str}"
-        if query and query not in combined:
-            continue
 
-        path = find_mod_file(name)
-        size_mb = 0
-        modified = "N/A"
-        if path and os.path.isfile(path):
-            size_mb = os.path.getsize(path) / (1024 * 1024)
-            modified = time.strftime("%Y-%m-%d %H:%M:%S",
-                                     time.localtime(os.path.getmtime(path)))
-
-        if enabled_flag:
-            status = "Enabled"
-        elif not path or not os.path.isfile(path):
-            status = "Missing"
-        else:
-            status = "Disabled"
-
-        tag = ("enabled" if enabled_flag else (
-            "missing" if not path or not os.path.isfile(path) else "disabled"))
+def search_mod_entities(text):
+    """Narrow the mod list to mods with entities matching text."""
+    zt2_view.filter("")
+    if not text.strip():
+        search_status.config(text="")
+        zt2_view.restrict(None)
+        return
+    hits = entity_index.search(text, "ZT2", limit=None)
+    mods = {hit.mod for hit in hits}
+    zt2_view.restrict(mods)
+    status = f"{len(hits)} entities in {len(mods)} mods"
+    pending = entity_index.pending("ZT2")
+    if pending:
+        status += f" ({pending} not indexed yet)"
+    search_status.config(text=status)
 
-        mods_tree.insert("",
-                         tk.END,
-                         values=(name, status, category or "-", f"{size_mb:.2f}", modified),
-                         tags=(tag, ))
 
-        visible_rows.append(name)
+zt2_view.bind_search(search_var, search=run_mod_search)
+search_mode_combo.bind("<<ComboboxSelected>>",
+                       lambda e: run_mod_search(search_var.get()))
 
-    apply_tree_theme()
 
-    total = len(mods)
-    enabled = sum(1 for _, e in mods if e)
-    disabled = total - enabled
-    mod_count_label.config(
-        text=
-        f"Total mods: {len(visible_rows)} (Filtered) | Enabled: {enabled} | Disabled: {disabled}"
-    )
+def filter_tree(*_):
+    run_mod_search(search_var.get())
 
 def deferred_init():
     refresh_tree()
     apply_ui_mode()
-    detect_existing_zt1_mods()
     refresh_zt1_tree()
 
 try:
@@ -10290,9 +10710,10 @@ try:
 except Exception as _e:
     print(f"[!] deferred_init() raised: {_e}")
 
+mod_watcher = None
 if not hasattr(root, "_watcher_started"):
     try:
-        watch_mods(root, refresh_tree, interval=3)
+        mod_watcher = watch_mods(root, interval=3)
         root._watcher_started = True
     except Exception as _e:
         print(f"[!] watch_mods() failed to start: {_e}")
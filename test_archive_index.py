@@ -0,0 +1,96 @@
+import sqlite3
+import zipfile
+
+import pytest
+
+from modules.archive_index import (CONFLICT_CASE_ONLY, CONFLICT_DIFFERENT,
+                                   CONFLICT_IDENTICAL, ArchiveIndex, classify_copies,
+                                   ensure_archive_schema, read_archive_entries)
+from modules.hash_engine import HashEngine
+from modules.mod_catalog import LOCATION_ENABLED, ModCatalog, ensure_catalog_schema
+
+
+def make_archive(path, members):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return str(path)
+
+
+@pytest.fixture
+def indexed(tmp_path):
+    """An index over three mods that share paths in every possible way."""
+    folder = tmp_path / "mods"
+    folder.mkdir()
+    make_archive(folder / "a.z2f", {
+        "entities/lion.xml": b"<lion/>",
+        "ui/Main.xml": b"<main/>",
+        "shared/same.dds": b"same",
+        "only/a.txt": b"a",
+    })
+    make_archive(folder / "b.z2f", {
+        "entities/lion.xml": b"<lion version='2'/>",
+        "UI/main.xml": b"<main/>",
+        "only/b.txt": b"b",
+    })
+    make_archive(folder / "c.z2f", {"shared/same.dds": b"same"})
+    (folder / "broken.z2f").write_bytes(b"not a zip")
+
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    ensure_catalog_schema(cursor, conn)
+    ensure_archive_schema(cursor, conn)
+    ModCatalog(cursor, conn).refresh("ZT2", [(str(folder), LOCATION_ENABLED)], ".z2f")
+    index = ArchiveIndex(cursor, conn)
+    assert index.update("ZT2", HashEngine(workers=2)) == 4
+    return index, folder
+
+
+def kinds(overlaps):
+    return {mod: sorted((o.path, o.kind) for o in found)
+            for mod, found in overlaps.items()}
+
+
+def test_update_indexes_each_archive_once(indexed):
+    index, _ = indexed
+    assert index.pending("ZT2") == 0
+    assert index.update("ZT2") == 0
+    assert index.entries("ZT2", "broken.z2f") is None
+    assert [e.original_path for e in index.entries("ZT2", "c.z2f")] == ["shared/same.dds"]
+
+
+def test_overlaps_for_classifies_each_shared_path(indexed):
+    index, _ = indexed
+    assert kinds(index.overlaps_for("ZT2", "a.z2f")) == {
+        "b.z2f": [("entities/lion.xml", CONFLICT_DIFFERENT),
+                  ("ui/main.xml", CONFLICT_CASE_ONLY)],
+        "c.z2f": [("shared/same.dds", CONFLICT_IDENTICAL)],
+    }
+    assert kinds(index.overlaps_for("ZT2", "c.z2f")) == {
+        "a.z2f": [("shared/same.dds", CONFLICT_IDENTICAL)],
+    }
+
+
+def test_overlaps_for_joins_the_enabled_flag(indexed):
+    index, _ = indexed
+    index.cursor.execute("CREATE TABLE mods (name TEXT PRIMARY KEY, enabled INTEGER)")
+    index.cursor.executemany("INSERT INTO mods VALUES (?, ?)",
+                             [("a.z2f", 1), ("b.z2f", 0)])
+    found = index.overlaps_for("ZT2", "a.z2f", table="mods")
+    assert list(found) == ["b.z2f"]
+    assert {o.enabled for o in found["b.z2f"]} == {0}
+
+
+def test_overlaps_of_an_uninstalled_archive(indexed, tmp_path):
+    index, _ = indexed
+    entries = read_archive_entries(make_archive(tmp_path / "new.z2f", {
+        "Shared/Same.dds": b"same", "only/new.txt": b"n"}))
+    assert kinds(index.overlaps("ZT2", entries, exclude=["c.z2f"])) == {
+        "a.z2f": [("shared/same.dds", CONFLICT_CASE_ONLY)],
+    }
+
+
+def test_classify_copies():
+    assert classify_copies([("a/B.xml", 1, 2), ("a\\B.xml", 1, 2)]) == CONFLICT_IDENTICAL
+    assert classify_copies([("a/b.xml", 1, 2), ("A/B.xml", 1, 2)]) == CONFLICT_CASE_ONLY
+    assert classify_copies([("a/b.xml", 1, 2), ("A/B.xml", 1, 3)]) == CONFLICT_DIFFERENT
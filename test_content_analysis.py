@@ -0,0 +1,124 @@
+import io
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from modules.content_analysis import classify_entity, classify_entity_bytes
+
+
+def baseline_extract_entity_info(root_elem, filename):
+    """extract_entity_info as modzt.py had it before the streaming parser."""
+    info = {
+        "filename": filename,
+        "name": None,
+        "codename": None,
+        "type": None,
+        "category": "other",
+        "description": None
+    }
+
+    root_tag = root_elem.tag.lower() if root_elem.tag else ""
+
+    for tag, category, type_name in (
+            ("BFAIType", "animals", "Animal"),
+            ("BFBuildingType", "buildings", "Building"),
+            ("BFSceneryType", "scenery", "Scenery"),
+            ("BFFenceType", "fences", "Fence"),
+            ("BFPathType", "paths", "Path"),
+            ("BFFoliageType", "foliage", "Foliage"),
+            ("BFGuestType", "guests", "Guest"),
+            ("BFStaffType", "staff", "Staff"),
+            ("BFUnitType", "objects", "Object")):
+        if root_tag == tag.lower() or root_elem.find(f".//{tag}") is not None:
+            info["category"] = category
+            info["type"] = type_name
+            break
+    else:
+        path_lower = filename.lower()
+        for folder, category, type_name in (
+                ("animals", "animals", "Animal"),
+                ("buildings", "buildings", "Building"),
+                ("scenery", "scenery", "Scenery"),
+                ("foliage", "foliage", "Foliage"),
+                ("fences", "fences", "Fence"),
+                ("paths", "paths", "Path")):
+            if f"/{folder}/" in path_lower or f"\\{folder}\\" in path_lower:
+                info["category"] = category
+                info["type"] = type_name
+                break
+        else:
+            return None
+
+    for tag in ["codename", "Codename", "cCodename", "ccodename"]:
+        elem = root_elem.find(f".//{tag}")
+        if elem is not None and elem.text:
+            info["codename"] = elem.text.strip()
+            break
+
+    if not info["codename"]:
+        type_attr = root_elem.get("Type") or root_elem.get("type")
+        if type_attr:
+            info["codename"] = type_attr
+        else:
+            base = os.path.basename(filename)
+            info["codename"] = os.path.splitext(base)[0]
+
+    for tag in ["cIconName", "ciconname", "IconName", "Name", "name", "cName"]:
+        elem = root_elem.find(f".//{tag}")
+        if elem is not None and elem.text:
+            info["name"] = elem.text.strip()
+            break
+
+    if not info["name"]:
+        info["name"] = info["codename"]
+
+    for tag in ["cDescription", "Description", "description"]:
+        elem = root_elem.find(f".//{tag}")
+        if elem is not None and elem.text:
+            info["description"] = elem.text.strip()
+            break
+
+    return info
+
+
+SAMPLES = [
+    ("entities/a.xml", "<e><BFUnitType/><BFAIType/><x/><cCodename>gor</cCodename></e>"),
+    ("entities/a.xml", "<e><BFAIType/><codename>gor</codename><cIconName>G</cIconName></e>"),
+    ("entities/a.xml", "<e><BFSceneryType/><cIconName>I</cIconName></e>"),
+    ("entities/a.xml", "<BFAIType><cName>Lion</cName><codename>lion</codename></BFAIType>"),
+    ("entities/a.xml", "<e><BFAIType><cIconName/><Name>Late</Name></BFAIType>"
+                       "<cIconName>Early?</cIconName></e>"),
+    ("entities/a.xml", "<e><cIconName></cIconName><cIconName>second</cIconName>"
+                       "<name>n</name><BFAIType/></e>"),
+    ("entities/a.xml", "<e Type='fromattr'><BFFenceType><cDescription> d </cDescription>"
+                       "</BFFenceType></e>"),
+    ("entities/a.xml", "<e><BFStaffType/><BFGuestType/><Description>x</Description></e>"),
+    ("entities/a.xml", "<bfbuildingtype><BFPathType/><codename> spaced </codename>"
+                       "</bfbuildingtype>"),
+    ("entities/animals/b/b.xml", "<e><cName>Bear</cName></e>"),
+    ("entities\\paths\\p.xml", "<e/>"),
+    ("entities/misc/q.xml", "<e><cName>nothing</cName></e>"),
+    ("entities/a.xml", "<e><deep><deeper><BFFoliageType/><ccodename>f</ccodename>"
+                       "</deeper></deep><Codename>g</Codename></e>"),
+]
+
+
+@pytest.mark.parametrize("filename, xml", SAMPLES)
+def test_classify_entity_matches_baseline(filename, xml):
+    expected = baseline_extract_entity_info(ET.fromstring(xml), filename)
+    assert classify_entity(io.BytesIO(xml.encode()), filename) == expected
+
+
+def test_classify_entity_stops_once_settled():
+    # Everything is settled before the malformed tail is reached.
+    xml = (b"<e><codename>c</codename><cIconName>n</cIconName>"
+           b"<cDescription>d</cDescription><BFAIType/><broken")
+    info = classify_entity(io.BytesIO(xml), "a.xml")
+    assert (info["type"], info["codename"], info["name"]) == ("Animal", "c", "n")
+
+
+def test_classify_entity_bytes_drops_bom_and_declaration():
+    data = "﻿<?xml version='1.0' encoding='latin-1'?><BFAIType><cName>é</cName></BFAIType>"
+    info = classify_entity_bytes(data.encode("utf-8"), "a.xml")
+    assert info["name"] == "é"
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import zipfile
+
+from modules.archive_index import ArchiveIndex, ensure_archive_schema
+from modules.load_order import LoadOrderResolver, ensure_load_order_schema
+from modules.mod_catalog import (LOCATION_DISABLED, LOCATION_ENABLED, ModCatalog,
+                                 ensure_catalog_schema)
+
+
+def make_archive(path, members):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+
+
+class Game:
+    """A mods folder, a disabled folder and the index built over them."""
+
+    def __init__(self, tmp_path):
+        self.enabled = tmp_path / "mods"
+        self.disabled = tmp_path / "disabled"
+        self.enabled.mkdir()
+        self.disabled.mkdir()
+        self.conn = sqlite3.connect(":memory:")
+        self.cursor = self.conn.cursor()
+        ensure_catalog_schema(self.cursor, self.conn)
+        ensure_archive_schema(self.cursor, self.conn)
+        ensure_load_order_schema(self.cursor, self.conn)
+        self.resolver = LoadOrderResolver(self.cursor, self.conn)
+
+    def refresh(self) -> int:
+        ModCatalog(self.cursor, self.conn).refresh(
+            "ZT2", [(str(self.enabled), LOCATION_ENABLED),
+                    (str(self.disabled), LOCATION_DISABLED)], ".z2f")
+        ArchiveIndex(self.cursor, self.conn).update("ZT2")
+        return self.resolver.sync("ZT2")
+
+    def winners(self):
+        self.cursor.execute(
+            "SELECT path, mod, copies FROM load_order_winners WHERE game='ZT2' "
+            "ORDER BY path")
+        return self.cursor.fetchall()
+
+    def rebuilt_winners(self):
+        self.cursor.execute("DELETE FROM load_order_members")
+        self.cursor.execute("DELETE FROM load_order_winners")
+        self.resolver.sync("ZT2")
+        return self.winners()
+
+
+def test_later_archive_wins_ignoring_case(tmp_path):
+    game = Game(tmp_path)
+    make_archive(game.enabled / "a.z2f", {"ui/main.xml": b"a", "only/a.txt": b"a"})
+    make_archive(game.enabled / "B.z2f", {"UI/Main.xml": b"b"})
+    make_archive(game.enabled / "c.z2f", {"ui/main.xml": b"c", "ui/MAIN.xml": b"c"})
+    assert game.refresh() == 2
+    assert game.winners() == [("only/a.txt", "a.z2f", 1), ("ui/main.xml", "c.z2f", 3)]
+    [resolution] = game.resolver.resolve("ZT2", ["UI\\Main.xml"])
+    assert (resolution.winner, resolution.shadowed) == ("c.z2f", ["B.z2f", "a.z2f"])
+    assert game.resolver.summary("ZT2") == {
+        "a.z2f": (0, 1), "B.z2f": (0, 1), "c.z2f": (1, 0)}
+    assert game.resolver.sync("ZT2") == 0
+
+
+def test_sync_resolves_only_the_toggled_archive(tmp_path):
+    game = Game(tmp_path)
+    make_archive(game.enabled / "a.z2f", {"ui/main.xml": b"a", "only/a.txt": b"a"})
+    make_archive(game.enabled / "b.z2f", {"ui/main.xml": b"b", "only/b.txt": b"b"})
+    make_archive(game.enabled / "c.z2f", {"other/c.txt": b"c"})
+    game.refresh()
+
+    os.rename(game.enabled / "b.z2f", game.disabled / "b.z2f")
+    assert game.refresh() == 2
+    assert game.resolver.winner("ZT2", "UI/Main.xml") == ("a.z2f", "ui/main.xml")
+    assert game.resolver.winner("ZT2", "only/b.txt") is None
+    assert game.winners() == game.rebuilt_winners()
+
+    os.rename(game.disabled / "b.z2f", game.enabled / "b.z2f")
+    assert game.refresh() == 2
+    assert game.resolver.winner("ZT2", "ui/main.xml") == ("b.z2f", "ui/main.xml")
+    assert game.winners() == game.rebuilt_winners()
+
+
+def test_sync_picks_up_a_changed_archive(tmp_path):
+    game = Game(tmp_path)
+    make_archive(game.enabled / "a.z2f", {"ui/main.xml": b"a"})
+    make_archive(game.enabled / "b.z2f", {"ui/main.xml": b"b"})
+    game.refresh()
+
+    path = game.enabled / "b.z2f"
+    make_archive(path, {"ui/other.xml": b"b"})
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    game.refresh()
+    assert game.winners() == [("ui/main.xml", "a.z2f", 1), ("ui/other.xml", "b.z2f", 1)]
+    assert game.winners() == game.rebuilt_winners()
@@ -0,0 +1,90 @@
+import os
+import sqlite3
+
+from modules.hash_engine import sample_hash
+from modules.mod_catalog import (LOCATION_DISABLED, LOCATION_ENABLED, CatalogEntry,
+                                 ModCatalog, diff_scans, ensure_catalog_schema,
+                                 match_renames)
+
+
+def entry(name, location=LOCATION_ENABLED, size=10, mtime_ns=1, inode=None,
+          device=None, hash=None, sample=None, path=None):
+    return CatalogEntry(name, location, path or f"/mods/{name}", size, mtime_ns,
+                        inode, device, hash, sample)
+
+
+def test_diff_scans_sorts_every_kind_of_change():
+    old = {
+        "same.z2f": entry("same.z2f"),
+        "moved.z2f": entry("moved.z2f"),
+        "changed.z2f": entry("changed.z2f"),
+        "gone.z2f": entry("gone.z2f"),
+        "old_name.z2f": entry("old_name.z2f"),
+    }
+    renamed = entry("new_name.z2f")
+    new = {
+        "same.z2f": entry("same.z2f"),
+        "moved.z2f": entry("moved.z2f", LOCATION_DISABLED),
+        "changed.z2f": entry("changed.z2f", mtime_ns=2),
+        "added.z2f": entry("added.z2f"),
+        "new_name.z2f": renamed,
+    }
+    diff = diff_scans(old, new, {"old_name.z2f": renamed})
+    assert [e.name for e in diff.added] == ["added.z2f"]
+    assert diff.removed == ["gone.z2f"]
+    assert [e.name for e in diff.moved] == ["moved.z2f"]
+    assert [e.name for e in diff.changed] == ["changed.z2f"]
+    assert diff.renamed == [("old_name.z2f", renamed)]
+    assert not diff.empty
+    assert diff_scans(old, old).empty
+
+
+def test_match_renames_by_inode_keeps_hashes():
+    vanished = {"a.z2f": entry("a.z2f", inode=7, device=1, hash="h", sample="s")}
+    appeared = entry("b.z2f", inode=7, device=1)
+    renames = match_renames(vanished, [appeared, entry("c.z2f", inode=8, device=1)])
+    assert list(renames) == ["a.z2f"]
+    assert renames["a.z2f"].name == "b.z2f"
+    assert (renames["a.z2f"].hash, renames["a.z2f"].sample_hash) == ("h", "s")
+
+
+def test_match_renames_by_sample_hash(tmp_path):
+    data = os.urandom(4096)
+    path = tmp_path / "b.z2f"
+    path.write_bytes(data)
+    sample = sample_hash(str(path), len(data))
+    vanished = {
+        "a.z2f": entry("a.z2f", size=len(data), hash="h", sample=sample),
+        "other.z2f": entry("other.z2f", size=len(data), sample="different"),
+    }
+    appeared = entry("b.z2f", size=len(data), path=str(path))
+    renames = match_renames(vanished, [appeared])
+    assert renames == {"a.z2f": appeared._replace(hash="h", sample_hash=sample)}
+    # A size no vanished entry has is never hashed or matched.
+    assert match_renames(vanished, [appeared._replace(size=1)]) == {}
+
+
+def test_refresh_follows_a_renamed_file(tmp_path):
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    ensure_catalog_schema(cursor, conn)
+    catalog = ModCatalog(cursor, conn)
+    folder = tmp_path / "mods"
+    folder.mkdir()
+    (folder / "a.z2f").write_bytes(b"x" * 100)
+    (folder / "readme.txt").write_bytes(b"not a mod")
+    folders = [(str(folder), LOCATION_ENABLED)]
+
+    snapshot, diff = catalog.refresh("ZT2", folders, ".z2f")
+    assert list(snapshot) == ["a.z2f"]
+    assert [e.name for e in diff.added] == ["a.z2f"]
+    catalog.set_hashes("ZT2", {"a.z2f": "full"})
+
+    os.rename(folder / "a.z2f", folder / "b.z2f")
+    snapshot, diff = catalog.refresh("ZT2", folders, ".z2f")
+    assert list(snapshot) == ["b.z2f"]
+    assert [(old, new.name) for old, new in diff.renamed] == [("a.z2f", "b.z2f")]
+    assert not diff.added and not diff.removed
+    assert catalog.snapshot("ZT2")["b.z2f"].hash == "full"
+
+    assert catalog.refresh("ZT2", folders, ".z2f")[1].empty
@@ -0,0 +1,58 @@
+import zipfile
+
+import pytest
+
+import z2f_parser
+from z2f_parser import UIThemeExtractor, copy_raw_members
+
+MEMBERS = {
+    "ui/main.xml": b"<ui>" + b"x" * 5000 + b"</ui>",
+    "ui/icons/a.dds": bytes(range(256)) * 40,
+    "scenery/rock.xml": b"<rock/>",
+    "ui/empty.txt": b"",
+}
+
+
+def make_archive(path, members, compression=zipfile.ZIP_DEFLATED):
+    with zipfile.ZipFile(path, "w", compression) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return path
+
+
+@pytest.mark.parametrize("raw", [True, False])
+def test_copy_raw_members_round_trip(tmp_path, monkeypatch, raw):
+    if not raw:
+        monkeypatch.setattr(z2f_parser, "_can_copy_raw", lambda out: False)
+    deflated = make_archive(tmp_path / "a.z2f", MEMBERS)
+    stored = make_archive(tmp_path / "b.z2f", {"ui/stored.bin": b"s" * 300},
+                          zipfile.ZIP_STORED)
+    out_path = tmp_path / "out.z2f"
+    with zipfile.ZipFile(deflated) as za, zipfile.ZipFile(stored) as zb:
+        with zipfile.ZipFile(out_path, "w") as out:
+            copy_raw_members(out, za, [i for i in za.infolist()
+                                       if i.filename.startswith("ui/")])
+            copy_raw_members(out, zb, zb.infolist())
+            out.writestr("ui/added.txt", b"after the raw copy")
+
+    with zipfile.ZipFile(out_path) as out:
+        assert out.testzip() is None
+        expected = {n: d for n, d in MEMBERS.items() if n.startswith("ui/")}
+        expected["ui/stored.bin"] = b"s" * 300
+        expected["ui/added.txt"] = b"after the raw copy"
+        assert {i.filename: out.read(i) for i in out.infolist()} == expected
+        assert out.getinfo("ui/main.xml").compress_type == zipfile.ZIP_DEFLATED
+        assert out.getinfo("ui/stored.bin").compress_type == zipfile.ZIP_STORED
+
+
+def test_compare_ui_versions_keeps_member_names(tmp_path):
+    first = make_archive(tmp_path / "a.z2f", {
+        "UI/Main.xml": b"a", "UI/Only1.png": b"x", "ui/same.txt": b"s"})
+    second = make_archive(tmp_path / "b.z2f", {
+        "ui/main.xml": b"b", "UI\\Only2.png": b"x", "UI/Same.txt": b"s"})
+    result = UIThemeExtractor.compare_ui_versions(str(first), str(second))
+    assert result["only_in_first"] == ["UI/Only1.png"]
+    assert result["only_in_second"] == ["UI\\Only2.png"]
+    assert sorted(result["common_files"]) == ["UI/Main.xml", "ui/same.txt"]
+    assert result["changed_files"] == ["UI/Main.xml"]
+    assert not result["identical"]
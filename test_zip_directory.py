@@ -0,0 +1,81 @@
+import zipfile
+
+import pytest
+
+from modules.zip_directory import read_central_directory
+
+MEMBERS = {
+    "UI/Main.xml": b"<ui>" + b"x" * 3000 + b"</ui>",
+    "ui/icons/": b"",
+    "ui/icons/a.dds": bytes(range(256)) * 20,
+    "entities/lion.xml": b"<lion/>",
+    "naïve/é.txt": b"utf-8 name",
+}
+
+
+def make_archive(path, members=MEMBERS):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return str(path)
+
+
+def assert_matches_zipfile(path):
+    directory = read_central_directory(path)
+    assert directory is not None
+    with zipfile.ZipFile(path) as zf:
+        infos = zf.infolist()
+    assert directory.names() == [i.filename for i in infos]
+    assert [directory.is_dir(i) for i in range(len(directory))] == [
+        i.is_dir() for i in infos]
+    assert list(directory.sizes) == [i.file_size for i in infos]
+    assert list(directory.compressed_sizes) == [i.compress_size for i in infos]
+    assert list(directory.crcs) == [i.CRC for i in infos]
+    assert list(directory.methods) == [i.compress_type for i in infos]
+    assert list(directory.offsets) == [i.header_offset for i in infos]
+    return directory
+
+
+def test_matches_zipfile(tmp_path):
+    directory = assert_matches_zipfile(make_archive(tmp_path / "a.z2f"))
+    assert [directory.name(i) for i in directory.files()] == [
+        n for n in MEMBERS if not n.endswith("/")]
+    assert [directory.name(i) for i in directory.startswith("ui/")] == [
+        "UI/Main.xml", "ui/icons/", "ui/icons/a.dds"]
+    assert [directory.name(i) for i in directory.find("ICONS\\a")] == ["ui/icons/a.dds"]
+
+
+def test_prepended_data_shifts_offsets(tmp_path):
+    path = tmp_path / "stub.z2f"
+    path.write_bytes(b"MZ" + b"\0" * 510 + open(make_archive(tmp_path / "a.z2f"), "rb").read())
+    directory = assert_matches_zipfile(str(path))
+    assert directory.offsets[0] == 512
+
+
+def test_zip64_records(tmp_path, monkeypatch):
+    # Lowering the limits makes zipfile write ZIP64 end records and ZIP64
+    # extra fields without needing a 4 GB file or 65,536 members.
+    path = tmp_path / "zip64.z2f"
+    with monkeypatch.context() as m:
+        m.setattr(zipfile, "ZIP64_LIMIT", 100)
+        m.setattr(zipfile, "ZIP_FILECOUNT_LIMIT", 2)
+        make_archive(path)
+    data = path.read_bytes()
+    assert b"PK\x06\x06" in data and b"PK\x06\x07" in data
+    assert_matches_zipfile(str(path))
+
+
+@pytest.mark.parametrize("content", [b"", b"not a zip at all", b"PK\x05\x06" + b"\xff" * 18])
+def test_not_a_zip(tmp_path, content):
+    path = tmp_path / "bad.z2f"
+    path.write_bytes(content)
+    assert read_central_directory(str(path)) is None
+
+
+def test_truncated_archive(tmp_path):
+    path = make_archive(tmp_path / "a.z2f")
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:len(data) // 2] + data[-22:])
+    assert read_central_directory(path) is None
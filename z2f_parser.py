@@ -1,51 +1,257 @@
+import copy
+import functools
 import os
+import re
 import zipfile
 import json
 import shutil
 import tempfile
-from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+import threading
+from collections import OrderedDict
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from modules.zip_directory import CentralDirectory, read_central_directory
+
+
+class _Handle:
+    __slots__ = ("zf", "refs", "retired")
+
+    def __init__(self, zf: zipfile.ZipFile):
+        self.zf = zf
+        self.refs = 0
+        self.retired = False
+
+
+class _HandleCache:
+    """Small LRU of open archives keyed by path, mtime and size.
+
+    A handle stays open while any parser holds it; evicted handles are
+    closed once their last holder lets go. A changed file gets a new key,
+    so a stale central directory is never served.
+    """
+
+    def __init__(self, size: int = 8):
+        self.size = size
+        self._lock = threading.Lock()
+        self._open: "OrderedDict[tuple, _Handle]" = OrderedDict()
+
+    @staticmethod
+    def _key(path: str) -> tuple:
+        st = os.stat(path)
+        return (os.path.normcase(os.path.abspath(path)), st.st_mtime_ns, st.st_size)
+
+    def acquire(self, path: str) -> _Handle:
+        key = self._key(path)
+        with self._lock:
+            handle = self._open.get(key)
+            if handle is not None:
+                self._open.move_to_end(key)
+                handle.refs += 1
+                return handle
+        zf = zipfile.ZipFile(path, 'r')
+        with self._lock:
+            handle = self._open.get(key)
+            if handle is not None:
+                zf.close()
+            else:
+                handle = self._open[key] = _Handle(zf)
+            handle.refs += 1
+            self._evict()
+            return handle
+
+    def release(self, handle: _Handle):
+        with self._lock:
+            handle.refs -= 1
+            if handle.refs <= 0 and handle.retired:
+                handle.zf.close()
+            else:
+                self._evict()
+
+    def invalidate(self, path: str):
+        """Close every handle on path, e.g. before the file is replaced."""
+        name = os.path.normcase(os.path.abspath(path))
+        with self._lock:
+            for key in [k for k in self._open if k[0] == name]:
+                self._retire(key)
+
+    def _retire(self, key: tuple):
+        handle = self._open.pop(key)
+        handle.retired = True
+        if handle.refs <= 0:
+            handle.zf.close()
+
+    def _evict(self):
+        idle = [k for k, handle in self._open.items() if handle.refs <= 0]
+        while len(self._open) > self.size and idle:
+            self._retire(idle.pop(0))
+
+
+_handles = _HandleCache()
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_directory(key: tuple) -> Optional[CentralDirectory]:
+    # Same key as the handle cache, so an edited file is parsed afresh.
+    return read_central_directory(key[0])
+
+COPY_CHUNK = 1024 * 1024
+
+
+def _member_ends(zf: zipfile.ZipFile) -> Dict[int, int]:
+    """header_offset -> offset where that member's stored bytes end.
+
+    A member runs up to the next local header (or the central directory),
+    which covers its local header, compressed data and data descriptor.
+    """
+    starts = sorted({info.header_offset for info in zf.infolist()})
+    return dict(zip(starts, starts[1:] + [zf.start_dir]))
+
+
+# ZipFile internals copy_raw_members writes through. They are private but
+# unchanged from Python 3.8 to 3.13; if a release drops any of them, members
+# are copied through the public read/writestr API instead.
+_RAW_COPY_ATTRS = ("fp", "filelist", "NameToInfo", "start_dir", "_didModify")
+
+
+def _can_copy_raw(out: zipfile.ZipFile) -> bool:
+    return (all(hasattr(out, attr) for attr in _RAW_COPY_ATTRS)
+            and out.fp is not None and out.fp.seekable()
+            and not getattr(out, "_writing", False))
+
+
+def copy_raw_members(out: zipfile.ZipFile, zf: zipfile.ZipFile,
+                     infos: List[zipfile.ZipInfo]):
+    """Append members of zf to out by copying their stored bytes verbatim.
+
+    Nothing is decompressed or recompressed; only the offsets recorded in
+    the new central directory change.
+    """
+    if not _can_copy_raw(out):
+        for info in infos:
+            out.writestr(copy.copy(info), zf.read(info))
+        return
+    ends = _member_ends(zf)
+    with open(zf.filename, 'rb') as src:
+        for info in infos:
+            start = info.header_offset
+            remaining = ends[start] - start
+            copied = copy.copy(info)
+            copied.header_offset = out.fp.tell()
+            src.seek(start)
+            while remaining > 0:
+                chunk = src.read(min(COPY_CHUNK, remaining))
+                if not chunk:
+                    raise zipfile.BadZipFile(f"Truncated member {info.filename}")
+                out.fp.write(chunk)
+                remaining -= len(chunk)
+            out.filelist.append(copied)
+            out.NameToInfo[copied.filename] = copied
+    out.start_dir = out.fp.tell()
+    out._didModify = True
+
+
+def _swap_in(temp_path: str, path: str, backup_path: Optional[str] = None):
+    """Move temp_path over path, keeping the old file as backup_path.
+
+    The backup is a hard link to the old file, so nothing is copied; where
+    links are not supported the old file is renamed instead.
+    """
+    if backup_path:
+        if os.path.exists(backup_path):
+            os.remove(backup_path)
+        try:
+            os.link(path, backup_path)
+        except OSError:
+            os.replace(path, backup_path)
+    os.replace(temp_path, path)
 
 
 class Z2FParser:
+    """Read access to one z2f archive, opened at most once.
+
+    Use it as a context manager (or call close()) to give the handle back
+    to the shared cache; parsers for the same unchanged file share one
+    open ZipFile. Listings come from a cached CentralDirectory, so a
+    parser that only lists members never builds a ZipFile at all.
+    """
     
     def __init__(self, file_path: str):
         self.file_path = file_path
-        self.is_valid = self._validate_file()
-        
-    def _validate_file(self) -> bool:
-        """Check if file exists and is a valid zip"""
-        if not os.path.exists(self.file_path):
-            return False
+        self._handle: Optional[_Handle] = None
+        self._directory: Optional[CentralDirectory] = None
+        self._failed = False
 
-        if not zipfile.is_zipfile(self.file_path):
-            return False
+    def __enter__(self) -> "Z2FParser":
+        return self
 
-        try:
-            with zipfile.ZipFile(self.file_path, 'r') as zf:
-                _ = zf.namelist()
-            return True
-        except (zipfile.BadZipFile, Exception):
-            return False
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._handle is not None:
+            _handles.release(self._handle)
+            self._handle = None
+
+    def _zip(self) -> Optional[zipfile.ZipFile]:
+        if self._handle is None and not self._failed:
+            try:
+                self._handle = _handles.acquire(self.file_path)
+            except (OSError, zipfile.BadZipFile, ValueError):
+                self._failed = True
+        return self._handle.zf if self._handle else None
+
+    def directory(self) -> Optional[CentralDirectory]:
+        """Member table of the archive, or None if it is not a readable zip."""
+        if self._directory is None and not self._failed:
+            try:
+                self._directory = _cached_directory(_HandleCache._key(self.file_path))
+            except OSError:
+                pass
+            if self._directory is None:
+                self._failed = True
+        return self._directory
+
+    @property
+    def is_valid(self) -> bool:
+        """True if the file exists and is a readable zip"""
+        return self.directory() is not None
+
+    def namelist(self) -> List[str]:
+        directory = self.directory()
+        return directory.names() if directory is not None else []
+
+    def iter_members(self, prefix: str = "") -> Iterator[zipfile.ZipInfo]:
+        """Yield file members whose lower-cased name starts with prefix."""
+        zf = self._zip()
+        if zf is None:
+            return
+        prefix = prefix.lower()
+        for info in zf.infolist():
+            if not info.is_dir() and info.filename.lower().startswith(prefix):
+                yield info
+
+    def open_member(self, name) -> IO[bytes]:
+        """Stream one member without reading it into memory."""
+        zf = self._zip()
+        if zf is None:
+            raise FileNotFoundError(self.file_path)
+        return zf.open(name)
+
+    def read_member(self, name) -> bytes:
+        with self.open_member(name) as f:
+            return f.read()
     
-    def get_ui_contents(self) -> Optional[Dict[str, str]]:
+    def get_ui_contents(self) -> Optional[Dict[str, bytes]]:
         if not self.is_valid:
             return None
         
         ui_contents: Dict[str, bytes] = {}
         try:
-            with zipfile.ZipFile(self.file_path, 'r') as zf:
-            ui_files = [f for f in zf.namelist() if f.lower().startswith('ui/')]
-                
-                if not ui_files:
-                    return None
-                
-                for file_path in ui_files:
-                    if not file_path.endswith('/'):
-                        try:
-                            ui_contents[file_path] = zf.read(file_path)
-                        except Exception:
-                            pass
+            for info in self.iter_members('ui/'):
+                try:
+                    ui_contents[info.filename] = self.read_member(info)
+                except Exception:
+                    pass
             
             return ui_contents if ui_contents else None
         except Exception as e:
@@ -53,16 +259,20 @@ class Z2FParser:
             return None
     
     def list_ui_files(self) -> List[str]:
-        if not self.is_valid:
+        directory = self.directory()
+        if directory is None:
             return []
         
-        try:
-            with zipfile.ZipFile(self.file_path, 'r') as zf:
-                ui_files = [f for f in zf.namelist() if f.lower().startswith('ui/') and not f.endswith('/')]
-                return ui_files
-        except Exception as e:
-            print(f"Error listing z2f files: {e}")
-            return []
+        return [directory.name(i) for i in directory.startswith('ui/')
+                if not directory.is_dir(i)]
+    
+    def ui_crcs(self) -> Dict[str, int]:
+        """UI member name -> CRC32, from the central directory."""
+        directory = self.directory()
+        if directory is None:
+            return {}
+        return {directory.name(i): directory.crcs[i]
+                for i in directory.startswith('ui/') if not directory.is_dir(i)}
     
     def extract_ui_to_directory(self, output_dir: str) -> bool:
         if not self.is_valid:
@@ -71,29 +281,34 @@ class Z2FParser:
         try:
             os.makedirs(output_dir, exist_ok=True)
             
-            with zipfile.ZipFile(self.file_path, 'r') as zf:
-                for file_path in zf.namelist():
-                    if (file_path.startswith('UI/') or file_path.startswith('ui/')) and not file_path.endswith('/'):
-                        extracted = zf.extract(file_path, output_dir)
+            zf = self._zip()
+            for file_path in self.namelist():
+                if (file_path.startswith('UI/') or file_path.startswith('ui/')) and not file_path.endswith('/'):
+                    zf.extract(file_path, output_dir)
             
             return True
         except Exception as e:
             print(f"Error extracting UI from z2f: {e}")
             return False
     
+    def iter_contents(self) -> Iterator[Tuple[str, IO[bytes]]]:
+        """Yield (name, stream) for every file member, one at a time."""
+        for info in self.iter_members():
+            with self.open_member(info) as f:
+                yield info.filename, f
+    
     def get_all_contents_flat(self) -> Optional[Dict[str, bytes]]:
+        """Read every file member into memory; iter_contents streams instead."""
         if not self.is_valid:
             return None
         
         contents = {}
         try:
-            with zipfile.ZipFile(self.file_path, 'r') as zf:
-                for file_info in zf.infolist():
-                    if not file_info.is_dir():
-                        try:
-                            contents[file_info.filename] = zf.read(file_info.filename)
-                        except Exception:
-                            pass
+            for name, f in self.iter_contents():
+                try:
+                    contents[name] = f.read()
+                except Exception:
+                    pass
             return contents
         except Exception as e:
             print(f"Error reading all z2f contents: {e}")
@@ -103,37 +318,38 @@ class Z2FParser:
         if not self.is_valid:
             return False
         
-        source_parser = Z2FParser(source_archive)
-        if not source_parser.is_valid:
-            return False
-        
+        with Z2FParser(source_archive) as source_parser:
+            if not source_parser.is_valid:
+                return False
+            return self._replace_ui_from(source_parser)
+
+    def _replace_ui_from(self, source_parser: "Z2FParser") -> bool:
+        temp_path = None
         try:
-            temp_fd, temp_path = tempfile.mkstemp(suffix='.z2f')
+            # Same directory as the archive, so the final swap is a rename.
+            temp_fd, temp_path = tempfile.mkstemp(
+                suffix='.z2f', dir=os.path.dirname(os.path.abspath(self.file_path)))
             os.close(temp_fd)
             
-            with zipfile.ZipFile(self.file_path, 'r') as zf_source:
-                with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as zf_temp:
-                    for file_info in zf_source.infolist():
-                        if not (file_info.filename.startswith('UI/') or file_info.filename.startswith('ui/')):
-                            zf_temp.writestr(file_info, zf_source.read(file_info.filename))
+            zf_base = self._zip()
+            zf_theme = source_parser._zip()
+            keep = [i for i in zf_base.infolist()
+                    if not (i.filename.startswith('UI/') or i.filename.startswith('ui/'))]
+            ui = [i for i in source_parser.iter_members()
+                  if i.filename.startswith('UI/') or i.filename.startswith('ui/')]
+            with zipfile.ZipFile(temp_path, 'w') as zf_temp:
+                copy_raw_members(zf_temp, zf_base, keep)
+                copy_raw_members(zf_temp, zf_theme, ui)
             
-            with zipfile.ZipFile(source_archive, 'r') as zf_source:
-                with zipfile.ZipFile(temp_path, 'a') as zf_temp:
-                    for file_info in zf_source.infolist():
-                        if (file_info.filename.startswith('UI/') or file_info.filename.startswith('ui/')) and not file_info.is_dir():
-                            zf_temp.writestr(file_info, zf_source.read(file_info.filename))
-            
-            backup_path = self.file_path + '.backup'
-            if os.path.exists(backup_path):
-                os.remove(backup_path)
-            
-            shutil.copy2(self.file_path, backup_path)
-            shutil.move(temp_path, self.file_path)
+            # Windows cannot replace a file that is still open.
+            self.close()
+            _handles.invalidate(self.file_path)
+            _swap_in(temp_path, self.file_path, self.file_path + '.backup')
             
             return True
         except Exception as e:
             print(f"Error replacing UI in archive: {e}")
-            if os.path.exists(temp_path):
+            if temp_path and os.path.exists(temp_path):
                 try:
                     os.remove(temp_path)
                 except:
@@ -146,41 +362,126 @@ class Z2FParser:
             return False
         
         try:
-            shutil.copy2(backup_path, self.file_path)
+            self.close()
+            _handles.invalidate(self.file_path)
+            temp_path = self.file_path + '.restore'
+            try:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                os.link(backup_path, temp_path)
+            except OSError:
+                shutil.copy2(backup_path, temp_path)
+            _swap_in(temp_path, self.file_path)
             return True
         except Exception as e:
             print(f"Error restoring backup: {e}")
             return False
 
 
+OVERLAY_PREFIX = "zzz_modzt_ui_"
+
+
+def theme_slug(ui_name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', ui_name.lower()).strip('_') or "theme"
+
+
+def overlay_name(ui_name: str) -> str:
+    """File name of a theme's overlay; sorts after every base archive."""
+    return f"{OVERLAY_PREFIX}{theme_slug(ui_name)}.z2f"
+
+
+def _source_stamp(path: str) -> List[int]:
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+class ThemeIndex:
+    """JSON index of extracted UI themes.
+
+    Each record holds the theme name, the archive it came from (with its
+    mtime and size, so a changed source is re-extracted) and the CRC32 of
+    every UI member in the overlay.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.themes: Dict[str, dict] = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.themes = json.load(f)
+        except (OSError, ValueError):
+            self.themes = {}
+
+    def save(self):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.themes, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def get(self, slug: str) -> Optional[dict]:
+        return self.themes.get(slug)
+
+    def put(self, slug: str, record: dict):
+        self.themes[slug] = record
+        self.save()
+
+    def is_current(self, slug: str, source_archive: str) -> bool:
+        record = self.themes.get(slug)
+        if not record or record.get("source") != os.path.abspath(source_archive):
+            return False
+        try:
+            return record.get("source_stamp") == _source_stamp(source_archive)
+        except OSError:
+            return True
+
+    def find_source(self, archive: str) -> Optional[dict]:
+        """Record extracted from archive, if it is still unchanged."""
+        archive = os.path.abspath(archive)
+        for slug, record in self.themes.items():
+            if record.get("source") == archive and self.is_current(slug, archive):
+                return record
+        return None
+
+
 class UIManager:
+    """Switch UI themes through small overlay archives.
+
+    Each theme's UI/ folder is raw-copied once into UI_Themes as
+    zzz_modzt_ui_<slug>.z2f. The game loads archives in name order, so an
+    overlay moved into the game folder wins over x300/x302, and switching
+    themes only moves one small file. Base game archives are never written.
+    """
     
     def __init__(self, zt2_path: str):
         self.zt2_path = zt2_path
         self.ui_base_path = os.path.join(zt2_path, "UI")
         self.ui_backup_path = os.path.join(zt2_path, "UI_Backups")
+        self.themes_path = os.path.join(zt2_path, "UI_Themes")
         self.available_uis: Dict[str, str] = {}
         
         os.makedirs(self.ui_backup_path, exist_ok=True)
+        os.makedirs(self.themes_path, exist_ok=True)
+        self.index = ThemeIndex(os.path.join(self.themes_path, "index.json"))
         self._scan_available_uis()
     
     def _scan_available_uis(self):
         x300_path = os.path.join(self.zt2_path, "x300_000.z2f")
         
         if os.path.exists(x300_path):
-            parser = Z2FParser(x300_path)
-            if parser.is_valid:
-                ui_files = parser.list_ui_files()
-                if ui_files:
+            with Z2FParser(x300_path) as parser:
+                if parser.list_ui_files():
                     self.available_uis["Default"] = x300_path
+        
+        for record in self.index.themes.values():
+            self.available_uis.setdefault(record["name"], record["source"])
     
     def extract_ui_from_archive(self, archive_path: str, ui_name: str) -> bool:
-        parser = Z2FParser(archive_path)
-        if not parser.is_valid:
-            return False
-        
-        ui_theme_path = os.path.join(self.ui_base_path, ui_name)
-        success = parser.extract_ui_to_directory(ui_theme_path)
+        with Z2FParser(archive_path) as parser:
+            if not parser.is_valid:
+                return False
+            
+            ui_theme_path = os.path.join(self.ui_base_path, ui_name)
+            success = parser.extract_ui_to_directory(ui_theme_path)
         
         if success:
             self.available_uis[ui_name] = archive_path
@@ -218,27 +519,92 @@ class UIManager:
             print(f"Error restoring UI: {e}")
             return False
     
-    def switch_ui(self, ui_name: str, source_archive: str = None) -> bool:
-        if ui_name not in self.available_uis and not source_archive:
-            return False
-        
-        if source_archive is None:
-            source_archive = self.available_uis[ui_name]
+    def build_overlay(self, ui_name: str, source_archive: str) -> Optional[str]:
+        """Extract a theme into its overlay archive unless it is current.
+
+        Returns the overlay path in UI_Themes, or None on failure.
+        """
+        slug = theme_slug(ui_name)
+        overlay_path = os.path.join(self.themes_path, overlay_name(ui_name))
+        if self.index.is_current(slug, source_archive) and (
+                os.path.exists(overlay_path) or self.get_active_ui() == ui_name):
+            return overlay_path
         
-        x302_path = os.path.join(self.zt2_path, "x302_000.z2f")
+        temp_path = None
+        try:
+            with Z2FParser(source_archive) as parser:
+                members = list(parser.iter_members('ui/'))
+                if not members:
+                    return None
+                temp_fd, temp_path = tempfile.mkstemp(suffix='.z2f', dir=self.themes_path)
+                os.close(temp_fd)
+                with zipfile.ZipFile(temp_path, 'w') as zf_overlay:
+                    copy_raw_members(zf_overlay, parser._zip(), members)
+                crcs = parser.ui_crcs()
+            self._deactivate(slug)
+            _swap_in(temp_path, overlay_path)
+        except Exception as e:
+            print(f"Error building UI overlay: {e}")
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
         
-        if not os.path.exists(x302_path):
-            print(f"Error: x302_000.z2f not found at {x302_path}")
+        self.index.put(slug, {
+            "name": ui_name,
+            "source": os.path.abspath(source_archive),
+            "source_stamp": _source_stamp(source_archive),
+            "overlay": os.path.basename(overlay_path),
+            "entries": crcs,
+        })
+        self.available_uis[ui_name] = source_archive
+        return overlay_path
+    
+    def _active_overlays(self) -> List[str]:
+        try:
+            return [f for f in os.listdir(self.zt2_path)
+                    if f.lower().startswith(OVERLAY_PREFIX) and f.lower().endswith('.z2f')]
+        except OSError:
+            return []
+    
+    def _deactivate(self, slug: Optional[str] = None):
+        """Move active overlays (or just slug's) back into UI_Themes."""
+        for f in self._active_overlays():
+            if slug is None or f.lower() == f"{OVERLAY_PREFIX}{slug}.z2f":
+                path = os.path.join(self.zt2_path, f)
+                _handles.invalidate(path)
+                os.replace(path, os.path.join(self.themes_path, f))
+    
+    def get_active_ui(self) -> str:
+        for f in self._active_overlays():
+            slug = f[len(OVERLAY_PREFIX):-len('.z2f')].lower()
+            record = self.index.get(slug)
+            return record["name"] if record else slug
+        return "Default"
+    
+    def switch_ui(self, ui_name: str, source_archive: str = None) -> bool:
+        if ui_name not in self.available_uis and not source_archive:
             return False
         
-        parser = Z2FParser(x302_path)
-        if not parser.is_valid:
-            print("Error: x302_000.z2f is invalid or corrupted")
+        try:
+            if ui_name == "Default" and source_archive is None:
+                self._deactivate()
+                return True
+            
+            if source_archive is None:
+                source_archive = self.available_uis[ui_name]
+            
+            overlay_path = self.build_overlay(ui_name, source_archive)
+            if overlay_path is None:
+                return False
+            
+            self._deactivate()
+            if os.path.exists(overlay_path):
+                os.replace(overlay_path,
+                           os.path.join(self.zt2_path, os.path.basename(overlay_path)))
+            return True
+        except OSError as e:
+            print(f"Error switching UI: {e}")
             return False
-        
-        success = parser.replace_ui_folder(source_archive)
-        
-        return success
     
     def get_available_uis(self) -> List[str]:
         return list(self.available_uis.keys())
@@ -254,11 +620,8 @@ class UIManager:
                 for file in files:
                     if file.lower().endswith('.z2f'):
                         file_path = os.path.join(root, file)
-                        parser = Z2FParser(file_path)
-                        
-                        if parser.is_valid:
-                            ui_files = parser.list_ui_files()
-                            if ui_files:
+                        with Z2FParser(file_path) as parser:
+                            if parser.list_ui_files():
                                 ui_name = os.path.splitext(file)[0]
                                 uis[ui_name] = file_path
         except Exception as e:
@@ -271,30 +634,52 @@ class UIThemeExtractor:
     
     @staticmethod
     def extract_x300_ui(x300_path: str, output_dir: str) -> Optional[Dict[str, bytes]]:
-        parser = Z2FParser(x300_path)
-        if not parser.is_valid:
-            return None
-        
-        success = parser.extract_ui_to_directory(output_dir)
-        if success:
-            return parser.get_ui_contents()
+        with Z2FParser(x300_path) as parser:
+            if not parser.is_valid:
+                return None
+            
+            if parser.extract_ui_to_directory(output_dir):
+                return parser.get_ui_contents()
         
         return None
     
     @staticmethod
-    def compare_ui_versions(archive1: str, archive2: str) -> Dict[str, bool]:
-        parser1 = Z2FParser(archive1)
-        parser2 = Z2FParser(archive2)
-        
-        if not parser1.is_valid or not parser2.is_valid:
+    def _ui_crcs(archive: str, index: Optional[ThemeIndex]) -> Optional[Dict[str, int]]:
+        record = index.find_source(archive) if index else None
+        if record is not None:
+            return record["entries"]
+        with Z2FParser(archive) as parser:
+            if not parser.is_valid:
+                return None
+            return parser.ui_crcs()
+    
+    @staticmethod
+    def compare_ui_versions(archive1: str, archive2: str,
+                            index: Optional[ThemeIndex] = None) -> Dict[str, bool]:
+        """Compare the UI members of two archives by name and CRC32.
+
+        Archives already extracted as themes are answered from the index;
+        others are read from their central directory only.
+        """
+        crcs1 = UIThemeExtractor._ui_crcs(archive1, index)
+        crcs2 = UIThemeExtractor._ui_crcs(archive2, index)
+        if crcs1 is None or crcs2 is None:
             return {"error": "Invalid archive"}
         
-        files1 = set(parser1.list_ui_files())
-        files2 = set(parser2.list_ui_files())
+        # Match members case- and separator-insensitively, but report them
+        # under the names the archives use.
+        names1 = {f.replace('\\', '/').lower(): f for f in crcs1}
+        names2 = {f.replace('\\', '/').lower(): f for f in crcs2}
+        files1 = set(names1)
+        files2 = set(names2)
+        common = files1 & files2
+        changed = [names1[f] for f in common if crcs1[names1[f]] != crcs2[names2[f]]]
         
         return {
             "same_files": files1 == files2,
-            "only_in_first": list(files1 - files2),
-            "only_in_second": list(files2 - files1),
-            "common_files": list(files1 & files2)
+            "identical": files1 == files2 and not changed,
+            "only_in_first": [names1[f] for f in files1 - files2],
+            "only_in_second": [names2[f] for f in files2 - files1],
+            "common_files": [names1[f] for f in common],
+            "changed_files": changed
         }